@@ -0,0 +1,45 @@
+"""add litter_groups.cluster_id for bulk cluster reconciliation
+
+Revision ID: a7d3e5f19c42
+Revises: f3a9b1c6d274
+Create Date: 2026-10-16 21:37:12.540193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e5f19c42'
+down_revision: Union[str, None] = 'f3a9b1c6d274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'litter_groups',
+        sa.Column('cluster_id', sa.Integer(), nullable=True,
+                  comment='Stable DBSCAN cluster id for system-created "Cluster <id>" groups'),
+    )
+    # backfill from the name; the oldest group wins where a name was duplicated
+    op.execute("""
+        UPDATE litter_groups g
+           SET cluster_id = substring(g.name FROM '^Cluster ([0-9]+)$')::int
+         WHERE g.id IN (
+            SELECT DISTINCT ON (name) id
+              FROM litter_groups
+             WHERE name ~ '^Cluster [0-9]+$'
+             ORDER BY name, created_at
+         );
+    """)
+    # arbiter for INSERT ... ON CONFLICT (cluster_id)
+    op.create_index('ux_litter_groups_cluster_id', 'litter_groups', ['cluster_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_litter_groups_cluster_id', table_name='litter_groups')
+    op.drop_column('litter_groups', 'cluster_id')
@@ -0,0 +1,33 @@
+"""create faiss_id_map table
+
+Revision ID: b7d41e2c9a10
+Revises: 5cc6d8cbb9de
+Create Date: 2026-10-16 10:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d41e2c9a10'
+down_revision: Union[str, None] = '5cc6d8cbb9de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'faiss_id_map',
+        sa.Column('faiss_id', sa.BigInteger(), sa.Identity(always=False), primary_key=True),
+        sa.Column('report_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('litter_reports.id', ondelete='CASCADE'), nullable=False),
+        sa.UniqueConstraint('report_id', name='uq_faiss_id_map_report_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('faiss_id_map')
@@ -0,0 +1,37 @@
+"""add cities.boundary for offline reverse geocoding
+
+Revision ID: c52e8b1d07f4
+Revises: a7d3e5f19c42
+Create Date: 2026-10-16 23:05:41.218337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# import Geometry from GeoAlchemy2, not from sqlalchemy.dialects.postgresql
+from geoalchemy2 import Geometry
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52e8b1d07f4'
+down_revision: Union[str, None] = 'a7d3e5f19c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema: add boundary multipolygon column."""
+    op.add_column(
+        'cities',
+        sa.Column(
+            'boundary',
+            Geometry(geometry_type='MULTIPOLYGON', srid=4326),
+            nullable=True,
+            comment="Administrative boundary for offline reverse geocoding"
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema: drop boundary column."""
+    op.drop_column('cities', 'boundary')
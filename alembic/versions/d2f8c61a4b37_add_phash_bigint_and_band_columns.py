@@ -0,0 +1,42 @@
+"""add phash bigint and band columns to image_fingerprints
+
+Revision ID: d2f8c61a4b37
+Revises: b7d41e2c9a10
+Create Date: 2026-10-16 14:03:52.417930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from api.litter_reports.phash_columns import PHASH_BANDS, PHASH_INT_SQL, phash_band_sql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f8c61a4b37'
+down_revision: Union[str, None] = 'b7d41e2c9a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # generated columns backfill existing rows and stay in sync with `phash`
+    op.add_column(
+        'image_fingerprints',
+        sa.Column('phash_int', sa.BigInteger(), sa.Computed(PHASH_INT_SQL, persisted=True)),
+    )
+    for name in PHASH_BANDS:
+        op.add_column(
+            'image_fingerprints',
+            sa.Column(name, sa.Integer(), sa.Computed(phash_band_sql(name), persisted=True)),
+        )
+        op.create_index(f'ix_image_fingerprints_{name}', 'image_fingerprints', [name])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(list(PHASH_BANDS)):
+        op.drop_index(f'ix_image_fingerprints_{name}', table_name='image_fingerprints')
+        op.drop_column('image_fingerprints', name)
+    op.drop_column('image_fingerprints', 'phash_int')
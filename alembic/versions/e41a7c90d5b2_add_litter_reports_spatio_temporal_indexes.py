@@ -0,0 +1,36 @@
+"""add spatio-temporal indexes on litter_reports for upload dedupe
+
+Revision ID: e41a7c90d5b2
+Revises: d2f8c61a4b37
+Create Date: 2026-10-16 15:21:07.662318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a7c90d5b2'
+down_revision: Union[str, None] = 'd2f8c61a4b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # plain GiST on geom (normally created with the table by GeoAlchemy2)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_litter_reports_geom ON litter_reports USING gist (geom);")
+    # find_spatio_temporal filters with ST_DWithin on geom::geography, which only
+    # an index on that expression can serve. Queries must emit the same plain
+    # cast (utils.geoutils.as_geography); CAST(geom AS geography(GEOMETRY,-1))
+    # is a different expression and skips this index
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_litter_reports_geom_geography "
+        "ON litter_reports USING gist ((geom::geography));"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS idx_litter_reports_created_at ON litter_reports (created_at DESC);")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_litter_reports_geom_geography;")
@@ -0,0 +1,40 @@
+"""add (created_at, id) indexes for keyset pagination
+
+Revision ID: f3a9b1c6d274
+Revises: e41a7c90d5b2
+Create Date: 2026-10-16 18:02:44.118907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9b1c6d274'
+down_revision: Union[str, None] = 'e41a7c90d5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # cursor pages filter and order on the (created_at, id) row value
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_litter_reports_created_at_id "
+        "ON litter_reports (created_at DESC, id DESC);"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_cleanup_events_created_at_id "
+        "ON cleanup_events (created_at DESC, id DESC);"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_notifications_user_created_at_id "
+        "ON notifications (user_id, created_at DESC, id DESC);"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_notifications_user_created_at_id;")
+    op.execute("DROP INDEX IF EXISTS ix_cleanup_events_created_at_id;")
+    op.execute("DROP INDEX IF EXISTS ix_litter_reports_created_at_id;")
@@ -1,8 +1,9 @@
 # Controller
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Response, status
 from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.cleanup_events.cleanup_events_service import CleanupEventService
 from api.cleanup_events.cleanup_events_schema import ( EventStatus, VerificationStatus, CleanupEventCreate,CleanupEventRead, CleanupEventUpdate,  CleanupEventDetail, CleanupEventSummary, ReportWithVerifications)
 from api.litter_groups.litter_groups_schema import ClusterSuggestion
@@ -34,6 +35,25 @@ class CleanupEventController:
         evs = service.list_events(params, group_id)
         return [CleanupEventRead.model_validate(e) for e in evs]
 
+    @staticmethod
+    async def list_events_async(
+        db: AsyncSession,
+        params: QueryParams[CleanupEvent],
+        group_id: Optional[UUID] = None,
+        response: Optional[Response] = None,
+    ) -> List[CleanupEventRead]:
+        evs = await CleanupEventService.list_events_async(db, params, group_id)
+        if response is not None:
+            # the body stays a plain list; paging metadata travels in headers
+            cursor = params.next_cursor(evs)
+            if cursor:
+                response.headers["X-Next-Cursor"] = cursor
+            mode = params.count_mode(default="none")
+            if mode != "none":
+                total = await CleanupEventService.count_events_async(db, mode, group_id)
+                response.headers["X-Total-Count"] = str(total)
+        return [CleanupEventRead.model_validate(e) for e in evs]
+
     @staticmethod
     def get_event(
         event_id: UUID,
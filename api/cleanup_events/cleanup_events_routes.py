@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from typing import List, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
-from config.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import get_db, get_async_db
 from middlewares.auth_middleware import auth_middleware
 from middlewares.role_middleware import role_middleware
 from api.cleanup_events.cleanup_events_schema import (
@@ -67,12 +68,13 @@ def join_roles(db=Depends(get_db), current_user=Depends(auth_middleware)):
     return CleanupEventController.list_join_roles(db)
 
 @router.get("/", response_model=List[CleanupEventRead])
-def list_events(
+async def list_events(
+    response: Response,
     params = Depends(QueryParams[CleanupEvent]),
-    db=Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     litter_group_id: Optional[UUID] = None,
 ):
-    return CleanupEventController.list_events(db, params, litter_group_id)
+    return await CleanupEventController.list_events_async(db, params, litter_group_id, response)
 
 
 @router.get("/{event_id}", response_model=CleanupEventRead)
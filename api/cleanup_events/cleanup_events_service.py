@@ -1,7 +1,8 @@
 from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
-from sqlalchemy import func, desc, asc
+from sqlalchemy import func, desc, asc, select
 from sqlalchemy.orm import Session,aliased, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.sql import text, exists, insert, update
 from shapely.geometry import mapping
@@ -32,7 +33,7 @@ from api.photo_verifications.photo_verifications_model import PhotoVerification
 from api.badges.badges_service import BadgeService
 from config.points_config import PointReason
 from config.badges_config import BadgeKey
-from utils.query_params import QueryParams
+from utils.query_params import QueryParams, count_rows_async
 class CleanupEventService:
     def __init__(self, db: Session):
         self.db = db
@@ -141,17 +142,18 @@ class CleanupEventService:
         return event
 
 
-    def list_events(
-    self,
-    params: QueryParams[CleanupEvent],         # pagination & sort params
-    group_id: Optional[UUID] = None,
-    ) -> List[CleanupEvent]:
+    @staticmethod
+    def _list_events_stmt(
+        params: QueryParams[CleanupEvent],
+        group_id: Optional[UUID] = None,
+    ):
+        """SELECT shared by list_events and list_events_async."""
         # alias the group table so we can pull in its fields
         Group = aliased(LitterGroup)
 
         # 1️⃣ build the base query joining in group & organizer
-        q = (
-            self.db.query(
+        stmt = (
+            select(
                 CleanupEvent,
                 Group.severity.label("group_severity"),
                 func.ST_Y(Group.geom).label("centroid_lat"),
@@ -164,17 +166,15 @@ class CleanupEventService:
 
         # 2️⃣ apply group filter if provided
         if group_id:
-            q = q.filter(CleanupEvent.litter_group_id == group_id)
+            stmt = stmt.where(CleanupEvent.litter_group_id == group_id)
 
         # 3️⃣ apply sort & pagination from params
-        try:
-            q = params.apply(q, CleanupEvent)
-        except ValueError as e:
-            # you can turn this into an HTTP 400 if you're in a controller/router
-            raise
+        # (ValueError on a bad sort_by; you can turn this into an HTTP 400 in a controller/router)
+        return params.apply(stmt, CleanupEvent)
 
-        # 4️⃣ fetch & peel out the raw rows into your CleanupEvent instances
-        rows = q.all()
+    @staticmethod
+    def _peel_event_rows(rows) -> List[CleanupEvent]:
+        # 4️⃣ peel out the raw rows into your CleanupEvent instances
         results: List[CleanupEvent] = []
         for event, grp_sev, lat, lng, org_name in rows:
             setattr(event, "severity",        grp_sev)
@@ -185,6 +185,35 @@ class CleanupEventService:
 
         return results
 
+    def list_events(
+    self,
+    params: QueryParams[CleanupEvent],         # pagination & sort params
+    group_id: Optional[UUID] = None,
+    ) -> List[CleanupEvent]:
+        rows = self.db.execute(self._list_events_stmt(params, group_id)).all()
+        return self._peel_event_rows(rows)
+
+    @staticmethod
+    async def list_events_async(
+        db: AsyncSession,
+        params: QueryParams[CleanupEvent],
+        group_id: Optional[UUID] = None,
+    ) -> List[CleanupEvent]:
+        rows = (await db.execute(CleanupEventService._list_events_stmt(params, group_id))).all()
+        return CleanupEventService._peel_event_rows(rows)
+
+    @staticmethod
+    async def count_events_async(
+        db: AsyncSession,
+        mode: str,
+        group_id: Optional[UUID] = None,
+    ) -> Optional[int]:
+        stmt = select(CleanupEvent.id)
+        if group_id:
+            stmt = stmt.where(CleanupEvent.litter_group_id == group_id)
+        # unfiltered listing can use the planner's row estimate
+        return await count_rows_async(db, stmt, mode, estimate_table=None if group_id else "cleanup_events")
+
     
     def get_event(self, event_id: UUID, user_id: int) -> Optional[CleanupEvent]:
         try:
@@ -1,4 +1,3 @@
-import math
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 
@@ -12,6 +11,9 @@ from api.litter_detections.litter_detections_model import LitterDetection
 from api.dashboard.dashboard_schema import EventOut
 from api.user.user_points_model import UserPointsLog
 from api.cleanup_events.event_join_model import EventJoin
+from api.uploads.uploads_model import Upload
+from config.settings import settings
+from utils.geoutils import as_geography
 # ─── User Dashboard Services ────────────────────────────────────────────────
 
 def get_total_litter_reports(db: Session, user_id: int) -> int:
@@ -35,36 +37,48 @@ def get_events_attended(db: Session, user_id: int) -> int:
     )
 
 
-def _haversine_distance(lat1, lon1, lat2, lon2):
-    φ1, φ2 = math.radians(lat1), math.radians(lat2)
-    Δφ = math.radians(lat2 - lat1)
-    Δλ = math.radians(lon2 - lon1)
-    a = math.sin(Δφ/2)**2 + math.cos(φ1)*math.cos(φ2)*math.sin(Δλ/2)**2
-    c = 2*math.atan2(math.sqrt(a), math.sqrt(1-a))
-    return 6371 * c
-
-
-def get_nearby_litter(db: Session, user_lat: float, user_lng: float, radius_km=5.0):
-    reports = db.query(LitterReport).all()
-    out = []
-    for r in reports:
-        if r.latitude is None or r.longitude is None:
-            continue
-        dist = _haversine_distance(user_lat, user_lng, r.latitude, r.longitude)
-        if dist <= radius_km:
-            before = getattr(r.upload, "file_url", None)
-            after = before if r.status == "resolved" else None
-            out.append({
-                "id": r.id,
-                "latitude": r.latitude,
-                "longitude": r.longitude,
-                "before_image_url": before,
-                "after_image_url": after,
-                "distance_km": round(dist, 2),
-                "status": r.status,
-            })
-    out.sort(key=lambda x: x["distance_km"])
-    return out
+def _nearby_row(report_id, lat, lng, status, file_url, dist_km) -> Dict[str, Any]:
+    return {
+        "id": report_id,
+        "latitude": lat,
+        "longitude": lng,
+        "before_image_url": file_url,
+        "after_image_url": file_url if status == "resolved" else None,
+        "distance_km": round(dist_km, 2),
+        "status": status,
+    }
+
+
+def _nearby_litter_postgis(db: Session, user_lat: float, user_lng: float, radius_km: float, limit: int):
+    point = as_geography(func.ST_SetSRID(func.ST_MakePoint(user_lng, user_lat), 4326))
+    geog = as_geography(LitterReport.geom)
+    rows = (
+        db.query(
+            LitterReport.id, LitterReport.latitude, LitterReport.longitude,
+            LitterReport.status, Upload.file_url,
+            func.ST_Distance(geog, point).label("dist_m"),
+        )
+          .outerjoin(Upload, Upload.id == LitterReport.upload_id)
+          .filter(func.ST_DWithin(geog, point, radius_km * 1000))
+          .order_by(geog.op("<->")(point))
+          .limit(limit)
+          .all()
+    )
+    return [
+        _nearby_row(r.id, r.latitude, r.longitude, r.status, r.file_url, r.dist_m / 1000.0)
+        for r in rows
+    ]
+
+
+def get_nearby_litter(db: Session, user_lat: float, user_lng: float, radius_km=5.0, limit: Optional[int] = None):
+    """
+    Up to `limit` reports within `radius_km`, nearest first, with their upload URL.
+    ST_DWithin + KNN (<->) on geom::geography, both served by the GiST
+    expression index, so only nearby rows are read. Requires PostGIS, like the
+    geometry columns of the models themselves.
+    """
+    limit = limit or settings.NEARBY_LITTER_LIMIT
+    return _nearby_litter_postgis(db, user_lat, user_lng, radius_km, limit)
 
 def get_registered_events(db: Session, user_id: int) -> List[EventOut]:
     """
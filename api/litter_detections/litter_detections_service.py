@@ -5,7 +5,7 @@ import threading
 import logging
 from urllib.parse import urlparse, urljoin
 from pathlib import Path
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Union
 
 import cv2
 import numpy as np
@@ -16,10 +16,20 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from fastapi.encoders import jsonable_encoder
 import platform
+from dataclasses import replace
 from config.settings import settings
 from api.litter_detections.litter_detections_model import LitterDetection
 from api.litter_reports.litter_reports_model import LitterReport
 from api.uploads.uploads_model import Upload
+from api.uploads.uploads_storage import SOURCE_HTTP, read_local_upload, record_fetch
+from api.litter_detections.ort_session import create_session, profile_from_settings
+from api.litter_detections.preprocessing import (
+    LetterboxBuffer,
+    LetterboxMeta,
+    get_thread_buffer,
+    letterbox_into,
+)
+from utils.decoded_image import DecodedImage, DETECTION_INPUT_SIZE
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -43,8 +53,19 @@ MODEL_SOURCE = os.getenv("MODEL_SOURCE", "onnx")  # for metadata only
 UPLOAD_URL = os.getenv("UPLOAD_URL") or getattr(settings, "UPLOAD_URL", "http://localhost:8000")
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "60"))
 
-# ONNX Runtime session global + lock (lazy init)
-_ORT_SESSION: Optional[ort.InferenceSession] = None
+# Quantized INT8 copy produced by scripts/quantize_detector.py
+INT8_MODEL_PATH = (
+    os.getenv("INT8_MODEL_PATH")
+    or getattr(settings, "INT8_MODEL_PATH", None)
+    or f"{os.path.splitext(MODEL_PATH)[0]}.int8.onnx"
+)
+MODEL_VARIANTS = {
+    "fp32": MODEL_PATH,
+    "int8": INT8_MODEL_PATH,
+}
+
+# ONNX Runtime sessions per model variant + lock (lazy init)
+_ORT_SESSIONS: Dict[str, ort.InferenceSession] = {}
 _SESSION_LOCK = threading.Lock()
 
 # requests session (reuse TCP connections)
@@ -52,25 +73,37 @@ _requests_session = requests.Session()
 _requests_session.headers.update({"User-Agent": "litter-detector/1.0"})
 
 
-def _load_onnx_session(model_path: str) -> ort.InferenceSession:
-    """Create and return an ONNX Runtime session for the given path (CPU)."""
-    providers = ["CPUExecutionProvider"]
-    logger.info("Loading ONNX model from %s", model_path)
-    sess = ort.InferenceSession(model_path, providers=providers)
-    return sess
+def _load_onnx_session(model_path: str, variant: str = "fp32") -> ort.InferenceSession:
+    """Create and return an ONNX Runtime session for the given path (CPU), using the configured ORT profile."""
+    profile = profile_from_settings()
+    if profile.optimized_model_path and variant != "fp32":
+        # keep one serialized optimized graph per variant
+        root, ext = os.path.splitext(profile.optimized_model_path)
+        profile = replace(profile, optimized_model_path=f"{root}.{variant}{ext}")
+    return create_session(model_path, profile)
 
 
-def get_ort_session() -> ort.InferenceSession:
-    """Lazy-load and return the shared ONNX Runtime session."""
-    global _ORT_SESSION
-    if _ORT_SESSION is None:
+def get_ort_session(variant: Optional[str] = None) -> ort.InferenceSession:
+    """
+    Lazy-load and return the shared ONNX Runtime session for a model variant
+    (defaults to settings.MODEL_VARIANT).
+    """
+    variant = variant or getattr(settings, "MODEL_VARIANT", "fp32")
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant {variant!r}; choose one of {sorted(MODEL_VARIANTS)}")
+
+    session = _ORT_SESSIONS.get(variant)
+    if session is None:
         with _SESSION_LOCK:
-            if _ORT_SESSION is None:
-                if not os.path.exists(MODEL_PATH):
-                    logger.error("Model file missing at %s", MODEL_PATH)
-                    raise RuntimeError(f"Model not found at {MODEL_PATH}")
-                _ORT_SESSION = _load_onnx_session(MODEL_PATH)
-    return _ORT_SESSION
+            session = _ORT_SESSIONS.get(variant)
+            if session is None:
+                model_path = MODEL_VARIANTS[variant]
+                if not os.path.exists(model_path):
+                    logger.error("Model file missing at %s", model_path)
+                    raise RuntimeError(f"Model not found at {model_path}")
+                session = _load_onnx_session(model_path, variant)
+                _ORT_SESSIONS[variant] = session
+    return session
 
 
 def determine_severity(
@@ -108,14 +141,20 @@ def determine_severity(
     return severity
 
 
-def fetch_image_bytes(path_or_url: str) -> bytes:
+def fetch_image_bytes(path_or_url: str) -> Union[bytes, np.ndarray]:
     """
     Robust image fetcher:
-      - Accepts either a full http(s) URL or a path relative to settings.UPLOAD_URL
+      - Reads the file straight from the local upload volume when it is present
+        (mmap / np.fromfile, see api.uploads.uploads_storage)
+      - Otherwise accepts either a full http(s) URL or a path relative to settings.UPLOAD_URL
       - Attaches Authorization: Bearer <UPLOAD_ACCESS_TOKEN> when fetching from uploads
       - Logs headers, redirect chain, and response codes
       - Retries on server errors (5xx) but not client errors (4xx)
     """
+    local = read_local_upload(path_or_url)
+    if local is not None:
+        return local.data
+
     parsed = urlparse(path_or_url)
     if parsed.scheme in ("http", "https"):
         file_url = path_or_url
@@ -192,6 +231,7 @@ def fetch_image_bytes(path_or_url: str) -> bytes:
         logger.error("Failed to download image, status=%s url=%s", resp.status_code, file_url)
         raise HTTPException(502, detail=f"Failed to download image, status={resp.status_code}")
 
+    record_fetch(SOURCE_HTTP)
     return resp.content
 
 def _letterbox_resize(img: np.ndarray, new_shape: int = 640) -> Tuple[np.ndarray, float, Tuple[int, int]]:
@@ -248,47 +288,92 @@ def _nms(boxes: np.ndarray, scores: np.ndarray, iou_thresh: float = 0.45) -> Lis
     return keep
 
 
-def run_detection_on_image_bytes(img_bytes: bytes, conf_thresh: float = 0.25, iou_thresh: float = 0.45, input_size: int = 640) -> Dict[str, Any]:
+# Map classes -> label strings: you should provide your label map near the model,
+# or embed it in the model metadata.
+LABELS = ["plastic_bag", "plastic_bottle", "paper_waste", "food_wrapper"]
+
+
+def _empty_detection_result() -> Dict[str, Any]:
+    return {
+        "detected_objects": [],
+        "bounding_boxes": [],
+        "total_litter_count": 0,
+        "severity_level": "none",
+        "detection_source": "onnx",
+        "detection_confidence": 0.0,
+        "review_status": "pending",
+        "reviewed_by": None,
+        "review_notes": None,
+    }
+
+
+def prepare_detection_input(img_bytes: bytes, input_size: int = 640) -> Tuple[np.ndarray, LetterboxMeta]:
     """
-    Runs inference using ONNX Runtime. 
-    NOTE: This implementation expects the ONNX export to include NMS and to produce
-    a final detection output with rows like [x1, y1, x2, y2, conf, class].
-    If your ONNX export produces raw predictions (like many YOLO exports without `include-nms`),
-    you'll need a different postprocessing decode step.
+    Decode image bytes and build the (3, input_size, input_size) float32 CHW tensor
+    the detector expects, plus the letterbox geometry for postprocessing.
+    The returned tensor is owned by the caller; hot paths should letterbox into a
+    reusable LetterboxBuffer instead (see preprocessing.letterbox_into).
     """
-    arr = np.frombuffer(img_bytes, dtype=np.uint8)
-    img_bgr = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-    if img_bgr is None:
-        raise RuntimeError("BAD_DECODE")
-    h0, w0 = img_bgr.shape[:2]
-
-    # prepare input
-    img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
-    resized, scale, (pad_x, pad_y) = _letterbox_resize(img_rgb, new_shape=input_size)
-    tensor = resized.astype(np.float32) / 255.0
-    # CHW
-    tensor = np.transpose(tensor, (2, 0, 1))
-    tensor = np.expand_dims(tensor, 0).astype(np.float32)
-
-    session = get_ort_session()
-    input_name = session.get_inputs()[0].name
-    outputs = session.run(None, {input_name: tensor})
-    preds = outputs[0]
+    buffer = LetterboxBuffer(1, input_size)
+    meta = letterbox_into(img_bytes, buffer, 0)
+    return buffer.tensor[0], meta
 
+
+def _split_batch_output(preds: Any, batch_size: int) -> Optional[List[np.ndarray]]:
+    """
+    Split a batched NMS output into one (N, 6) array per image.
+    Supports (B, N, 6+) and flat (M, 7) outputs whose first column is the batch index.
+    Returns None when the layout cannot be attributed to individual images.
+    """
+    if preds is None:
+        return [np.zeros((0, 6), dtype=np.float32) for _ in range(batch_size)]
+    preds = np.asarray(preds)
+    if preds.size == 0:
+        return [np.zeros((0, 6), dtype=np.float32) for _ in range(batch_size)]
+    if preds.ndim == 3 and preds.shape[0] == batch_size:
+        return [preds[i] for i in range(batch_size)]
+    if batch_size == 1 and preds.ndim == 2:
+        return [preds]
+    if preds.ndim == 2 and preds.shape[1] == 7:
+        batch_idx = preds[:, 0].astype(int)
+        return [preds[batch_idx == i, 1:] for i in range(batch_size)]
+    return None
+
+
+def run_inference_batch(tensors: np.ndarray, variant: Optional[str] = None) -> List[np.ndarray]:
+    """
+    Run the detector on a stacked (B, 3, H, W) tensor and return per-image predictions.
+    Falls back to one session.run per image when the exported model has a fixed batch
+    dimension or an output layout that cannot be split per image.
+    """
+    session = get_ort_session(variant)
+    model_input = session.get_inputs()[0]
+    batch_size = tensors.shape[0]
+
+    declared_batch = model_input.shape[0] if model_input.shape else None
+    if batch_size > 1 and isinstance(declared_batch, int) and declared_batch != batch_size:
+        logger.info("Model input batch is fixed at %s; running %d images sequentially", declared_batch, batch_size)
+        return [run_inference_batch(tensors[i:i + 1], variant)[0] for i in range(batch_size)]
+
+    outputs = session.run(None, {model_input.name: tensors})
+    split = _split_batch_output(outputs[0], batch_size)
+    if split is None:
+        if batch_size == 1:
+            return [np.asarray(outputs[0])]
+        logger.warning("Cannot split batched output of shape %s; re-running sequentially", np.shape(outputs[0]))
+        return [run_inference_batch(tensors[i:i + 1], variant)[0] for i in range(batch_size)]
+    return split
+
+
+def postprocess_detections(preds: np.ndarray, meta: LetterboxMeta, conf_thresh: float = 0.25, iou_thresh: float = 0.45) -> Dict[str, Any]:
+    """
+    Turn one image's NMS output rows [x1, y1, x2, y2, conf, class] into the detection payload,
+    undoing the letterbox so boxes are in source-image pixels.
+    """
     # Normalize output shape: many exports are (1, N, 6) or (N,6)
     if preds is None or (isinstance(preds, np.ndarray) and preds.size == 0):
         # nothing detected
-        return {
-            "detected_objects": [],
-            "bounding_boxes": [],
-            "total_litter_count": 0,
-            "severity_level": "none",
-            "detection_source": "onnx",
-            "detection_confidence": 0.0,
-            "review_status": "pending",
-            "reviewed_by": None,
-            "review_notes": None,
-        }
+        return _empty_detection_result()
 
     preds = np.asarray(preds)
     if preds.ndim == 3 and preds.shape[0] == 1:
@@ -307,17 +392,7 @@ def run_detection_on_image_bytes(img_bytes: bytes, conf_thresh: float = 0.25, io
     # filter by confidence
     keep_mask = scores >= conf_thresh
     if not np.any(keep_mask):
-        return {
-            "detected_objects": [],
-            "bounding_boxes": [],
-            "total_litter_count": 0,
-            "severity_level": "none",
-            "detection_source": "onnx",
-            "detection_confidence": 0.0,
-            "review_status": "pending",
-            "reviewed_by": None,
-            "review_notes": None,
-        }
+        return _empty_detection_result()
 
     boxes = boxes[keep_mask]
     scores = scores[keep_mask]
@@ -327,12 +402,12 @@ def run_detection_on_image_bytes(img_bytes: bytes, conf_thresh: float = 0.25, io
     # boxes currently in pixel coords of padded/resized image; need to remove padding and scale
     # We know: resized image = original * scale with padding (pad_x, pad_y)
     # So first subtract pad, then divide by scale.
-    boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad_x) / (scale + 1e-9)
-    boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad_y) / (scale + 1e-9)
+    boxes[:, [0, 2]] = (boxes[:, [0, 2]] - meta.pad_x) / (meta.scale + 1e-9)
+    boxes[:, [1, 3]] = (boxes[:, [1, 3]] - meta.pad_y) / (meta.scale + 1e-9)
 
     # clamp to image size
-    boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, w0)
-    boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, h0)
+    boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, meta.orig_w)
+    boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, meta.orig_h)
 
     # run NMS again as a safety (some exports include NMS but duplicates can remain)
     keep_idx = _nms(boxes, scores, iou_thresh)
@@ -340,10 +415,6 @@ def run_detection_on_image_bytes(img_bytes: bytes, conf_thresh: float = 0.25, io
     final_scores = scores[keep_idx].tolist()
     final_classes = classes[keep_idx].tolist()
 
-    # Map classes -> label strings: you should provide your label map near the model,
-    # or embed it in the model metadata. Here we use numeric labels (stringified).
-    LABELS = ["plastic_bag","plastic_bottle", "paper_waste", "food_wrapper"]
-
     detections = []
     for cls_idx, conf in zip(final_classes, final_scores):
         label = LABELS[int(cls_idx)]
@@ -351,7 +422,7 @@ def run_detection_on_image_bytes(img_bytes: bytes, conf_thresh: float = 0.25, io
 
     avg_conf = float(np.mean(final_scores)) if final_scores else 0.0
     total = len(detections)
-    severity = determine_severity(total, final_boxes, (w0, h0))
+    severity = determine_severity(total, final_boxes, (meta.orig_w, meta.orig_h))
 
     return {
         "detected_objects": detections,
@@ -366,9 +437,48 @@ def run_detection_on_image_bytes(img_bytes: bytes, conf_thresh: float = 0.25, io
     }
 
 
-def create_litter_detection(db: Session, report_id: uuid.UUID) -> LitterDetection:
+def run_detection_on_image(
+    image: DecodedImage,
+    conf_thresh: float = 0.25,
+    iou_thresh: float = 0.45,
+    variant: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run the detector on an already-decoded image (see utils.decoded_image)."""
+    buffer = get_thread_buffer(DETECTION_INPUT_SIZE)
+    meta = image.letterbox_into(buffer, 0)
+    preds = run_inference_batch(buffer.tensor[:1], variant)[0]
+    return postprocess_detections(preds, meta, conf_thresh=conf_thresh, iou_thresh=iou_thresh)
+
+
+def run_detection_on_image_bytes(
+    img_bytes: bytes,
+    conf_thresh: float = 0.25,
+    iou_thresh: float = 0.45,
+    input_size: int = 640,
+    variant: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Runs inference using ONNX Runtime. 
+    NOTE: This implementation expects the ONNX export to include NMS and to produce
+    a final detection output with rows like [x1, y1, x2, y2, conf, class].
+    If your ONNX export produces raw predictions (like many YOLO exports without `include-nms`),
+    you'll need a different postprocessing decode step.
+    """
+    buffer = get_thread_buffer(input_size)
+    meta = letterbox_into(img_bytes, buffer, 0)
+    preds = run_inference_batch(buffer.tensor[:1], variant)[0]
+    return postprocess_detections(preds, meta, conf_thresh=conf_thresh, iou_thresh=iou_thresh)
+
+
+def create_litter_detection(
+    db: Session,
+    report_id: uuid.UUID,
+    detection_results: Optional[Dict[str, Any]] = None,
+) -> LitterDetection:
     """
     Runs detection and persists both the LitterDetection and report update.
+    When `detection_results` is given (e.g. from a batched inference run) the
+    fetch + inference steps are skipped and the precomputed payload is persisted.
     Guarantees the report.status is updated on any failure.
     """
     report = None
@@ -382,11 +492,12 @@ def create_litter_detection(db: Session, report_id: uuid.UUID) -> LitterDetectio
         if not upload or not upload.file_url:
             raise HTTPException(400, detail="No upload or file_url")
 
-        # 2) fetch image
-        img_bytes = fetch_image_bytes(upload.file_url)
+        if detection_results is None:
+            # 2) fetch image
+            img_bytes = fetch_image_bytes(upload.file_url)
 
-        # 3) run detection
-        detection_results = run_detection_on_image_bytes(img_bytes)
+            # 3) run detection
+            detection_results = run_detection_on_image_bytes(img_bytes)
         total = detection_results["total_litter_count"]
         if total == 0:
             # Mark report as no-litter and keep record
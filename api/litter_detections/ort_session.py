@@ -0,0 +1,184 @@
+# api/litter_detections/ort_session.py
+"""
+ONNX Runtime session profiles.
+
+A profile bundles the SessionOptions knobs that matter on small CPU machines
+(thread pools, graph optimization level, execution mode, memory arena/pattern)
+plus an optional path where the optimized graph is serialized, so later
+processes can skip the optimization pass. A sidecar `<path>.key` records the
+source model, optimization level, execution providers and ORT version the
+graph was optimized under; a mismatch re-optimizes instead of loading it. The active profile is chosen by
+`settings.ORT_PROFILE`; individual `ORT_*` settings override its fields.
+"""
+import os
+import json
+import hashlib
+import logging
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+import onnxruntime as ort
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+PROVIDERS = ["CPUExecutionProvider"]
+
+
+@dataclass(frozen=True)
+class SessionProfile:
+    name: str
+    intra_op_threads: int = 0        # 0 lets ORT pick (one per physical core)
+    inter_op_threads: int = 0
+    graph_optimization: str = "all"
+    execution_mode: str = "sequential"
+    enable_mem_arena: bool = True
+    enable_mem_pattern: bool = True
+    optimized_model_path: Optional[str] = None
+
+
+PROFILES: Dict[str, SessionProfile] = {
+    "default": SessionProfile(name="default"),
+    # 1 shared vCPU: avoid spinning extra threads that only contend for the core
+    "single_core": SessionProfile(
+        name="single_core",
+        intra_op_threads=1,
+        inter_op_threads=1,
+    ),
+    # trade a little latency for a smaller resident set on 1 GB machines
+    "low_memory": SessionProfile(
+        name="low_memory",
+        intra_op_threads=1,
+        inter_op_threads=1,
+        enable_mem_arena=False,
+        enable_mem_pattern=False,
+    ),
+    # multi-core workers running batched inference
+    "throughput": SessionProfile(
+        name="throughput",
+        intra_op_threads=0,
+        inter_op_threads=2,
+        execution_mode="parallel",
+    ),
+}
+
+
+def get_profile(name: str) -> SessionProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown ORT profile {name!r}; choose one of {sorted(PROFILES)}")
+
+
+def profile_from_settings() -> SessionProfile:
+    """Resolve the configured profile and apply any explicit ORT_* overrides."""
+    profile = get_profile(settings.ORT_PROFILE)
+    overrides = {
+        "intra_op_threads": settings.ORT_INTRA_OP_THREADS,
+        "inter_op_threads": settings.ORT_INTER_OP_THREADS,
+        "graph_optimization": settings.ORT_GRAPH_OPTIMIZATION_LEVEL,
+        "execution_mode": settings.ORT_EXECUTION_MODE,
+        "enable_mem_arena": settings.ORT_ENABLE_MEM_ARENA,
+        "enable_mem_pattern": settings.ORT_ENABLE_MEM_PATTERN,
+        "optimized_model_path": settings.ORT_OPTIMIZED_MODEL_PATH,
+    }
+    return replace(profile, **{k: v for k, v in overrides.items() if v is not None})
+
+
+def build_session_options(profile: SessionProfile) -> ort.SessionOptions:
+    if profile.graph_optimization not in GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(f"Invalid graph_optimization {profile.graph_optimization!r}")
+    if profile.execution_mode not in EXECUTION_MODES:
+        raise ValueError(f"Invalid execution_mode {profile.execution_mode!r}")
+
+    so = ort.SessionOptions()
+    so.intra_op_num_threads = profile.intra_op_threads
+    so.inter_op_num_threads = profile.inter_op_threads
+    so.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[profile.graph_optimization]
+    so.execution_mode = EXECUTION_MODES[profile.execution_mode]
+    so.enable_cpu_mem_arena = profile.enable_mem_arena
+    so.enable_mem_pattern = profile.enable_mem_pattern
+    return so
+
+
+def _cache_key(model_path: str, profile: SessionProfile) -> str:
+    """What the serialized graph depends on: source model, optimization level, providers, ORT."""
+    return hashlib.sha256(json.dumps({
+        "model": os.path.abspath(model_path),
+        "graph_optimization": profile.graph_optimization,
+        "providers": PROVIDERS,
+        "ort_version": ort.__version__,
+    }, sort_keys=True).encode()).hexdigest()
+
+
+def _key_path(optimized_path: str) -> str:
+    return f"{optimized_path}.key"
+
+
+def _is_fresh(optimized_path: str, model_path: str, key: str) -> bool:
+    if not (
+        os.path.exists(optimized_path)
+        and os.path.getmtime(optimized_path) >= os.path.getmtime(model_path)
+    ):
+        return False
+    try:
+        with open(_key_path(optimized_path)) as fh:
+            return fh.read().strip() == key
+    except OSError:
+        return False
+
+
+def _write_key(optimized_path: str, key: str) -> None:
+    tmp = f"{_key_path(optimized_path)}.tmp"
+    with open(tmp, "w") as fh:
+        fh.write(key)
+    os.replace(tmp, _key_path(optimized_path))
+
+
+def create_session(model_path: str, profile: Optional[SessionProfile] = None) -> ort.InferenceSession:
+    """
+    Build a CPU InferenceSession for `model_path` using `profile`.
+
+    When the profile names an `optimized_model_path`, a serialized graph newer than
+    the source model and optimized under the same settings (see `_cache_key`) is
+    loaded directly (optimizations already applied); otherwise the optimized
+    graph is written there for the next process to reuse.
+    """
+    profile = profile or profile_from_settings()
+    so = build_session_options(profile)
+    source = model_path
+    write_key = None
+
+    if profile.optimized_model_path:
+        key = _cache_key(model_path, profile)
+        if _is_fresh(profile.optimized_model_path, model_path, key):
+            source = profile.optimized_model_path
+            so.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS["disable"]
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(profile.optimized_model_path)), exist_ok=True)
+            so.optimized_model_filepath = profile.optimized_model_path
+            write_key = key
+
+    logger.info(
+        "Loading ONNX model from %s (profile=%s, intra=%d, inter=%d, opt=%s, mode=%s, arena=%s, pattern=%s)",
+        source, profile.name, profile.intra_op_threads, profile.inter_op_threads,
+        profile.graph_optimization, profile.execution_mode,
+        profile.enable_mem_arena, profile.enable_mem_pattern,
+    )
+    session = ort.InferenceSession(source, sess_options=so, providers=PROVIDERS)
+    if write_key:
+        _write_key(profile.optimized_model_path, write_key)
+    return session
@@ -0,0 +1,207 @@
+# api/litter_detections/preprocessing.py
+"""
+Detection preprocessing that writes straight into a preallocated NCHW float32 buffer.
+
+The original path decoded at full resolution, converted BGR→RGB, letterboxed
+with copyMakeBorder, then cast/divided/transposed/expanded — several full-frame
+copies per image. Here:
+  - JPEGs much larger than the model input are decoded with IMREAD_REDUCED_*
+    (DCT-domain downscale), so a 12 MP phone photo never materialises in full;
+  - the resize lands in a reusable per-slot uint8 scratch buffer;
+  - BGR→RGB, /255 and HWC→CHW happen in one strided write per channel into the
+    slot of a reusable (B, 3, S, S) tensor, and only the padding border is filled.
+"""
+import io
+import threading
+from typing import NamedTuple, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+PAD_VALUE = 114
+_INV_255 = np.float32(1.0 / 255.0)
+_PAD_FLOAT = np.float32(PAD_VALUE / 255.0)
+
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+ImageBuffer = Union[bytes, bytearray, memoryview, np.ndarray]
+
+_EXIF_ORIENTATION = 0x0112
+_HEADER_PROBE_BYTES = 256 * 1024
+
+
+class LetterboxMeta(NamedTuple):
+    """Geometry needed to map model-space boxes back onto the source image."""
+    scale: float      # model pixels per source-image pixel
+    pad_x: int
+    pad_y: int
+    orig_w: int
+    orig_h: int
+
+
+def _as_uint8(data: ImageBuffer) -> np.ndarray:
+    if isinstance(data, np.ndarray):
+        return data.reshape(-1).view(np.uint8)
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+class ImageHeader(NamedTuple):
+    format: Optional[str]
+    size: Optional[Tuple[int, int]]   # stored (un-rotated) width, height
+    orientation: int = 1              # EXIF orientation tag, 1 = upright
+
+
+def _parse_header(stream: io.BytesIO) -> ImageHeader:
+    with Image.open(stream) as img:
+        orientation = img.getexif().get(_EXIF_ORIENTATION, 1) if img.format == "JPEG" else 1
+        return ImageHeader(img.format, img.size, int(orientation or 1))
+
+
+def read_image_header(data: ImageBuffer) -> ImageHeader:
+    """Read format, stored size and EXIF orientation without decoding pixels."""
+    arr = _as_uint8(data)
+    # the header (incl. a max-size EXIF segment) sits in the first few hundred KB;
+    # probing a prefix avoids copying a whole mmap'd photo into a BytesIO
+    for probe in (arr[:_HEADER_PROBE_BYTES], arr):
+        try:
+            return _parse_header(io.BytesIO(probe.tobytes()))
+        except Exception:
+            if probe.size == arr.size:
+                break
+    return ImageHeader(None, None, 1)
+
+
+def choose_reduction(width: int, height: int, target: int) -> int:
+    """Largest JPEG reduction factor that keeps the long side at or above `target`."""
+    long_side = max(width, height)
+    for factor in (8, 4, 2):
+        if long_side // factor >= target:
+            return factor
+    return 1
+
+
+def decode_image(data: ImageBuffer, target: int = 640, header: Optional[ImageHeader] = None) -> Tuple[np.ndarray, ImageHeader]:
+    """
+    Decode to BGR in stored orientation (EXIF not applied), using a reduced-
+    resolution JPEG decode when the source is much larger than `target`.
+    """
+    arr = _as_uint8(data)
+    header = header or read_image_header(arr)
+    factor = 1
+    if header.format == "JPEG" and header.size:
+        factor = choose_reduction(*header.size, target)
+
+    img = cv2.imdecode(arr, _REDUCED_FLAGS[factor] | cv2.IMREAD_IGNORE_ORIENTATION)
+    if img is None:
+        raise RuntimeError("BAD_DECODE")
+    if not header.size:
+        header = header._replace(size=(img.shape[1], img.shape[0]))
+    return img, header
+
+
+def apply_exif_orientation(img: np.ndarray, orientation: int) -> np.ndarray:
+    """Rotate/flip a stored-orientation image upright, matching cv2.IMREAD_COLOR."""
+    if orientation == 2:
+        return cv2.flip(img, 1)
+    if orientation == 3:
+        return cv2.rotate(img, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(img, 0)
+    if orientation == 5:
+        return cv2.transpose(img)
+    if orientation == 6:
+        return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+    if orientation == 7:
+        return cv2.rotate(cv2.transpose(img), cv2.ROTATE_180)
+    if orientation == 8:
+        return cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return img
+
+
+def oriented_size(header: ImageHeader) -> Tuple[int, int]:
+    w, h = header.size
+    return (h, w) if header.orientation in (5, 6, 7, 8) else (w, h)
+
+
+def decode_for_detection(data: ImageBuffer, target: int = 640) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Decode to upright BGR (EXIF orientation applied, as with IMREAD_COLOR).
+    Returns (image, (orig_w, orig_h)) with the original full-resolution size in
+    the same orientation as the returned image.
+    """
+    img, header = decode_image(data, target)
+    return apply_exif_orientation(img, header.orientation), oriented_size(header)
+
+
+class LetterboxBuffer:
+    """Reusable (batch, 3, size, size) float32 input tensor plus per-slot resize scratch."""
+
+    def __init__(self, batch_size: int = 1, input_size: int = 640):
+        self.batch_size = batch_size
+        self.input_size = input_size
+        self.tensor = np.empty((batch_size, 3, input_size, input_size), dtype=np.float32)
+        self._scratch = np.empty((batch_size, input_size * input_size * 3), dtype=np.uint8)
+
+    def fill(self, slot: int, img_bgr: np.ndarray) -> Tuple[float, int, int]:
+        """
+        Letterbox a BGR image into `slot` as normalized RGB CHW.
+        Returns (scale, pad_x, pad_y) relative to the given image.
+        """
+        size = self.input_size
+        h, w = img_bgr.shape[:2]
+        scale = min(size / w, size / h)
+        new_w, new_h = int(w * scale), int(h * scale)
+        left = (size - new_w) // 2
+        top = (size - new_h) // 2
+
+        resized = self._scratch[slot, : new_h * new_w * 3].reshape(new_h, new_w, 3)
+        cv2.resize(img_bgr, (new_w, new_h), dst=resized, interpolation=cv2.INTER_LINEAR)
+
+        out = self.tensor[slot]
+        out[:, :top, :] = _PAD_FLOAT
+        out[:, top + new_h:, :] = _PAD_FLOAT
+        out[:, top:top + new_h, :left] = _PAD_FLOAT
+        out[:, top:top + new_h, left + new_w:] = _PAD_FLOAT
+
+        # BGR → RGB, uint8 → [0, 1], HWC → CHW in one write per channel
+        for c in range(3):
+            np.multiply(
+                resized[:, :, 2 - c],
+                _INV_255,
+                out=out[c, top:top + new_h, left:left + new_w],
+                casting="unsafe",
+            )
+        return scale, left, top
+
+
+def letterbox_image(img_bgr: np.ndarray, orig_size: Tuple[int, int], buffer: LetterboxBuffer, slot: int = 0) -> LetterboxMeta:
+    """Letterbox an already-decoded upright image whose source resolution was `orig_size`."""
+    orig_w, orig_h = orig_size
+    scale, pad_x, pad_y = buffer.fill(slot, img_bgr)
+    # express the scale against the original (not reduced-decode) resolution
+    scale *= img_bgr.shape[1] / orig_w
+    return LetterboxMeta(scale, pad_x, pad_y, orig_w, orig_h)
+
+
+def letterbox_into(data: ImageBuffer, buffer: LetterboxBuffer, slot: int = 0) -> LetterboxMeta:
+    """Decode `data` and letterbox it into `buffer.tensor[slot]`."""
+    img, orig_size = decode_for_detection(data, target=buffer.input_size)
+    return letterbox_image(img, orig_size, buffer, slot)
+
+
+_thread_buffers = threading.local()
+
+
+def get_thread_buffer(input_size: int = 640) -> LetterboxBuffer:
+    """Single-slot buffer owned by the calling thread, reused across calls."""
+    buf = getattr(_thread_buffers, "buffer", None)
+    if buf is None or buf.input_size != input_size:
+        buf = LetterboxBuffer(1, input_size)
+        _thread_buffers.buffer = buf
+    return buf
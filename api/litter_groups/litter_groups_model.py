@@ -62,6 +62,8 @@ class LitterGroup(Base):
         nullable=True,
         comment="Polygon hull used to prevent reclustering of locked groups"
     )
+    cluster_id     = Column(Integer, nullable=True, unique=True,
+                            comment='Stable DBSCAN cluster id for system-created "Cluster <id>" groups')
     created_at     = Column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at     = Column(DateTime(timezone=True),
                             default=datetime.utcnow,
@@ -0,0 +1,239 @@
+# api/litter_groups/litter_groups_reconcile.py
+"""
+Bulk reconciliation of the system "Cluster <id>" groups with the clustering.
+
+plan_reconciliation diffs the wanted state (cluster suggestions) against the
+litter_groups rows keyed by cluster_id and the reports' current group_id.
+apply_reconciliation writes only that diff, in one transaction:
+
+  1. INSERT ... ON CONFLICT (cluster_id) DO UPDATE for new or changed groups
+  2. UPDATE litter_reports ... FROM (VALUES ...) for reports that move
+  3. report_count = 0 for clusters that no longer exist
+
+then commits once. A second run against the same clustering writes nothing.
+"""
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from shapely.geometry import shape
+from sqlalchemy import func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from api.litter_groups.litter_groups_model import (
+    GroupStatusEnum,
+    GroupTypeEnum,
+    GroupVerificationEnum,
+    LitterGroup,
+)
+from api.litter_groups.litter_groups_schema import ClusterReconcileSummary, ClusterSuggestion
+from api.litter_reports.litter_reports_model import LitterReport
+from utils.incremental_dbscan import CLUSTER_GROUP_NAME
+
+# rows per INSERT / UPDATE ... FROM (VALUES ...) statement (all in one transaction)
+RECONCILE_BATCH = 1000
+# coverage_area is a POLYGON column; hulls of collinear or coincident points are
+# buffered by this many degrees (~1 m) to become one
+COVERAGE_MIN_BUFFER_DEG = 1e-5
+# centroids closer than this (degrees) count as unchanged
+CENTROID_TOLERANCE_DEG = 1e-7
+
+# columns refreshed on conflict; name/created_by/is_locked keep their first values
+_UPSERT_COLUMNS = ("description", "geom", "coverage_area", "severity", "report_count", "updated_at")
+
+
+@dataclass
+class GroupChange:
+    cluster_id: int
+    action: str               # "create" | "update"
+    values: Dict[str, Any]    # litter_groups row
+
+
+@dataclass
+class ReconcilePlan:
+    full: bool
+    groups: List[GroupChange] = field(default_factory=list)
+    unchanged: int = 0
+    emptied: List[int] = field(default_factory=list)
+    assign: Dict[UUID, int] = field(default_factory=dict)       # report id -> cluster id
+    release: List[UUID] = field(default_factory=list)
+    group_ids: Dict[int, UUID] = field(default_factory=dict)    # cluster id -> existing group id
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.groups or self.emptied or self.assign or self.release)
+
+    def summary(self, dry_run: bool) -> ClusterReconcileSummary:
+        return ClusterReconcileSummary(
+            dry_run=dry_run,
+            full=self.full,
+            created=sorted(g.cluster_id for g in self.groups if g.action == "create"),
+            updated=sorted(g.cluster_id for g in self.groups if g.action == "update"),
+            emptied=sorted(self.emptied),
+            unchanged=self.unchanged,
+            reports_assigned=len(self.assign),
+            reports_released=len(self.release),
+        )
+
+
+def _group_row(s: ClusterSuggestion, system_user_id: int, now: datetime) -> Dict[str, Any]:
+    hull = shape(s.hull)
+    coverage = hull if hull.geom_type == "Polygon" else hull.buffer(COVERAGE_MIN_BUFFER_DEG)
+    centroid = hull.centroid
+    return {
+        "id": uuid.uuid4(),
+        "cluster_id": s.cluster_id,
+        "name": CLUSTER_GROUP_NAME.format(s.cluster_id),
+        "description": f"{s.report_count} reports",
+        "group_type": GroupTypeEnum.public,
+        "status": GroupStatusEnum.active,
+        "verification_status": GroupVerificationEnum.pending,
+        "geom": f"SRID=4326;POINT({centroid.x} {centroid.y})",
+        "coverage_area": f"SRID=4326;{coverage.wkt}",
+        "severity": s.avg_severity,
+        "report_count": s.report_count,
+        "created_by": system_user_id,
+        "is_locked": False,
+        "member_count": 0,
+        "created_at": now,
+        "updated_at": now,
+        # compared against the stored row, not written
+        "_centroid": (centroid.x, centroid.y),
+    }
+
+
+def _batches(items: List, size: int = RECONCILE_BATCH) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _current_groups(
+    db: Session,
+    member_ids: List[UUID],
+    group_ids: List[UUID],
+    full: bool,
+) -> Dict[UUID, Tuple[Optional[UUID], bool]]:
+    """(group_id, is_grouped) of every report that is a member or sits in one of `group_ids`."""
+    cols = (LitterReport.id, LitterReport.group_id, LitterReport.is_grouped)
+    if full:
+        rows = db.execute(select(*cols).where(or_(LitterReport.group_id.isnot(None), LitterReport.is_grouped))).all()
+    else:
+        rows = []
+        if group_ids:
+            rows += db.execute(select(*cols).where(LitterReport.group_id.in_(group_ids))).all()
+        for chunk in _batches(member_ids):
+            rows += db.execute(select(*cols).where(LitterReport.id.in_(chunk))).all()
+    return {r.id: (r.group_id, bool(r.is_grouped)) for r in rows}
+
+
+def plan_reconciliation(
+    db: Session,
+    suggestions: List[ClusterSuggestion],
+    system_user_id: int,
+    scope: Optional[Set[int]] = None,
+    removed: Iterable[int] = (),
+) -> ReconcilePlan:
+    """
+    Diff `suggestions` against the database. With `scope` (cluster ids whose
+    membership changed) only those groups and `removed` ones are examined;
+    without it, every cluster group is.
+    """
+    full = scope is None
+    plan = ReconcilePlan(full=full)
+    now = datetime.utcnow()
+
+    stmt = select(
+        LitterGroup.id, LitterGroup.cluster_id, LitterGroup.report_count, LitterGroup.severity,
+        func.ST_X(LitterGroup.geom).label("lon"), func.ST_Y(LitterGroup.geom).label("lat"),
+    ).where(LitterGroup.cluster_id.isnot(None))
+    if not full:
+        stmt = stmt.where(LitterGroup.cluster_id.in_(set(scope) | set(removed)))
+    existing = {row.cluster_id: row for row in db.execute(stmt).all()}
+    plan.group_ids = {cid: row.id for cid, row in existing.items()}
+
+    # 1) groups
+    wanted = {s.cluster_id: s for s in suggestions}
+    for cid, s in wanted.items():
+        values = _group_row(s, system_user_id, now)
+        row = existing.get(cid)
+        if row is None:
+            plan.groups.append(GroupChange(cid, "create", values))
+            continue
+        lon, lat = values["_centroid"]
+        moved = (row.lon is None or abs(row.lon - lon) > CENTROID_TOLERANCE_DEG
+                 or abs(row.lat - lat) > CENTROID_TOLERANCE_DEG)
+        if moved or row.report_count != s.report_count or row.severity != s.avg_severity:
+            plan.groups.append(GroupChange(cid, "update", values))
+        else:
+            plan.unchanged += 1
+    plan.emptied = [cid for cid, row in existing.items() if cid not in wanted and row.report_count]
+
+    # 2) reports
+    member_of = {m["id"]: s.cluster_id for s in suggestions for m in (s.members or [])}
+    current = _current_groups(db, list(member_of), list(plan.group_ids.values()), full)
+    for rid, cid in member_of.items():
+        if current.get(rid) != (plan.group_ids.get(cid), True):
+            plan.assign[rid] = cid
+    cluster_group_ids = set(plan.group_ids.values())
+    plan.release = [
+        rid for rid, (gid, _) in current.items()
+        if gid in cluster_group_ids and rid not in member_of
+    ]
+    return plan
+
+
+def _move_reports(db: Session, moves: List[Tuple[UUID, Optional[UUID], bool]]) -> None:
+    for chunk in _batches(moves):
+        params: Dict[str, Any] = {}
+        tuples = []
+        for i, (rid, gid, grouped) in enumerate(chunk):
+            tuples.append(f"(CAST(:r{i} AS uuid), CAST(:g{i} AS uuid), CAST(:b{i} AS boolean))")
+            params[f"r{i}"] = str(rid)
+            params[f"g{i}"] = str(gid) if gid is not None else None
+            params[f"b{i}"] = grouped
+        db.execute(text(f"""
+            UPDATE litter_reports AS r
+               SET group_id = v.group_id,
+                   is_grouped = v.is_grouped
+              FROM (VALUES {", ".join(tuples)}) AS v(id, group_id, is_grouped)
+             WHERE r.id = v.id
+        """), params)
+
+
+def apply_reconciliation(db: Session, plan: ReconcilePlan) -> None:
+    """Write `plan` in one transaction; rolls back and re-raises on failure."""
+    if plan.is_empty:
+        return
+    try:
+        group_ids = dict(plan.group_ids)
+
+        # 1) upsert groups; RETURNING gives ids for new groups (or ones another run created)
+        rows = [{k: v for k, v in g.values.items() if not k.startswith("_")} for g in plan.groups]
+        for chunk in _batches(rows):
+            stmt = pg_insert(LitterGroup).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[LitterGroup.cluster_id],
+                set_={col: stmt.excluded[col] for col in _UPSERT_COLUMNS},
+            ).returning(LitterGroup.id, LitterGroup.cluster_id)
+            group_ids.update({cid: gid for gid, cid in db.execute(stmt)})
+
+        # 2) move reports
+        moves = [(rid, group_ids[cid], True) for rid, cid in plan.assign.items()]
+        moves += [(rid, None, False) for rid in plan.release]
+        _move_reports(db, moves)
+
+        # 3) clusters that merged away or dissolved
+        if plan.emptied:
+            db.execute(
+                update(LitterGroup)
+                .where(LitterGroup.cluster_id.in_(plan.emptied))
+                .values(report_count=0, description="0 reports", updated_at=datetime.utcnow())
+            )
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
@@ -120,4 +120,15 @@ class ClusterSuggestion(BaseModel):
                   
                 ]
             }
-        }
\ No newline at end of file
+        }
+
+# ─── Cluster Reconciliation Summary ──────────────────────────────────────────
+class ClusterReconcileSummary(BaseModel):
+    dry_run: bool
+    full: bool
+    created: List[int] = []           # cluster ids that get a new group
+    updated: List[int] = []           # cluster ids whose group row changes
+    emptied: List[int] = []           # cluster ids that no longer exist
+    unchanged: int = 0
+    reports_assigned: int = 0         # reports moved into a cluster group
+    reports_released: int = 0         # reports taken out of a cluster group
@@ -1,28 +1,58 @@
-from typing import List, Optional
+import json
+from typing import Dict, List, Optional
 from uuid import UUID
-import requests
-import time
-from sklearn.cluster import DBSCAN
 from shapely.ops import transform
 import numpy as np
-from sqlalchemy import text, or_, func
+from sqlalchemy import or_, func, text
 from sqlalchemy.orm import Session, joinedload, aliased
 from shapely import wkb
-from shapely.geometry import Point, MultiPoint, mapping, shape
+from shapely.geometry import MultiPoint, box, mapping
 from api.litter_reports.litter_reports_model import LitterReport
 from api.litter_groups.litter_groups_model import LitterGroup
 from api.litter_groups.litter_groups_schema import (
+    ClusterReconcileSummary,
     ClusterSuggestion,
     LitterGroupCreate,
     LitterGroupUpdate
 )
 from api.litter_detections.litter_detections_service import determine_severity
+from api.litter_groups.litter_groups_reconcile import apply_reconciliation, plan_reconciliation
+from config.settings import settings
+from utils.geoutils import postgis_available
+from utils.incremental_dbscan import ReportClusterIndex, get_report_cluster_index
 import pyproj
 
 # Set up transformer from Web Mercator (EPSG:3857) to WGS84 (EPSG:4326)
 project_to4326 = pyproj.Transformer.from_crs(
     "EPSG:3857", "EPSG:4326", always_xy=True
 ).transform
+
+# Clustering inside Postgres: one row per cluster, never per report.
+# Reports without geom fall back to their lat/lng columns; ids are aggregated
+# as text because psycopg2 does not parse uuid[].
+POSTGIS_CLUSTERS_SQL = text("""
+    WITH labelled AS (
+        SELECT id,
+               g,
+               ST_ClusterDBSCAN(g, eps := :eps, minpoints := :minpts) OVER () AS cid
+          FROM (
+            SELECT id,
+                   ST_Transform(COALESCE(geom, ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)), 3857) AS g
+              FROM litter_reports
+          ) pts
+    )
+    SELECT cid,
+           count(*)                                                          AS report_count,
+           ST_AsGeoJSON(ST_Transform(ST_ConvexHull(ST_Collect(g)), 4326))    AS hull,
+           ST_AsGeoJSON(ST_Transform(ST_Envelope(ST_Collect(g)), 4326))      AS bbox,
+           ST_XMin(ST_Extent(g)) AS minx, ST_YMin(ST_Extent(g)) AS miny,
+           ST_XMax(ST_Extent(g)) AS maxx, ST_YMax(ST_Extent(g)) AS maxy,
+           array_agg(id::text ORDER BY id)                                   AS member_ids
+      FROM labelled
+     WHERE cid IS NOT NULL
+     GROUP BY cid
+     ORDER BY cid
+""")
 class LitterGroupService:
     def __init__(self, db: Session):
         self.db = db
@@ -153,109 +183,59 @@ class LitterGroupService:
               .one_or_none()
         )
         
-    def reverse_geocode_city(lat: float, lon: float) -> Optional[str]:
-        try:
-            url = f"https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={lon}&format=json"
-            headers = {"User-Agent": "ecoCity/1.0"}
-            response = requests.get(url, headers=headers, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("address", {}).get("city") or data.get("address", {}).get("town") or data.get("address", {}).get("village")
-        except Exception as e:
-            print("Reverse geocode error:", e)
-        return None
-    
     # ─── CLUSTERING SUGGESTIONS ───────────────────────────────────────────────
-    def get_cluster_suggestions(
-    self,
-    eps: float = 500.0,
-    minpts: int = 3
+    @staticmethod
+    def _build_suggestions(
+        index: ReportClusterIndex,
+        clusters: Dict[int, List[UUID]],
     ) -> List[ClusterSuggestion]:
-        """
-        Generate cluster suggestions from litter reports using DBSCAN.
-
-        Handles:
-        - No data to cluster
-        - Noise filtering
-        - Severity computation using determine_severity
-        """
-
-    # 1) Fetch all raw report centroids in metric coords (EPSG:3857)
-        sql = text("""
-            SELECT id,
-                ST_X(ST_Transform(geom, 3857)) AS x,
-                ST_Y(ST_Transform(geom, 3857)) AS y,
-                severity
-            FROM litter_reports
-        """)
-        rows = self.db.execute(sql).fetchall()
-
-        if not rows:
-            return []  # Nothing to cluster
-
-        ids, xs, ys, severities = zip(*rows)
-        coords = np.column_stack((xs, ys))
+        labels = sorted(clusters)
+        if not labels:
+            return []
+        sizes = [len(clusters[label]) for label in labels]
+        coords = index.coords([rid for label in labels for rid in clusters[label]])
 
-    # 2) Run DBSCAN clustering
-        db = DBSCAN(eps=eps, min_samples=minpts).fit(coords)
-        labels = db.labels_
+    # 1) Reproject every member point to lat/lon in one vectorized call
+        lons, lats = project_to4326(coords[:, 0], coords[:, 1])
+        bounds = np.cumsum([0] + sizes)
 
         suggestions: List[ClusterSuggestion] = []
+        for label, lo, hi in zip(labels, bounds[:-1], bounds[1:]):
+            member_ids = clusters[label]
+            pts = coords[lo:hi]
 
-        for cluster_label in sorted(set(labels)):
-            if cluster_label == -1:
-                continue  # skip noise
-
-            idx = np.where(labels == cluster_label)[0]
-            if len(idx) == 0:
-                continue
-
-            points_3857 = [Point(coords[i]) for i in idx]
-            multipoint = MultiPoint(points_3857)
-
-            report_count = len(idx)
-
-        # 3) Compute convex hull and bounding box in EPSG:3857
-            hull_3857 = multipoint.convex_hull
-            bbox_3857 = multipoint.envelope
+        # 2) Convex hull and bounding box in EPSG:3857
+            minx, miny = pts.min(axis=0)
+            maxx, maxy = pts.max(axis=0)
+            hull_3857 = MultiPoint(pts).convex_hull
+            bbox_3857 = box(minx, miny, maxx, maxy)
 
-        # 4) Reproject to EPSG:4326
-            hull_4326 = transform(project_to4326, hull_3857)
-            bbox_4326 = transform(project_to4326, bbox_3857)
+        # 3) Reproject to EPSG:4326
+            hull_geojson = mapping(transform(project_to4326, hull_3857))
+            bbox_geojson = mapping(transform(project_to4326, bbox_3857))
 
-            hull_geojson = mapping(hull_4326)
-            bbox_geojson = mapping(bbox_4326)
-
-        # 5) Compute severity using determine_severity
-            minx, miny, maxx, maxy = bbox_3857.bounds
-            bounding_boxes = [[minx, miny, maxx, maxy]]
+        # 4) Compute severity using determine_severity
             severity_str = determine_severity(
-                total_count=report_count,
-                bounding_boxes=bounding_boxes,
+                total_count=len(member_ids),
+                bounding_boxes=[[minx, miny, maxx, maxy]],
                 image_size=None
             )
 
-        # 6) Reproject member points to lat/lon
-            transformer = pyproj.Transformer.from_crs("EPSG:3857", "EPSG:4326", always_xy=True)
-            members = []
-            for i in idx:
-                try:
-                    lon, lat = transformer.transform(xs[i], ys[i])
-                    members.append({
-                    'id': ids[i],
-                    'point': {'type': 'Point', 'coordinates': (lon, lat)},
-                    'severity': severities[i]
-                    })
-                except Exception:
-                    continue  # skip failed transforms
+            members = [
+                {
+                    'id': rid,
+                    'point': {'type': 'Point', 'coordinates': (float(lon), float(lat))},
+                    'severity': index.severity.get(rid),
+                }
+                for rid, lon, lat in zip(member_ids, lons[lo:hi], lats[lo:hi])
+            ]
 
-        # 7) Assemble suggestion
             suggestions.append(
                 ClusterSuggestion(
-                    cluster_id=int(cluster_label),
-                    report_count=report_count,
+                    cluster_id=label,
+                    report_count=len(member_ids),
                     avg_severity=severity_str,
-                        hull=hull_geojson,
+                    hull=hull_geojson,
                     bbox=bbox_geojson,
                     members=members
                 )
@@ -263,71 +243,92 @@ class LitterGroupService:
 
         return suggestions
 
-    def reconcile_clusters(
+    def _postgis_cluster_suggestions(
+        self,
+        eps: float,
+        minpts: int
+    ) -> List[ClusterSuggestion]:
+        suggestions: List[ClusterSuggestion] = []
+        for row in self.db.execute(POSTGIS_CLUSTERS_SQL, {"eps": eps, "minpts": minpts}):
+            suggestions.append(
+                ClusterSuggestion(
+                    cluster_id=row.cid,
+                    report_count=row.report_count,
+                    avg_severity=determine_severity(
+                        total_count=row.report_count,
+                        bounding_boxes=[[row.minx, row.miny, row.maxx, row.maxy]],
+                        image_size=None
+                    ),
+                    hull=json.loads(row.hull),
+                    bbox=json.loads(row.bbox),
+                    members=[{'id': UUID(rid)} for rid in row.member_ids]
+                )
+            )
+        return suggestions
+
+    def get_cluster_suggestions(
     self,
     eps: float = 500.0,
     minpts: int = 3,
-    system_user_id: int = 23
-    ) -> List[LitterGroup]:
+    engine: Optional[str] = None
+    ) -> List[ClusterSuggestion]:
         """
-        1) get_cluster_suggestions might return an empty list if no data matches your eps/minpts filters.
-        2) Calling `zip(*rows)` on an empty list causes `ValueError: not enough values to unpack`.
-        3) Your query parameters (eps/minpts) may be too restrictive, filtering out all points.
-        4) Lack of logging makes it hard to know how many rows you actually fetched.
+        Cluster suggestions, by `engine` (default settings.CLUSTER_ENGINE):
+
+        incremental  the incrementally maintained DBSCAN index
+                     (utils/incremental_dbscan.py). Only reports added, moved
+                     or deleted since the last call are applied; cluster_id is
+                     stable across calls.
+        postgis      ST_ClusterDBSCAN inside Postgres, returning per-cluster
+                     aggregates only; members carry ids but no point/severity,
+                     and cluster_id is only meaningful within one call. Falls
+                     back to the index when PostGIS is not installed.
         """
+        engine = engine or settings.CLUSTER_ENGINE
+        if engine == "postgis" and postgis_available(self.db):
+            return self._postgis_cluster_suggestions(eps, minpts)
 
-    # 1) Fetch cluster suggestions (could be empty)
-        suggestions = self.get_cluster_suggestions(eps, minpts)
-
-    # 2) Guard against empty suggestions early
-        if not suggestions:
-        # nothing to cluster—return empty list (or you could raise an error)
-            return []
-
-        created: List[LitterGroup] = []
+        index = get_report_cluster_index(eps, minpts)
+        with index.lock:
+            index.sync(self.db)
+            return self._build_suggestions(index, index.clusters())
 
-        for s in suggestions:
-            geom_shape = shape(s.hull)
-            lon, lat = geom_shape.centroid.x, geom_shape.centroid.y
-            name = f"Cluster {s.cluster_id}"
+    def reconcile_clusters(
+    self,
+    eps: float = 500.0,
+    minpts: int = 3,
+    system_user_id: Optional[int] = None,
+    full: bool = False,
+    dry_run: bool = False
+    ) -> ClusterReconcileSummary:
+        """
+        Bring the "Cluster <id>" groups in line with the clustering in one
+        transaction (see litter_groups_reconcile.py).
 
-            grp = self.db.query(LitterGroup).filter_by(name=name).first()
-            if not grp:
-                grp = LitterGroup(
-                    name=name,
-                    description=f"{s.report_count} reports",
-                    group_type='public',
-                    geom=f"SRID=4326;POINT({lon} {lat})",
-                    severity=s.avg_severity,
-                    created_by=system_user_id,
-                    coverage_area=f"SRID=4326;{geom_shape.wkt}",
-                    is_locked=False
+        Only clusters whose membership changed since the last reconcile in this
+        process are diffed (all of them on the first run, or with `full`,
+        which also rebuilds the clustering). With `dry_run` nothing is written
+        and the pending changes stay pending. Returns the diff.
+        """
+        system_user_id = system_user_id or settings.CLUSTER_SYSTEM_USER_ID
+        index = get_report_cluster_index(eps, minpts)
+        with index.lock:
+            index.sync(self.db, full=full)
+            delta = index.take_delta()
+            try:
+                clusters = index.clusters(None if full else delta.changed)
+                plan = plan_reconciliation(
+                    self.db,
+                    self._build_suggestions(index, clusters),
+                    system_user_id,
+                    scope=None if full else delta.changed,
+                    removed=delta.removed,
                 )
-                self.db.add(grp)
-                self.db.commit()
-                self.db.refresh(grp)
-            else:
-                grp.description = f"{s.report_count} reports"
-                self.db.commit()
-
-            # Assign reports to this group
-            (self.db.query(LitterReport)
-            .filter(LitterReport.id.in_([m['id'] for m in s.members]))
-            .update({
-                'group_id': grp.id,
-                'is_grouped': True
-            }, synchronize_session=False)
-        )
-            self.db.commit()
-
-            # Update group metadata
-            grp.report_count = s.report_count
-            grp.severity = s.avg_severity
-            self.db.add(grp)
-            self.db.commit()
-            self.db.refresh(grp)
-
-            created.append(grp)
-            time.sleep(1)
-
-        return created
\ No newline at end of file
+                if not dry_run:
+                    apply_reconciliation(self.db, plan)
+            except Exception:
+                index.restore_delta(delta)
+                raise
+            if dry_run:
+                index.restore_delta(delta)
+        return plan.summary(dry_run)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, BigInteger, ForeignKey, Identity
+from sqlalchemy.dialects.postgresql import UUID
+from config.database import Base
+
+class FaissIdMap(Base):
+    __tablename__ = 'faiss_id_map'
+
+    # FAISS ids are int64; this gives every report a stable, dense one
+    faiss_id = Column(BigInteger, Identity(always=False), primary_key=True)
+    report_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('litter_reports.id', ondelete='CASCADE'),
+        unique=True,
+        nullable=False
+    )
@@ -1,8 +1,9 @@
 import uuid
-from sqlalchemy import Column, String, LargeBinary, ForeignKey
+from sqlalchemy import Column, String, LargeBinary, ForeignKey, BigInteger, Integer, Computed
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from config.database import Base
+from api.litter_reports.phash_columns import PHASH_INT_SQL, phash_band_sql
 
 class ImageFingerprint(Base):
     __tablename__ = 'image_fingerprints'
@@ -17,6 +18,12 @@ class ImageFingerprint(Base):
     phash = Column(String(64), nullable=False)
     embedding = Column(LargeBinary, nullable=False)
 
+    phash_int = Column(BigInteger, Computed(PHASH_INT_SQL, persisted=True))
+    phash_b0 = Column(Integer, Computed(phash_band_sql("phash_b0"), persisted=True), index=True)
+    phash_b1 = Column(Integer, Computed(phash_band_sql("phash_b1"), persisted=True), index=True)
+    phash_b2 = Column(Integer, Computed(phash_band_sql("phash_b2"), persisted=True), index=True)
+    phash_b3 = Column(Integer, Computed(phash_band_sql("phash_b3"), persisted=True), index=True)
+
     # backref to the report
     report = relationship(
         'LitterReport',
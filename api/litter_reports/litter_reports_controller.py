@@ -1,12 +1,14 @@
 import uuid
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from config.database import get_db
 from api.litter_reports.litter_reports_service import (
     create_litter_report,
     get_user_litter_reports,
     get_all_litter_reports,
+    get_all_litter_reports_async,
     get_litter_report,
     update_litter_report,
     delete_litter_report,
@@ -113,6 +115,32 @@ def list_litter_reports_controller(
         total_litter_count=result["total_litter_count"],
         reports=result["items"],
         groups=result["clusters"],
+        next_cursor=result["next_cursor"],
+    )
+
+async def list_litter_reports_controller_async(
+    db: AsyncSession,
+    params: Optional[QueryParams[LitterReport]] = None,
+    status: Optional[str] = None,
+    city: Optional[str] = None,
+    landmark: Optional[str] = None,
+    detection_status: Optional[str] = None,
+) -> LitterReportListResponse:
+    result = await get_all_litter_reports_async(
+        db=db,
+        params=params,
+        status=status,
+        city=city,
+        landmark=landmark,
+        detection_status=detection_status,
+    )
+
+    return LitterReportListResponse(
+        total_count=result["total_count"],
+        total_litter_count=result["total_litter_count"],
+        reports=result["items"],
+        groups=result["clusters"],
+        next_cursor=result["next_cursor"],
     )
 
 def get_litter_report_controller(
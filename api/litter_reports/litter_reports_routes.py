@@ -3,8 +3,9 @@ import uuid
 from typing import List, Optional
 from fastapi import APIRouter, Depends, Form, Query, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from config.database import get_db
+from config.database import get_db, get_async_db
 from middlewares.auth_middleware import auth_middleware
 from middlewares.role_middleware import role_middleware
 from api.litter_reports.litter_reports_controller import (
@@ -13,7 +14,7 @@ from api.litter_reports.litter_reports_controller import (
     update_report_controller,
     delete_report_controller,
     mark_reports_on_map_controller,
-    list_litter_reports_controller,
+    list_litter_reports_controller_async,
     get_user_litter_reports_controller,
     get_user_litter_report_controller
 )
@@ -106,15 +107,15 @@ def get_user_litter_report_route(
     response_model=LitterReportListResponse,
     summary="List all litter reports",
 )
-def list_litter_reports(
+async def list_litter_reports(
     params: Optional[QueryParams[LitterReport]] = Depends(optional_pagination),
     status: Optional[str] = Query(None, description="Filter by report status"),
     city: Optional[str] = Query(None, description="Filter by city name"),
     landmark: Optional[str] = Query(None, description="Filter by landmark name"),
     detection_status: Optional[str] = Query(None, description="Filter by detection_status"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return list_litter_reports_controller(
+    return await list_litter_reports_controller_async(
         db=db,
         params=params,
         status=status,
@@ -129,18 +130,18 @@ def list_litter_reports(
     summary="List all litter reports",
     dependencies=[Depends(role_middleware(required_roles=["admin"]))]
 )
-def list_litter_reports_user(
+async def list_litter_reports_user(
     params: QueryParams[LitterReport] = Depends(),
     status:            Optional[str]   = Query(None, description="Filter by report status"),
     city:              Optional[str]   = Query(None, description="Filter by city name"),
     detection_status:  Optional[str]   = Query(None, description="Filter by detection_status"),
-    db:                Session          = Depends(get_db),
+    db:                AsyncSession     = Depends(get_async_db),
 ):
     """
     Returns every litter report (optional status, city, detection_status filters),
     plus counts and clusters.
     """
-    return list_litter_reports_controller(
+    return await list_litter_reports_controller_async(
         db=db,
         params=params,
         status=status,
@@ -69,7 +69,9 @@ class LitterReportResponse(LitterReportBase):
         if v is None:
             return None
         try:
-            data = bytes(v.data) if hasattr(v, 'data') else bytes(v)
+            raw = v.data if hasattr(v, 'data') else v
+            # asyncpg hands geometry back as hex-encoded EWKB text
+            data = bytes.fromhex(raw) if isinstance(raw, str) else bytes(raw)
             geom_obj = wkb.loads(data)
             return mapping(geom_obj)
         except Exception:
@@ -91,18 +93,20 @@ class GroupSummary(BaseModel):
         if v is None:
             return None
         try:
-            data = bytes(v.data) if hasattr(v, "data") else bytes(v)
+            raw = v.data if hasattr(v, "data") else v
+            data = bytes.fromhex(raw) if isinstance(raw, str) else bytes(raw)
             shape = wkb.loads(data)
             return mapping(shape)
         except Exception:
             return None
 
 class LitterReportListResponse(BaseModel):
-    total_count: int
-    total_litter_count: int
+    total_count: Optional[int]            # None when the request asked for count=none
+    total_litter_count: Optional[int]
     reports: List[LitterReportResponse]
     groups: List[GroupSummary]          # now returns multiple clusters
     group: Optional[GroupSummary] = None  # optional single for legacy
+    next_cursor: Optional[str] = None     # pass back as ?cursor= for the next keyset page
 
     class Config:
         orm_mode = True
\ No newline at end of file
@@ -3,20 +3,28 @@ import uuid
 import json
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import text, asc, desc, func, cast
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, asc, desc, func, cast, select
 from sqlalchemy.dialects.postgresql import JSONB
 from api.litter_reports.litter_reports_schema import LitterReportResponse
 from api.litter_reports.litter_reports_model import LitterReport
 from api.uploads.uploads_model import Upload
+from api.uploads.uploads_service import get_file_urls
 from api.litter_detections.litter_detections_model import LitterDetection
 from fastapi import HTTPException
 from typing import Any, Dict, List, Optional # Import Group model
-from api.litter_groups.litter_groups_service import LitterGroupService
+from api.location.city.city_geocode import resolve_city_id
 from shapely import wkb
 from shapely.geometry import Point
 from shapely.geometry import shape
 from geoalchemy2.shape import from_shape
-from utils.query_params import QueryParams
+from utils.query_params import (
+    QueryParams,
+    count_rows,
+    count_rows_async,
+    scalar_for_mode,
+    scalar_for_mode_async,
+)
 
 UPLOADS_DIR = os.path.join(os.getcwd(), "uploads")
 
@@ -83,6 +91,16 @@ def create_litter_report(db: Session, report_data: dict) -> LitterReport:
         print("❌ Exception:", e)
         return None
 
+def attach_image_urls(db: Session, reports: List[LitterReport]) -> List[LitterReport]:
+    """Set `image_url` on every report from its upload, with one query for the whole list."""
+    urls = get_file_urls(db, (r.upload_id for r in reports))
+    for r in reports:
+        url = urls.get(r.upload_id)
+        if url:
+            r.image_url = url
+    return reports
+
+
 def get_user_litter_reports(
     db: Session,
     params: QueryParams[LitterReport],     # pagination params first
@@ -144,14 +162,7 @@ def get_user_litter_reports(
         total_litter_count = 0
 
     # 7. Attach image URLs
-    for r in reports:
-        if r.upload_id:
-            row = db.execute(
-                text("SELECT file_url FROM uploads WHERE id = :u"),
-                {"u": str(r.upload_id)}
-            ).fetchone()
-            if row:
-                r.image_url = row.file_url
+    attach_image_urls(db, reports)
 
     # 8. Collect unique groups
     group_map: Dict[Any, Any] = {}
@@ -172,41 +183,27 @@ def get_user_litter_reports(
     
 
 
-def get_all_litter_reports(
-    db: Session,
-    params: Optional[QueryParams[LitterReport]] = None,
+def _all_reports_filters(
     status: Optional[str] = None,
     city: Optional[str] = None,
     landmark: Optional[str] = None,
-    detection_status: Optional[str] = None,  # expects values like "completed"
-) -> Dict[str, Any]:
-    """
-    Returns filtered & optionally paginated litter reports.
-    For double-encoded detection_results we use detection_results::text::json->>'status'
-    which reliably extracts the inner JSON's status before pagination.
-    """
-
-    # --- 1) Base query & static filters ---
-    base_q = db.query(LitterReport).options(joinedload(LitterReport.group))
-    base_q = base_q.filter(LitterReport.is_grouped.is_(False))
-
+    detection_status: Optional[str] = None,
+) -> List[Any]:
+    """WHERE clauses shared by the sync and async `get_all_litter_reports`."""
+    filters = [LitterReport.is_grouped.is_(False)]
     if status:
-        base_q = base_q.filter(LitterReport.status == status)
-
+        filters.append(LitterReport.status == status)
     if city:
-        base_q = base_q.filter(LitterReport.city.ilike(f"%{city}%"))
-    
+        filters.append(LitterReport.city.ilike(f"%{city}%"))
     if landmark:
-        base_q = base_q.filter(LitterReport.landmark.ilike(f"%{landmark}%"))
-
+        filters.append(LitterReport.landmark.ilike(f"%{landmark}%"))
     if detection_status:
-        status_filter = cast(LitterReport.detection_results, JSONB)["status"].astext == detection_status
-        base_q = base_q.filter(status_filter)
+        # detection_results::jsonb->>'status' also reads double-encoded values
+        filters.append(cast(LitterReport.detection_results, JSONB)["status"].astext == detection_status)
+    return filters
 
-    # --- 2) total_count after filtering (before pagination) ---
-    total_count = int(base_q.with_entities(func.count(LitterReport.id)).scalar() or 0)
 
-    # --- 3) Sorting ---
+def _all_reports_order(params: Optional[QueryParams[LitterReport]]):
     # choose sort_by/sort_order from params if present, otherwise sensible defaults
     sort_by = params.sort_by if params and getattr(params, "sort_by", None) else "id"
     sort_order = params.sort_order if params and getattr(params, "sort_order", None) else "desc"
@@ -214,11 +211,11 @@ def get_all_litter_reports(
     sort_col = getattr(LitterReport, sort_by, None)
     if not sort_col:
         raise ValueError(f"Invalid sort_by field: {sort_by}")
+    return desc(sort_col) if sort_order == "desc" else asc(sort_col)
 
-    ordered_q = base_q.order_by(desc(sort_col) if sort_order == "desc" else asc(sort_col))
 
-    # --- 4) Pagination (only if params provided) ---
-    q = ordered_q
+def _paginate(q, params: Optional[QueryParams[LitterReport]]):
+    """Apply offset/limit (only if params provided); works on Query and Select alike."""
     if params:
         # guard if offset/limit are Optional in QueryParams
         offset = getattr(params, "offset", None)
@@ -228,56 +225,119 @@ def get_all_litter_reports(
             q = q.offset(offset)
         if limit is not None:
             q = q.limit(limit)
+    return q
 
-    reports: List[LitterReport] = q.all()
 
-    # --- 5) total_litter_count (parallel aggregate query) ---
-    det_sum_q = (
-        db.query(func.coalesce(func.sum(LitterDetection.total_litter_count), 0))
-        .join(LitterReport, LitterReport.id == LitterDetection.litter_report_id)
-        .filter(LitterReport.is_grouped.is_(False))
-    )
-
-    if status:
-        det_sum_q = det_sum_q.filter(LitterReport.status == status)
+def _order_and_page(q, params: Optional[QueryParams[LitterReport]]):
+    """Keyset order/limit when params ask for it, else sort_by + offset/limit."""
+    if params and params.uses_keyset():
+        return params.apply(q, LitterReport)
+    return _paginate(q.order_by(_all_reports_order(params)), params)
 
-    if city:
-        det_sum_q = det_sum_q.filter(LitterReport.city.ilike(f"%{city}%"))
-
-    if detection_status:
-        status_filter = cast(LitterReport.detection_results, JSONB)["status"].astext == detection_status
-        det_sum_q = det_sum_q.filter(status_filter)
 
-    total_litter_count = int(det_sum_q.scalar() or 0)
+def _litter_sum_stmt(filters: List[Any]):
+    return (
+        select(func.coalesce(func.sum(LitterDetection.total_litter_count), 0))
+        .join(LitterReport, LitterReport.id == LitterDetection.litter_report_id)
+        .where(*filters)
+    )
 
-    # --- 6) Attach image URLs (unchanged) ---
-    for r in reports:
-        if getattr(r, "upload_id", None):
-            row = db.execute(
-                text("SELECT file_url FROM uploads WHERE id = :u"),
-                {"u": str(r.upload_id)}
-            ).fetchone()
-            if row:
-                r.image_url = row.file_url
 
-    # --- 7) Collect unique groups from current page ---
-    group_map: Dict[int, Group] = {}
+def _group_summaries(reports: List[LitterReport]) -> List[Dict[str, Any]]:
+    """Unique groups of the current page."""
+    group_map: Dict[Any, Any] = {}
     for r in reports:
         if r.group:
             group_map[r.group.id] = r.group
-
-    groups = [
+    return [
         {"id": g.id, "name": g.name, "coverage_area": g.coverage_area}
         for g in group_map.values()
     ]
 
+
+def get_all_litter_reports(
+    db: Session,
+    params: Optional[QueryParams[LitterReport]] = None,
+    status: Optional[str] = None,
+    city: Optional[str] = None,
+    landmark: Optional[str] = None,
+    detection_status: Optional[str] = None,  # expects values like "completed"
+) -> Dict[str, Any]:
+    """
+    Returns filtered & optionally paginated litter reports.
+    For double-encoded detection_results we use detection_results::text::json->>'status'
+    which reliably extracts the inner JSON's status before pagination.
+    Totals follow params.count_mode(): exact, estimated (cached) or none (None).
+    """
+    mode = params.count_mode() if params else "exact"
+
+    # --- 1) Base query & static filters ---
+    filters = _all_reports_filters(status, city, landmark, detection_status)
+    base_q = db.query(LitterReport).options(joinedload(LitterReport.group)).filter(*filters)
+
+    # --- 2) total_count after filtering (before pagination) ---
+    total_count = count_rows(db, select(LitterReport.id).where(*filters), mode)
+
+    # --- 3) Sorting & 4) Pagination (keyset or offset) ---
+    reports: List[LitterReport] = _order_and_page(base_q, params).all()
+
+    # --- 5) total_litter_count (parallel aggregate query) ---
+    total_litter_count = scalar_for_mode(db, _litter_sum_stmt(filters), mode)
+
+    # --- 6) Attach image URLs ---
+    attach_image_urls(db, reports)
+
+    # --- 7) Collect unique groups from current page ---
     return {
         "total_count": total_count,
-        "total_litter_count": total_litter_count,
+        "total_litter_count": None if total_litter_count is None else int(total_litter_count),
         "items": reports,
-        "clusters": groups,
+        "clusters": _group_summaries(reports),
+        "next_cursor": params.next_cursor(reports) if params else None,
     }
-    
+
+
+async def get_all_litter_reports_async(
+    db: AsyncSession,
+    params: Optional[QueryParams[LitterReport]] = None,
+    status: Optional[str] = None,
+    city: Optional[str] = None,
+    landmark: Optional[str] = None,
+    detection_status: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    `get_all_litter_reports` on an AsyncSession. Same filters and result shape;
+    image URLs come from an outer join on uploads in the page query itself.
+    """
+    mode = params.count_mode() if params else "exact"
+    filters = _all_reports_filters(status, city, landmark, detection_status)
+
+    total_count = await count_rows_async(db, select(LitterReport.id).where(*filters), mode)
+
+    stmt = _order_and_page(
+        select(LitterReport, Upload.file_url)
+        .outerjoin(Upload, Upload.id == LitterReport.upload_id)
+        .options(joinedload(LitterReport.group))
+        .where(*filters),
+        params,
+    )
+    reports: List[LitterReport] = []
+    for report, file_url in (await db.execute(stmt)).all():
+        if file_url:
+            report.image_url = file_url
+        reports.append(report)
+
+    total_litter_count = await scalar_for_mode_async(db, _litter_sum_stmt(filters), mode)
+
+    return {
+        "total_count": total_count,
+        "total_litter_count": None if total_litter_count is None else int(total_litter_count),
+        "items": reports,
+        "clusters": _group_summaries(reports),
+        "next_cursor": params.next_cursor(reports) if params else None,
+    }
+
+
 def get_litter_report(
     db: Session,
     report_id: uuid.UUID,
@@ -322,16 +382,8 @@ def get_litter_report(
         ).scalar() or 0
 
     # 3) Attach image_urls from uploads
+    attach_image_urls(db, reports)
     for r in reports:
-        if r.upload_id:
-            row = db.execute(
-                text("SELECT file_url FROM uploads WHERE id = :u"),
-                {"u": str(r.upload_id)}
-            ).fetchone()
-            if row:
-                # row[0] contains the file_url string
-                r.image_url = row[0]
-
         # also attach the sum for this single report
         setattr(r, "total_litter_count", total_litter_count)
 
@@ -406,10 +458,10 @@ def update_litter_report(
         raw = bytes(report.geom.data)
         point: Point = wkb.loads(raw)
 
-        lat, lon = point.y, point.x
-        city = LitterGroupService.reverse_geocode_city(lat, lon)
-        if city:
-            report.city = city
+        # Boundaries/cache only; a miss is resolved in the background
+        city_id = resolve_city_id(db, point.y, point.x, report.id)
+        if city_id:
+            report.city_id = city_id
 
     db.commit()
     db.refresh(report)
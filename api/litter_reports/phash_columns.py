@@ -0,0 +1,17 @@
+# api/litter_reports/phash_columns.py
+"""
+SQL of the generated pHash columns on image_fingerprints, shared by the ORM
+model and migration d2f8c61a4b37 so the two cannot drift apart. Imports
+nothing from the app, so migrations can use it without loading models.
+"""
+
+# 64-bit pHash as a signed bigint and as four 16-bit bands (band 0 = top 16 bits),
+# all derived by Postgres from the 16-hex-char `phash`
+PHASH_INT_SQL = "('x' || phash)::bit(64)::bigint"
+
+# band column -> 1-based offset of its four hex chars in `phash`
+PHASH_BANDS = {'phash_b0': 1, 'phash_b1': 5, 'phash_b2': 9, 'phash_b3': 13}
+
+
+def phash_band_sql(column: str) -> str:
+    return f"('x' || substr(phash, {PHASH_BANDS[column]}, 4))::bit(16)::integer"
@@ -0,0 +1,298 @@
+# api/location/city/city_geocode.py
+"""
+Reverse geocoding of report coordinates to a City, without blocking requests.
+
+resolve_city_id(db, lat, lon, report_id) answers from, in order:
+
+  1. boundaries  point-in-polygon against cities.boundary (shapely STRtree,
+                 reloaded every GEOCODE_BOUNDARY_TTL_S)
+  2. memory      LRU of grid cells, lat/lon rounded to GEOCODE_CELL_DECIMALS
+  3. Redis       the same cells, shared by every process
+
+On a miss it returns None at once, adds the report id to the cell's pending
+set in Redis and enqueues one geocode_cell RQ job per cell on the
+GEOCODE_RQ_QUEUE queue. The job asks Nominatim, maps the name to a City
+(created if new), caches the cell and sets city_id on every report that was
+waiting for it. Requests are spaced GEOCODE_MIN_INTERVAL_S apart across all
+workers through a Redis key, as Nominatim's usage policy requires. Failed jobs
+are retried GEOCODE_MAX_RETRIES times with exponential backoff; pending ids
+survive restarts and failed jobs, and the next miss on the cell picks them up.
+
+Run a worker for it with the scheduler (needed for retry delays):
+
+    rq worker geocode --with-scheduler --url $REDIS_URL
+
+Cached values are city ids; 0 records that Nominatim knows no city there.
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+import redis
+import requests
+from geoalchemy2.shape import to_shape
+from rq import Queue, Retry, get_current_job
+from shapely.geometry import Point
+from shapely.strtree import STRtree
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from api.litter_reports.litter_reports_model import LitterReport
+from api.location.city.city_model import City
+from config.settings import settings
+from utils.cache_utils import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = "geocode:city:{}:{}"
+PENDING_KEY = "geocode:pending:{}:{}"    # report ids waiting for the cell
+QUEUED_KEY = "geocode:queued:{}:{}"      # a geocode_cell job exists for the cell
+RATE_KEY = "geocode:nominatim:slot"
+NO_CITY = 0
+
+Cell = Tuple[float, float]
+
+
+def cell_of(lat: float, lon: float) -> Cell:
+    d = settings.GEOCODE_CELL_DECIMALS
+    return (round(lat, d), round(lon, d))
+
+
+# ─── Nominatim ─────────────────────────────────────────────────────────────────
+def nominatim_city(lat: float, lon: float) -> Optional[str]:
+    """City/town/village name at (lat, lon); raises on network or HTTP errors."""
+    response = requests.get(
+        settings.NOMINATIM_URL,
+        params={"lat": lat, "lon": lon, "format": "json"},
+        headers={"User-Agent": "ecoCity/1.0"},
+        timeout=5,
+    )
+    response.raise_for_status()
+    address = response.json().get("address", {})
+    return address.get("city") or address.get("town") or address.get("village")
+
+
+def city_id_for_name(db: Session, name: str) -> int:
+    """Id of the city called `name` (case-insensitive), creating it if needed."""
+    # Core table, not the mapped class: RQ work horses do not import every
+    # model, so City's relationships may not configure there
+    cities = City.__table__
+    name = name.strip()
+    lookup = select(cities.c.id).where(func.lower(cities.c.name) == name.lower())
+    city_id = db.execute(lookup).scalar()
+    if city_id is None:
+        city_id = db.execute(
+            pg_insert(cities).values(name=name)
+            .on_conflict_do_nothing(index_elements=[cities.c.name])
+            .returning(cities.c.id)
+        ).scalar()
+        if city_id is None:   # created concurrently
+            city_id = db.execute(lookup).scalar()
+    return city_id
+
+
+# ─── Local lookups ─────────────────────────────────────────────────────────────
+class CityBoundaryIndex:
+    """STRtree over cities.boundary, reloaded after `ttl_s`."""
+
+    def __init__(self, ttl_s: float):
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._loaded_at = 0.0
+        self._ids: List[int] = []
+        self._tree: Optional[STRtree] = None
+
+    def _refresh(self, db: Session) -> None:
+        rows = db.query(City.id, City.boundary).filter(City.boundary.isnot(None)).all()
+        self._ids = [r.id for r in rows]
+        self._tree = STRtree([to_shape(r.boundary) for r in rows]) if rows else None
+        self._loaded_at = time.monotonic()
+
+    def city_at(self, db: Session, lat: float, lon: float) -> Optional[int]:
+        with self._lock:
+            if time.monotonic() - self._loaded_at > self.ttl_s:
+                self._refresh(db)
+            tree, ids = self._tree, self._ids
+        if tree is None:
+            return None
+        hits = tree.query(Point(lon, lat), predicate="intersects")
+        return ids[int(min(hits))] if len(hits) else None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = 0.0
+
+
+class CellCache:
+    """City id per cell: in-process LRU in front of Redis."""
+
+    def __init__(self, size: int, ttl_s: int):
+        self.size = size
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[Cell, int]" = OrderedDict()
+
+    def _remember(self, cell: Cell, city_id: int) -> None:
+        with self._lock:
+            self._lru[cell] = city_id
+            self._lru.move_to_end(cell)
+            while len(self._lru) > self.size:
+                self._lru.popitem(last=False)
+
+    def get(self, cell: Cell) -> Optional[int]:
+        with self._lock:
+            if cell in self._lru:
+                self._lru.move_to_end(cell)
+                return self._lru[cell]
+        try:
+            value = get_redis_client().get(REDIS_KEY.format(*cell))
+        except redis.RedisError:
+            return None
+        if value is None:
+            return None
+        self._remember(cell, int(value))
+        return int(value)
+
+    def set(self, cell: Cell, city_id: int) -> None:
+        self._remember(cell, city_id)
+        try:
+            get_redis_client().setex(REDIS_KEY.format(*cell), self.ttl_s, city_id)
+        except redis.RedisError:
+            pass
+
+
+# ─── Background resolution of misses (RQ) ──────────────────────────────────────
+def _retry() -> Optional[Retry]:
+    n = settings.GEOCODE_MAX_RETRIES
+    if n <= 0:
+        return None
+    return Retry(max=n, interval=[int(settings.GEOCODE_RETRY_BACKOFF_S * 2 ** i) for i in range(n)])
+
+
+def _queued_ttl_s() -> int:
+    # outlives the job and all its retries; clears a marker a killed worker left
+    backoff = sum(settings.GEOCODE_RETRY_BACKOFF_S * 2 ** i for i in range(settings.GEOCODE_MAX_RETRIES))
+    return int(backoff) + 3600
+
+
+_rq_queue: Optional[Queue] = None
+
+
+def _geocode_queue() -> Queue:
+    global _rq_queue
+    if _rq_queue is None:
+        # RQ needs a bytes connection, unlike get_redis_client()
+        _rq_queue = Queue(settings.GEOCODE_RQ_QUEUE, connection=redis.Redis.from_url(settings.REDIS_URL))
+    return _rq_queue
+
+
+def enqueue_lookup(lat: float, lon: float, report_id: Optional[UUID] = None) -> bool:
+    """
+    Record `report_id` as waiting for the cell of (lat, lon) and queue one
+    geocode_cell job per cell. False if Redis is unavailable and the miss was dropped.
+    """
+    cell = cell_of(lat, lon)
+    r = get_redis_client()
+    queued_key = QUEUED_KEY.format(*cell)
+    try:
+        if report_id is not None:
+            pending_key = PENDING_KEY.format(*cell)
+            r.sadd(pending_key, str(report_id))
+            r.expire(pending_key, settings.GEOCODE_REDIS_TTL_S)
+        if r.set(queued_key, 1, nx=True, ex=_queued_ttl_s()):
+            try:
+                _geocode_queue().enqueue(geocode_cell, lat, lon, retry=_retry())
+            except Exception:
+                r.delete(queued_key)
+                raise
+    except redis.RedisError:
+        logger.warning("Could not queue reverse geocode of %s", cell, exc_info=True)
+        return False
+    return True
+
+
+def _wait_for_nominatim_slot(r: redis.Redis) -> None:
+    """Block until this process holds the one Nominatim request slot per GEOCODE_MIN_INTERVAL_S."""
+    interval_ms = int(settings.GEOCODE_MIN_INTERVAL_S * 1000)
+    if interval_ms <= 0:
+        return
+    while not r.set(RATE_KEY, 1, nx=True, px=interval_ms):
+        time.sleep(max(r.pttl(RATE_KEY), 10) / 1000.0)
+
+
+def geocode_cell(lat: float, lon: float) -> Optional[int]:
+    """
+    RQ job: resolve the cell of (lat, lon) through Nominatim unless it is
+    cached, then set city_id on the reports waiting for it. Raising lets RQ
+    retry; the waiting ids stay in Redis either way, so a later miss on the
+    cell (which queues a new job) still updates them.
+    """
+    from config.database import SessionLocal
+
+    cell = cell_of(lat, lon)
+    r = get_redis_client()
+    pending_key = PENDING_KEY.format(*cell)
+    db = SessionLocal()
+    try:
+        city_id = cell_cache.get(cell)
+        if city_id is None:
+            _wait_for_nominatim_slot(r)
+            name = nominatim_city(lat, lon)
+            city_id = city_id_for_name(db, name) if name else NO_CITY
+            db.commit()
+            cell_cache.set(cell, city_id)
+
+        # released before the pending ids are read: a report added after that
+        # queues a new job, which finds the cell cached
+        r.delete(QUEUED_KEY.format(*cell))
+        report_ids = list(r.smembers(pending_key))
+        if city_id != NO_CITY and report_ids:
+            reports = LitterReport.__table__
+            db.execute(
+                update(reports)
+                .where(reports.c.id.in_([UUID(rid) for rid in report_ids]), reports.c.city_id.is_(None))
+                .values(city_id=city_id)
+            )
+            db.commit()
+        if report_ids:
+            r.srem(pending_key, *report_ids)
+        return city_id
+    except Exception:
+        db.rollback()
+        job = get_current_job()
+        if job is None or not job.retries_left:
+            # last attempt: let the next miss on this cell queue it again
+            r.delete(QUEUED_KEY.format(*cell))
+        raise
+    finally:
+        db.close()
+
+
+city_boundaries = CityBoundaryIndex(settings.GEOCODE_BOUNDARY_TTL_S)
+cell_cache = CellCache(settings.GEOCODE_LRU_SIZE, settings.GEOCODE_REDIS_TTL_S)
+
+
+def resolve_city_id(
+    db: Session,
+    lat: float,
+    lon: float,
+    report_id: Optional[UUID] = None
+) -> Optional[int]:
+    """
+    City id at (lat, lon) from local data only; never waits on the network.
+    On a miss returns None and queues the lookup (enqueue_lookup), which later
+    sets city_id on `report_id` if given.
+    """
+    city_id = city_boundaries.city_at(db, lat, lon)
+    if city_id is not None:
+        return city_id
+    cell = cell_of(lat, lon)
+    city_id = cell_cache.get(cell)
+    if city_id is None:
+        enqueue_lookup(lat, lon, report_id)
+        return None
+    return city_id or None
@@ -1,6 +1,7 @@
 # city_model.py
 from sqlalchemy import Column, Integer, String, DateTime, func
 from sqlalchemy.orm import relationship
+from geoalchemy2 import Geometry
 from config.database import Base  # use the same Base as the rest of your app
 
 class City(Base):
@@ -8,6 +9,11 @@ class City(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), unique=True, nullable=False)
+    boundary = Column(
+        Geometry(geometry_type="MULTIPOLYGON", srid=4326),
+        nullable=True,
+        comment="Administrative boundary for offline reverse geocoding"
+    )
     created_at = Column(
         DateTime(timezone=True),
         server_default=func.now(),
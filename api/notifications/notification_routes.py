@@ -1,13 +1,14 @@
 # routes/notifications_route.py
 
-from fastapi import APIRouter, Depends, Query
-from typing import List
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Response
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from config.database import get_db
+from config.database import get_async_db
 from middlewares.auth_middleware import auth_middleware
 from api.notifications.notifications_schema import NotificationRead
-from api.notifications.notifications_controller import fetch_notifications
+from api.notifications.notifications_controller import fetch_notifications_async
+from utils.query_params import next_cursor
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
@@ -17,14 +18,21 @@ router = APIRouter(prefix="/notifications", tags=["Notifications"])
     response_model=List[NotificationRead],
     summary="Fetch paginated notifications for the authenticated user"
 )
-def get_user_notifications(
+async def get_user_notifications(
+    response: Response,
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; overrides page"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(auth_middleware),
 ):
     """
     Returns the paginated list of notifications for the logged‑in user.
+    The cursor for the next page, if any, is in the X-Next-Cursor header.
     """
     user_id = current_user["id"]
-    return fetch_notifications(db=db, user_id=user_id, page=page, limit=limit)
+    items = await fetch_notifications_async(db=db, user_id=user_id, page=page, limit=limit, cursor=cursor)
+    nxt = next_cursor(items, limit)
+    if nxt:
+        response.headers["X-Next-Cursor"] = nxt
+    return items
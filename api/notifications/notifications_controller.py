@@ -1,10 +1,13 @@
 from fastapi import Depends, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from config.database import get_db
 from api.notifications.notifications_model import Notification
 from api.notifications.notifications_schema import NotificationRead
+from utils.query_params import apply_keyset
 
 def fetch_notifications(
     db: Session,
@@ -24,3 +27,26 @@ def fetch_notifications(
     )
 
     return notifications
+
+
+async def fetch_notifications_async(
+    db: AsyncSession,
+    user_id: int,
+    page: int = 1,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+) -> List[NotificationRead]:
+    stmt = select(Notification).where(Notification.user_id == user_id)
+
+    if cursor:
+        # keyset page after the cursor; `page` is ignored
+        result = await db.execute(apply_keyset(stmt, Notification, cursor, limit))
+    else:
+        offset = (page - 1) * limit
+        result = await db.execute(
+            stmt.order_by(Notification.created_at.desc(), Notification.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+
+    return result.scalars().all()
@@ -3,11 +3,12 @@
 from typing import List, Tuple, Dict, Any
 from math import radians, sin, cos, atan2, sqrt
 from uuid import UUID
-from sqlalchemy.orm import Session, joinedload   
+from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
 from api.litter_reports.litter_reports_model import LitterReport
 from api.cleanup_events.cleanup_events_model import CleanupEvent
+from api.uploads.uploads_service import get_file_urls
 
 class GeoService:
     def __init__(self, db: Session):
@@ -23,11 +24,10 @@ class GeoService:
         if not event or not event.litter_group_id:
             raise HTTPException(status_code=404, detail="Event or linked group not found")
 
-        # 2) Query reports with eager loading of upload
+        # 2) Query reports; image URLs come from one batched uploads lookup
         reports = (
             self.db
             .query(LitterReport)
-            .options(joinedload(LitterReport.upload))
             .filter_by(group_id=event.litter_group_id)
             .all()
         )
@@ -35,6 +35,7 @@ class GeoService:
             raise HTTPException(status_code=404, detail="No reports found for event")
 
         # 3) Build a simple dict list including file_url
+        urls = get_file_urls(self.db, (r.upload_id for r in reports))
         response: List[Dict[str, Any]] = []
         for r in reports:
             response.append({
@@ -43,7 +44,7 @@ class GeoService:
                 "longitude":  r.longitude,
                 "status":     r.status,
                 "created_at": r.created_at,
-                "image_url":  getattr(r.upload, "file_url", None),
+                "image_url":  urls.get(r.upload_id),
             })
         return response
 
@@ -3,6 +3,7 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
 from api.photo_verifications.group_media.group_media_service import GroupMediaService
+from utils.executors import ExecutorSaturated
 
 
 class GroupMediaController:
@@ -13,6 +14,8 @@ class GroupMediaController:
             return await svc.upload_and_create(event_id, upload_files, latitude, longitude, current_user_id)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
+        except ExecutorSaturated:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail="Upload failed")
 
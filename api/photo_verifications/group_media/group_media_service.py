@@ -9,6 +9,8 @@ from sqlalchemy.orm import Session
 from PIL import Image
 
 from api.photo_verifications.group_media.group_media_model import GroupMedia  # adapt to your project path
+from api.uploads.uploads_ingest import ingest_fileobj
+from utils.executors import ExecutorSaturated, run_cpu, run_io
 
 UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "./uploads"))
 BASE_MEDIA_URL = os.getenv("BASE_MEDIA_URL", "/media")  # mount this with StaticFiles in your app
@@ -34,12 +36,6 @@ def _make_public_url(path: Path) -> str:
     return f"{BASE_MEDIA_URL.rstrip('/')}/{rel.as_posix()}"
 
 
-def _save_bytes_to_disk(b: bytes, dest: Path) -> None:
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    with open(dest, "wb") as fh:
-        fh.write(b)
-
-
 def _create_image_thumbnail(src_path: Path, thumb_path: Path, max_size=(640, 360)) -> Optional[Path]:
     try:
         img = Image.open(src_path)
@@ -87,33 +83,16 @@ class GroupMediaService:
         """
         upload_files: list of FastAPI UploadFile objects
         Returns list of created items
+        Disk writes, thumbnails, ffmpeg and DB calls run on utils.executors pools.
         """
         created = []
 
         for upload in upload_files:
-            # read bytes
-            try:
-                contents = await upload.read()
-            except Exception:
-                # if read fails skip this file
-                continue
-
-            if not contents:
-                continue
-
             # detect mime
             mime = (upload.content_type or mimetypes.guess_type(upload.filename or "")[0] or "application/octet-stream").lower()
             is_image = mime.startswith("image/")
             is_video = mime.startswith("video/")
 
-            # basic size validation
-            size_bytes = len(contents)
-            if is_image and size_bytes > MAX_IMAGE_BYTES:
-                # skip and continue
-                continue
-            if is_video and size_bytes > MAX_VIDEO_BYTES:
-                continue
-
             # prepare storage path: uploads/events/{event_id}/group/{uuid}_{safe_filename}
             safe_name = _safe_filename(upload.filename or "file")
             filename = f"{uuid.uuid4().hex}_{safe_name}"
@@ -121,11 +100,19 @@ class GroupMediaService:
             dest_rel = relative_folder / filename
             dest_abs = UPLOAD_DIR / dest_rel
 
-            # write file
+            # stream to disk in chunks; size validation happens while copying
+            max_bytes = MAX_IMAGE_BYTES if is_image else MAX_VIDEO_BYTES if is_video else None
             try:
-                _save_bytes_to_disk(contents, dest_abs)
+                ingested = await run_io(ingest_fileobj, upload.file, dest_abs, max_bytes)
+            except ExecutorSaturated:
+                raise
             except Exception:
-                # if saving fails, skip
+                # too large, or read/write failed: skip this file
+                continue
+
+            size_bytes = ingested.size
+            if not size_bytes:
+                dest_abs.unlink(missing_ok=True)
                 continue
 
             # generate thumbnail/poster if possible
@@ -134,13 +121,13 @@ class GroupMediaService:
                 thumb_name = f"thumb_{uuid.uuid4().hex}.jpg"
                 candidate = relative_folder / "thumbs" / thumb_name
                 thumb_abs = UPLOAD_DIR / candidate
-                if _create_image_thumbnail(dest_abs, thumb_abs):
+                if await run_cpu(_create_image_thumbnail, dest_abs, thumb_abs):
                     thumb_rel = candidate
             elif is_video:
                 thumb_name = f"thumb_{uuid.uuid4().hex}.jpg"
                 candidate = relative_folder / "thumbs" / thumb_name
                 thumb_abs = UPLOAD_DIR / candidate
-                if _create_video_poster(dest_abs, thumb_abs):
+                if await run_io(_create_video_poster, dest_abs, thumb_abs):
                     thumb_rel = candidate
 
             # public URLs
@@ -174,21 +161,10 @@ class GroupMediaService:
             )
 
             try:
-                self.db.add(gm)
-                self.db.commit()
-                self.db.refresh(gm)
-                created.append({
-                    "id": gm.id,
-                    "file_url": gm.file_url,
-                    "thumb_url": gm.thumb_url,
-                    "mime_type": gm.mime_type,
-                    "media_type": gm.media_type,
-                    "size_bytes": gm.size_bytes,
-                    "created_at": gm.created_at,
-                })
+                created.append(await run_io(self._insert, gm))
             except Exception:
                 # rollback and cleanup files if DB insert fails
-                self.db.rollback()
+                await run_io(self.db.rollback)
                 try:
                     if dest_abs.exists():
                         dest_abs.unlink()
@@ -202,6 +178,20 @@ class GroupMediaService:
 
         return created
 
+    def _insert(self, gm: GroupMedia) -> Dict[str, Any]:
+        self.db.add(gm)
+        self.db.commit()
+        self.db.refresh(gm)
+        return {
+            "id": gm.id,
+            "file_url": gm.file_url,
+            "thumb_url": gm.thumb_url,
+            "mime_type": gm.mime_type,
+            "media_type": gm.media_type,
+            "size_bytes": gm.size_bytes,
+            "created_at": gm.created_at,
+        }
+
     def list_by_event(self, event_id: str, media_type: Optional[str], limit: int, offset: int):
         q = self.db.query(GroupMedia).filter(GroupMedia.event_id == str(event_id)).order_by(GroupMedia.created_at.desc())
         if media_type in ("image", "video"):
@@ -0,0 +1,253 @@
+# api/tasks/batch_worker.py
+"""
+Micro-batching detection worker for the `reports` queue.
+
+Instead of letting RQ run `process_report` one job at a time, this worker drains
+up to `DETECTION_BATCH_SIZE` pending jobs (waiting at most
+`DETECTION_BATCH_MAX_WAIT_MS` for the batch to fill), stacks their letterboxed
+tensors and runs a single ONNX call, then persists each report's detection
+through the same `create_litter_detection` path the single-job worker uses.
+
+Collected jobs are recorded in RQ's StartedJobRegistry while the batch runs,
+so jobs held by a worker that dies are re-enqueued by `recover_stale` (run at
+startup and between batches) once their registry entry expires. A job is
+re-enqueued after a failed batch at most DETECTION_BATCH_MAX_RETRIES times,
+then failed; reports that fail to download or decode are failed before
+inference and never retried. Embeddings are computed and indexed only once a
+report's detection has been persisted, so a retried batch does not embed (and
+append to the FAISS log) twice.
+
+Run with:  python -m api.tasks.batch_worker [--max-batch N] [--max-wait-ms MS]
+"""
+import time
+import argparse
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import numpy as np
+from rq import Queue
+from rq.job import Job, JobStatus
+from rq.registry import FailedJobRegistry, StartedJobRegistry
+
+from config.settings import settings
+from api.litter_detections.litter_detections_service import (
+    run_inference_batch,
+    postprocess_detections,
+)
+from api.litter_detections.preprocessing import LetterboxBuffer, LetterboxMeta
+from utils.decoded_image import DecodedImage
+from api.tasks.report_worker import (
+    queue,
+    redis_conn,
+    SessionLocal,
+    _download_image,
+    _embed_and_index,
+    _complete_detection,
+    mark_report_error,
+)
+
+logger = logging.getLogger(__name__)
+
+PROCESS_REPORT_FUNC = "api.tasks.report_worker.process_report"
+RETRIES_META_KEY = "batch_retries"
+# seconds a job stays in the StartedJobRegistry past its timeout before it
+# counts as abandoned
+STARTED_TTL_MARGIN = 60
+
+
+@dataclass
+class _PendingReport:
+    job: Job
+    report_id: UUID
+    slot: Optional[int] = None
+    meta: Optional[LetterboxMeta] = None
+    image: Optional[DecodedImage] = None
+    error: Optional[str] = None
+
+
+def _job_report_args(job: Job) -> Dict[str, Any]:
+    """Map a `process_report` job's positional/keyword args onto named fields."""
+    names = ("report_id", "upload_path", "latitude", "longitude")
+    values = dict(zip(names, job.args or ()))
+    values.update(job.kwargs or {})
+    return values
+
+
+class BatchDetectionEngine:
+    def __init__(
+        self,
+        rq_queue: Queue = queue,
+        max_batch: int = settings.DETECTION_BATCH_SIZE,
+        max_wait_ms: int = settings.DETECTION_BATCH_MAX_WAIT_MS,
+        block_timeout: int = 5,
+        poll_interval: float = 0.02,
+    ):
+        self.queue = rq_queue
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.block_timeout = block_timeout
+        self.poll_interval = poll_interval
+        # one preallocated (max_batch, 3, 640, 640) input reused for every batch
+        self.buffer = LetterboxBuffer(max_batch)
+        self.started = StartedJobRegistry(queue=rq_queue)
+        self.failed = FailedJobRegistry(queue=rq_queue)
+
+    # ─── Collection ─────────────────────────────────────────────────────────
+    def collect(self) -> List[Job]:
+        """
+        Block until one job is available, then keep draining the queue until the
+        batch is full or the max-wait deadline passes.
+        """
+        first = Queue.dequeue_any([self.queue], timeout=self.block_timeout, connection=redis_conn)
+        if first is None:
+            return []
+        jobs = [first[0]]
+
+        deadline = time.monotonic() + self.max_wait
+        while len(jobs) < self.max_batch:
+            nxt = Queue.dequeue_any([self.queue], timeout=None, connection=redis_conn)
+            if nxt is not None:
+                jobs.append(nxt[0])
+                continue
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+        return jobs
+
+    # ─── Processing ─────────────────────────────────────────────────────────
+    def _prepare(self, job: Job, slot: int) -> Optional[_PendingReport]:
+        args = _job_report_args(job)
+        report_id = args.get("report_id")
+        if job.func_name != PROCESS_REPORT_FUNC or report_id is None:
+            logger.warning("Skipping job %s (%s): not a process_report job", job.id, job.func_name)
+            return None
+
+        pending = _PendingReport(job=job, report_id=report_id)
+        image_bytes, error = _download_image(args.get("upload_path", ""))
+        if error:
+            pending.error = error
+            return pending
+
+        try:
+            image = DecodedImage(image_bytes)
+            pending.meta = image.letterbox_into(self.buffer, slot)
+            pending.slot = slot
+            pending.image = image
+        except Exception as e:
+            pending.error = str(e)
+        return pending
+
+    # ─── Job bookkeeping ────────────────────────────────────────────────────
+    def _start(self, jobs: List[Job]) -> None:
+        for j in jobs:
+            j.set_status(JobStatus.STARTED)
+            self.started.add(j, (j.timeout or 600) + STARTED_TTL_MARGIN)
+
+    def _finish(self, job: Job) -> None:
+        job.set_status(JobStatus.FINISHED)
+        self.started.remove(job)
+
+    def _fail(self, db, job: Job, report_id: Optional[UUID], error: str) -> None:
+        if report_id is not None:
+            mark_report_error(db, report_id, error)
+        job.set_status(JobStatus.FAILED)
+        self.started.remove(job)
+        self.failed.add(job, exc_string=error)
+
+    def _retry_or_fail(self, db, jobs: List[Job], error: str) -> None:
+        """Re-enqueue `jobs` unless they have used up their retries."""
+        for j in jobs:
+            retries = int(j.meta.get(RETRIES_META_KEY, 0))
+            if retries >= settings.DETECTION_BATCH_MAX_RETRIES:
+                logger.warning("Job %s failed after %d retries: %s", j.id, retries, error)
+                self._fail(db, j, _job_report_args(j).get("report_id"), error)
+                continue
+            j.meta[RETRIES_META_KEY] = retries + 1
+            j.save_meta()
+            self.started.remove(j)
+            self.queue.enqueue_job(j)
+
+    def recover_stale(self) -> None:
+        """Re-enqueue (or fail) jobs whose worker died while they were in a batch."""
+        stale = Job.fetch_many(self.started.get_expired_job_ids(), connection=redis_conn)
+        stale = [j for j in stale if j is not None]
+        if not stale:
+            return
+        logger.warning("Recovering %d job(s) abandoned mid-batch", len(stale))
+        db = SessionLocal()
+        try:
+            self._retry_or_fail(db, stale, "worker died while processing the batch")
+        finally:
+            db.close()
+
+    def process_batch(self, jobs: List[Job]) -> None:
+        db = SessionLocal()
+        settled = set()
+        try:
+            self._start(jobs)
+
+            ready: List[_PendingReport] = []
+            for j in jobs:
+                # ready reports occupy buffer slots 0..len(ready)-1 in order
+                p = self._prepare(j, len(ready))
+                if p is None:
+                    self._fail(db, j, None, "not a process_report job")
+                elif p.error is not None:
+                    # download/decode errors will not go away on retry
+                    logger.warning(f"Report {p.report_id} failed before inference: {p.error}")
+                    self._fail(db, j, p.report_id, p.error)
+                else:
+                    ready.append(p)
+                    continue
+                settled.add(j.id)
+
+            predictions: List[np.ndarray] = []
+            if ready:
+                start = time.time()
+                predictions = run_inference_batch(self.buffer.tensor[:len(ready)])
+                logger.info("▶️ batched inference on %d images in %.2fs", len(ready), time.time() - start)
+
+            for p, preds in zip(ready, predictions):
+                try:
+                    results = postprocess_detections(preds, p.meta)
+                    _complete_detection(db, p.report_id, detection_results=results)
+                    _embed_and_index(p.report_id, p.image)
+                    self._finish(p.job)
+                except Exception as e:
+                    logger.exception(f"Error finishing report {p.report_id}: {e}")
+                    self._fail(db, p.job, p.report_id, str(e))
+                settled.add(p.job.id)
+        except Exception as e:
+            unsettled = [j for j in jobs if j.id not in settled]
+            logger.exception("Batch failed; retrying %d job(s)", len(unsettled))
+            self._retry_or_fail(db, unsettled, str(e))
+        finally:
+            db.close()
+
+    def run_forever(self) -> None:
+        logger.info(
+            "▶️ batch worker listening on %r (max_batch=%d, max_wait=%.0fms)",
+            self.queue.name, self.max_batch, self.max_wait * 1000,
+        )
+        self.recover_stale()
+        while True:
+            jobs = self.collect()
+            if jobs:
+                self.process_batch(jobs)
+            else:
+                self.recover_stale()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-batched detection worker for the reports queue")
+    parser.add_argument("--max-batch", type=int, default=settings.DETECTION_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=int, default=settings.DETECTION_BATCH_MAX_WAIT_MS)
+    args = parser.parse_args(argv)
+
+    BatchDetectionEngine(max_batch=args.max_batch, max_wait_ms=args.max_wait_ms).run_forever()
+
+
+if __name__ == "__main__":
+    main()
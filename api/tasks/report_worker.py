@@ -3,6 +3,7 @@ import sys
 import time
 import logging
 from uuid import UUID
+from typing import Any, Dict, Optional, Tuple
 from urllib.parse import urlparse
 from fastapi import HTTPException
 
@@ -17,14 +18,18 @@ from sqlalchemy.orm import sessionmaker
 from config.settings import settings
 from api.litter_detections.litter_detections_service import (
     create_litter_detection,
+    run_detection_on_image,
     update_litter_report_with_detection,
 )
 from api.litter_detections.litter_detections_model import LitterDetection
-from utils.geoutils import (
+from api.litter_reports.image_fingerprints_model import ImageFingerprint
+from utils.embeddings import (
     load_embedding_model,
-    preprocess_image,
-    index_embedding_async,
+    index_embedding,
 )
+from api.litter_detections.preprocessing import ImageBuffer
+from api.uploads.uploads_storage import SOURCE_HTTP, read_local_upload, record_fetch
+from utils.decoded_image import DecodedImage
 
 # Logging setup
 logger = logging.getLogger()
@@ -46,172 +51,227 @@ queue = Queue("reports", connection=redis_conn)
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine)
 
-# Embedding model loaded once
+# Embedding model loaded once, explicitly: the web app no longer gets it as an
+# import side effect, but RQ work horses fork from this process and inherit it
 _EMBED_MODEL = load_embedding_model()
 
 # Constants
 REQUEST_TIMEOUT = 60  # seconds for HTTP fetch
 
-# place this function in your worker file (replace existing process_report implementation)
-@job("reports", connection=redis_conn, timeout=600)
-def process_report(report_id: UUID, upload_path: str, latitude: float, longitude: float):
+def _build_file_url(upload_path: str) -> str:
+    parsed = urlparse(upload_path)
+    if parsed.scheme in ("http", "https"):
+        return upload_path
+    # ensure settings.UPLOAD_URL is set to your public uploads base
+    return f"{settings.UPLOAD_URL.rstrip('/')}/{upload_path.lstrip('/')}"
+
+
+def _download_image(upload_path: str) -> Tuple[Optional[ImageBuffer], Optional[str]]:
     """
-    RQ job: process a single litter report, always fetching images via public URL.
-    This version will send an Authorization header if settings.UPLOAD_ACCESS_TOKEN is configured.
+    Fetch the report image: straight from the local upload volume when the worker
+    shares it, otherwise via its public URL with simple retry/backoff.
+    Sends an Authorization header if settings.UPLOAD_ACCESS_TOKEN is configured.
+    Returns (image_bytes, None) on success or (None, error_message) on failure.
+    """
+    local = read_local_upload(upload_path)
+    if local is not None:
+        logger.info(f"▶️ read {local.data.size} bytes from {local.location} ({local.source})")
+        return local.data, None
+
+    file_url = _build_file_url(upload_path)
+    logger.info(f"▶️ downloading from URL: {file_url}")
+
+    # Prepare headers / auth for download
+    headers = {}
+    # Use a dedicated backend/service token for worker downloads (recommended)
+    access_token = getattr(settings, "UPLOAD_ACCESS_TOKEN", None)
+    logger.info("▶️ process_report debug: UPLOAD_URL=%s, UPLOAD_ACCESS_TOKEN present=%s",
+                getattr(settings, "UPLOAD_URL", None), bool(access_token))
+    if access_token:
+        headers["Authorization"] = f"Bearer {access_token}"
+        logger.info("▶️ process_report debug: will send Authorization header (redacted)")
+    else:
+        logger.warning("▶️ process_report debug: UPLOAD_ACCESS_TOKEN missing in settings")
+
+    # Download image bytes with simple retry/backoff
+    max_attempts = 3
+    backoff_seconds = 1.5
+    resp = None
+    for attempt in range(1, max_attempts + 1):
+        try:
+            resp = requests.get(file_url, timeout=REQUEST_TIMEOUT, headers=headers)
+            logger.info(f"▶️ download response code: {resp.status_code} (attempt {attempt})")
+            # if successful or client error, break (client errors shouldn't be retried)
+            if resp.status_code == 200:
+                break
+            if 400 <= resp.status_code < 500:
+                # client error (403 etc.) - don't retry
+                logger.warning(f"▶️ client error while downloading (status={resp.status_code})")
+                break
+            # otherwise (5xx) we'll retry
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"▶️ download attempt {attempt} failed: {e}")
+            resp = None
+
+        # simple backoff before next attempt
+        if attempt < max_attempts:
+            time.sleep(backoff_seconds * attempt)
+
+    # Validate response
+    if resp is None:
+        return None, "Failed to download image: no response"
+    if resp.status_code != 200:
+        return None, f"Failed to download image, status={resp.status_code}"
+
+    image_bytes = resp.content
+    record_fetch(SOURCE_HTTP)
+    logger.info(f"▶️ received {len(image_bytes)} bytes ({SOURCE_HTTP})")
+    return image_bytes, None
+
+
+def _store_embedding(report_id: UUID, emb: np.ndarray) -> None:
+    """
+    Save the float32 embedding on the report's fingerprint row; the offline
+    FAISS builder (scripts/build_faiss_index.py) trains and populates from these.
     """
-    logger.info(f"▶️ process_report called for report_id={report_id}")
     db = SessionLocal()
     try:
-        # Build public URL to fetch image
-        parsed = urlparse(upload_path)
-        if parsed.scheme in ("http", "https"):
-            file_url = upload_path
-        else:
-            # ensure settings.UPLOAD_URL is set to your public uploads base
-            file_url = f"{settings.UPLOAD_URL.rstrip('/')}/{upload_path.lstrip('/')}"
-        logger.info(f"▶️ downloading from URL: {file_url}")
-
-        # Prepare headers / auth for download
-        headers = {}
-        # Use a dedicated backend/service token for worker downloads (recommended)
-        access_token = getattr(settings, "UPLOAD_ACCESS_TOKEN", None)
-        logger.info("▶️ process_report debug: UPLOAD_URL=%s, UPLOAD_ACCESS_TOKEN present=%s",
-                    getattr(settings, "UPLOAD_URL", None), bool(access_token))
-        if access_token:
-            headers["Authorization"] = f"Bearer {access_token}"
-            logger.info("▶️ process_report debug: will send Authorization header (redacted)")
-        else:
-            logger.warning("▶️ process_report debug: UPLOAD_ACCESS_TOKEN missing in settings")
-            if access_token:
-                headers["Authorization"] = f"Bearer {access_token}"
-                logger.info("▶️ using UPLOAD_ACCESS_TOKEN for authenticated download")
-
-        # Download image bytes with simple retry/backoff
-        max_attempts = 3
-        backoff_seconds = 1.5
-        resp = None
-        for attempt in range(1, max_attempts + 1):
-            try:
-                resp = requests.get(file_url, timeout=REQUEST_TIMEOUT, headers=headers)
-                logger.info(f"▶️ download response code: {resp.status_code} (attempt {attempt})")
-                # if successful or client error, break (client errors shouldn't be retried)
-                if resp.status_code == 200:
-                    break
-                if 400 <= resp.status_code < 500:
-                    # client error (403 etc.) - don't retry
-                    logger.warning(f"▶️ client error while downloading (status={resp.status_code})")
-                    break
-                # otherwise (5xx) we'll retry
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"▶️ download attempt {attempt} failed: {e}")
-                resp = None
-
-            # simple backoff before next attempt
-            if attempt < max_attempts:
-                time.sleep(backoff_seconds * attempt)
-
-        # Validate response
-        if resp is None:
-            msg = "Failed to download image: no response"
-            logger.warning(msg)
-            update_litter_report_with_detection(db, report_id, {"status": "error", "error_message": msg})
-            return
+        updated = (
+            db.query(ImageFingerprint)
+              .filter(ImageFingerprint.report_id == report_id)
+              .update({ImageFingerprint.embedding: emb.tobytes()}, synchronize_session=False)
+        )
+        db.commit()
+        if not updated:
+            logger.warning(f"No fingerprint row for report {report_id}; embedding not persisted")
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Could not persist embedding for report {report_id}: {e}")
+    finally:
+        db.close()
+
 
-        if resp.status_code != 200:
-            msg = f"Failed to download image, status={resp.status_code}"
-            logger.warning(msg)
-            update_litter_report_with_detection(db, report_id, {"status": "error", "error_message": msg})
+def _embed_and_index(report_id: UUID, image: DecodedImage) -> None:
+    """Compute the normalized embedding for the image, persist it and add it to the FAISS index."""
+    # Preprocess for embedding
+    arr = image.embedding_input
+    logger.info(f"▶️ preprocessed image shape: {arr.shape}")
+
+    # Embedding
+    logger.info("▶️ calling _EMBED_MODEL.predict_on_batch()")
+    start = time.time()
+    try:
+        emb = _EMBED_MODEL.predict_on_batch(np.expand_dims(arr, 0))[0]
+        elapsed = time.time() - start
+        logger.info(f"▶️ predict_on_batch returned in {elapsed:.2f}s")
+    except Exception as e:
+        elapsed = time.time() - start
+        logger.exception(f"ERROR in predict_on_batch after {elapsed:.2f}s: {e}")
+        raise
+
+    # Normalize, persist & index
+    emb = (emb / (np.linalg.norm(emb) + 1e-10)).astype(np.float32)
+    _store_embedding(report_id, emb)
+    logger.info("▶️ calling index_embedding()")
+    try:
+        index_embedding(report_id, emb)
+        logger.info("▶️ index_embedding() returned")
+    except Exception as e:
+        logger.exception(f"ERROR in index_embedding: {e}")
+        raise
+
+
+def _complete_detection(db, report_id: UUID, detection_results: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Persist the detection for a report (running inference unless `detection_results`
+    is supplied) and write the serialized detections back onto the report.
+    """
+    logger.info("▶️ calling create_litter_detection()")
+    try:
+        create_litter_detection(db, report_id, detection_results=detection_results)
+        logger.info("▶️ create_litter_detection() returned")
+    except HTTPException as he:
+        if getattr(he, "detail", None) == "NO_LITTER_DETECTED_DELETE":
+            logger.info(f"Report {report_id} deleted: no litter detected.")
             return
+        logger.exception(f"ERROR in create_litter_detection: {he}")
+        update_litter_report_with_detection(db, report_id, {"status": "error", "error_message": str(he)})
+        return
 
-        image_bytes = resp.content
-        logger.info(f"▶️ received {len(image_bytes)} bytes")
+    # Query detections
+    detections = (
+        db.query(LitterDetection)
+          .filter_by(litter_report_id=report_id)
+          .filter(LitterDetection.total_litter_count > 0)
+          .all()
+    )
+    logger.info(f"▶️ found {len(detections)} detection rows")
+    if not detections:
+        update_litter_report_with_detection(db, report_id, {
+            "status": "no-litter",
+            "detections": [],
+            "severity_level": None,
+            "error_message": "No litter detected"
+        })
+        return
 
-        # Preprocess for embedding
-        arr = preprocess_image(image_bytes)
-        logger.info(f"▶️ preprocessed image shape: {arr.shape}")
+    # Serialize & update
+    serialized = [{
+        "id": str(d.id),
+        "detected_objects": d.detected_objects,
+        "bounding_boxes": d.bounding_boxes,
+        "total_litter_count": d.total_litter_count,
+        "severity_level": d.severity_level,
+        "detection_confidence": d.detection_confidence,
+        "detection_source": d.detection_source,
+        "review_status": d.review_status,
+        "review_notes": d.review_notes,
+    } for d in detections]
+    severity_level = serialized[0].get("severity_level")
 
-        # Embedding
-        logger.info("▶️ calling _EMBED_MODEL.predict_on_batch()")
-        start = time.time()
-        try:
-            emb = _EMBED_MODEL.predict_on_batch(np.expand_dims(arr, 0))[0]
-            elapsed = time.time() - start
-            logger.info(f"▶️ predict_on_batch returned in {elapsed:.2f}s")
-        except Exception as e:
-            elapsed = time.time() - start
-            logger.exception(f"ERROR in predict_on_batch after {elapsed:.2f}s: {e}")
-            update_litter_report_with_detection(db, report_id, {"status": "error", "error_message": str(e)})
+    update_litter_report_with_detection(db, report_id, {
+        "status": "completed",
+        "detections": serialized,
+        "severity_level": severity_level,
+    })
+    logger.info(f"Completed report {report_id}, {len(detections)} detections")
+
+
+def mark_report_error(db, report_id: UUID, message: str) -> None:
+    try:
+        update_litter_report_with_detection(db, report_id, {"status": "error", "error_message": message})
+    except Exception:
+        logger.exception("Failed to mark report as error")
+
+
+@job("reports", connection=redis_conn, timeout=600)
+def process_report(report_id: UUID, upload_path: str, latitude: float, longitude: float):
+    """
+    RQ job: process a single litter report, always fetching images via public URL.
+    This version will send an Authorization header if settings.UPLOAD_ACCESS_TOKEN is configured.
+    """
+    logger.info(f"▶️ process_report called for report_id={report_id}")
+    db = SessionLocal()
+    try:
+        image_bytes, error = _download_image(upload_path)
+        if error:
+            logger.warning(error)
+            update_litter_report_with_detection(db, report_id, {"status": "error", "error_message": error})
             return
 
-        # Normalize & index
-        emb = emb / (np.linalg.norm(emb) + 1e-10)
-        logger.info("▶️ calling index_embedding_async()")
+        # decode once; embedding and detection both read from this
+        image = DecodedImage(image_bytes)
         try:
-            index_embedding_async(report_id, emb)
-            logger.info("▶️ index_embedding_async() returned")
+            _embed_and_index(report_id, image)
         except Exception as e:
-            logger.exception(f"ERROR in index_embedding_async: {e}")
             update_litter_report_with_detection(db, report_id, {"status": "error", "error_message": str(e)})
             return
 
-        # Detection
-        logger.info("▶️ calling create_litter_detection()")
-        try:
-            create_litter_detection(db, report_id)
-            logger.info("▶️ create_litter_detection() returned")
-        except HTTPException as he:
-            if getattr(he, "detail", None) == "NO_LITTER_DETECTED_DELETE":
-                logger.info(f"Report {report_id} deleted: no litter detected.")
-                return
-            logger.exception(f"ERROR in create_litter_detection: {he}")
-            update_litter_report_with_detection(db, report_id, {"status": "error", "error_message": str(he)})
-            return
-
-        # Query detections
-        detections = (
-            db.query(LitterDetection)
-              .filter_by(litter_report_id=report_id)
-              .filter(LitterDetection.total_litter_count > 0)
-              .all()
-        )
-        logger.info(f"▶️ found {len(detections)} detection rows")
-        if not detections:
-            update_litter_report_with_detection(db, report_id, {
-                "status": "no-litter",
-                "detections": [],
-                "severity_level": None,
-                "error_message": "No litter detected"
-            })
-            return
-
-        # Serialize & update
-        serialized = [{
-            "id": str(d.id),
-            "detected_objects": d.detected_objects,
-            "bounding_boxes": d.bounding_boxes,
-            "total_litter_count": d.total_litter_count,
-            "severity_level": d.severity_level,
-            "detection_confidence": d.detection_confidence,
-            "detection_source": d.detection_source,
-            "review_status": d.review_status,
-            "review_notes": d.review_notes,
-        } for d in detections]
-        severity_level = serialized[0].get("severity_level")
-
-        update_litter_report_with_detection(db, report_id, {
-            "status": "completed",
-            "detections": serialized,
-            "severity_level": severity_level,
-        })
-        logger.info(f"Completed report {report_id}, {len(detections)} detections")
+        detection_results = run_detection_on_image(image)
+        _complete_detection(db, report_id, detection_results)
 
     except Exception as e:
         logger.exception(f"Error processing report {report_id}: {e}")
-        try:
-            update_litter_report_with_detection(db, report_id, {"status": "error", "error_message": str(e)})
-        except:
-            logger.exception("Failed to mark report as error")
+        mark_report_error(db, report_id, str(e))
     finally:
         db.close()
-
-
@@ -9,6 +9,7 @@ from api.uploads.uploads_service import (
     delete_upload
 )
 from api.uploads.uploads_schema import UploadResponse
+from api.uploads.uploads_ingest import IngestedFile, UploadTooLarge
 
 
 def create_upload_controller(
@@ -17,19 +18,24 @@ def create_upload_controller(
     latitude: float | None = None,
     longitude: float | None = None,
     user_id: uuid.UUID = None,
-    session_id: str | None = None
+    session_id: str | None = None,
+    ingested: IngestedFile | None = None
 ) -> UploadResponse:
     """
     Controller now requires user_id (and optional session_id) and passes both to the service layer.
     """
-    upload = create_upload_with_file(
-        db,
-        file,
-        latitude,
-        longitude,
-        user_id=user_id,
-        session_id=session_id
-    )
+    try:
+        upload = create_upload_with_file(
+            db,
+            file,
+            latitude,
+            longitude,
+            user_id=user_id,
+            session_id=session_id,
+            ingested=ingested
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     if not upload:
         raise HTTPException(status_code=400, detail="Failed to save upload")
     return upload
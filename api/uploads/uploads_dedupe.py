@@ -0,0 +1,68 @@
+# api/uploads/uploads_dedupe.py
+"""
+Upload dedupe pipeline for `upload_create_report_and_detect`.
+
+Stage 1 narrows the comparison set to reports within SPATIAL_RADIUS_M and
+TEMPORAL_WINDOW_S of the upload (ST_DWithin on the GiST-indexed
+litter_reports.geom). Stage 2 compares pHashes against those candidates only.
+Uploads without coordinates fall back to the global pHash check over the
+last week.
+"""
+from datetime import datetime
+from typing import List, Optional
+
+import imagehash
+from sqlalchemy.orm import Session
+
+from api.litter_reports.litter_reports_model import LitterReport
+from config.settings import settings
+from utils.geoutils import find_spatio_temporal
+from utils.phash_index import PHASH_WINDOW, find_phash_duplicates_sql, get_phash_index
+
+# thresholds
+SPATIAL_RADIUS_M = 50        # meters
+TEMPORAL_WINDOW_S = 30 * 60   # seconds
+PHASH_THRESHOLD = 8           # Hamming bits
+
+
+def nearby_candidates(db: Session, latitude: float, longitude: float, now: datetime) -> List:
+    """Stage 1: ids of reports close to the upload in space and time."""
+    return find_spatio_temporal(
+        db, LitterReport, latitude, longitude, now,
+        radius_m=SPATIAL_RADIUS_M, window_s=TEMPORAL_WINDOW_S,
+    )
+
+
+def phash_duplicates(
+    db: Session,
+    ph: imagehash.ImageHash,
+    now: datetime,
+    candidates: Optional[List] = None,
+) -> List[str]:
+    """Stage 2: report ids (as str) whose pHash is within PHASH_THRESHOLD, limited to `candidates` if given."""
+    if candidates is not None and not candidates:
+        return []
+    if settings.PHASH_DEDUPE_MODE == "sql":
+        ids = find_phash_duplicates_sql(db, ph, PHASH_THRESHOLD, now - PHASH_WINDOW, report_ids=candidates)
+    else:
+        phash_index = get_phash_index()
+        phash_index.sync(db, now)
+        ids = phash_index.query(ph, PHASH_THRESHOLD, now)
+        if candidates is not None:
+            allowed = set(candidates)
+            ids = [rid for rid in ids if rid in allowed]
+    return [str(rid) for rid in ids]
+
+
+def find_duplicate_reports(
+    db: Session,
+    ph: imagehash.ImageHash,
+    latitude: Optional[float],
+    longitude: Optional[float],
+    now: datetime,
+) -> List[str]:
+    """Run the pipeline; returns ids of reports the upload duplicates (empty if none)."""
+    candidates = None
+    if latitude is not None and longitude is not None:
+        candidates = nearby_candidates(db, latitude, longitude, now)
+    return phash_duplicates(db, ph, now, candidates)
@@ -0,0 +1,82 @@
+# api/uploads/uploads_ingest.py
+"""
+Chunked ingestion of uploaded files onto the upload volume.
+
+The UploadFile's file object is copied in fixed-size chunks into a hidden
+temp file next to its destination, hashing (sha256) and counting bytes as it
+goes. The size limit is enforced per chunk, so an oversized upload is
+abandoned as soon as it crosses the limit instead of after being buffered.
+On success the temp file is fsynced and renamed into place atomically;
+readers never see a partial file. Peak memory per upload is one chunk.
+The copy blocks, so async callers run it on utils.executors.run_io.
+"""
+import os
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Optional
+
+INGEST_CHUNK_BYTES = 256 * 1024
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit: int):
+        super().__init__(f"Upload exceeds the {limit} byte limit")
+        self.limit = limit
+
+
+class IngestedFile(NamedTuple):
+    path: Path
+    size: int
+    sha256: str
+
+
+class _Sink:
+    """Temp file + running hash/size for one destination."""
+
+    def __init__(self, dest: Path, max_bytes: Optional[int]):
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        self.dest = dest
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hash = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".part")
+        self.tmp = Path(tmp)
+        self.fh = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        self.hash.update(chunk)
+        self.fh.write(chunk)
+
+    def commit(self) -> IngestedFile:
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+        self.fh.close()
+        os.replace(self.tmp, self.dest)
+        return IngestedFile(self.dest, self.size, self.hash.hexdigest())
+
+    def abort(self) -> None:
+        self.fh.close()
+        try:
+            self.tmp.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def ingest_fileobj(src: BinaryIO, dest: Path, max_bytes: Optional[int] = None) -> IngestedFile:
+    """Stream a (sync) file object to `dest`; raises UploadTooLarge past `max_bytes`."""
+    sink = _Sink(dest, max_bytes)
+    try:
+        while True:
+            chunk = src.read(INGEST_CHUNK_BYTES)
+            if not chunk:
+                break
+            sink.write(chunk)
+        return sink.commit()
+    except BaseException:
+        sink.abort()
+        raise
+
@@ -4,14 +4,14 @@ from typing import List, Optional
 from uuid import UUID
 import uuid
 import qrcode
-from io import BytesIO
 import io
 import logging
 import base64
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
-from datetime import datetime, timedelta
+from sqlalchemy import func
+from datetime import datetime
 from config.database import get_db
+from config.settings import settings
 from middlewares.auth_middleware import auth_middleware
 from api.uploads.uploads_controller import (
     create_upload_controller,
@@ -24,19 +24,20 @@ from api.litter_reports.litter_reports_model import LitterReport
 from api.litter_reports.litter_reports_schema import LitterReportResponse, LitterReportCreate
 from api.litter_reports.litter_reports_controller import create_report_controller
 from api.litter_detections.litter_detections_service import create_litter_detection
+from api.uploads.uploads_model import Upload
 from api.uploads.uploads_schema import UploadResponse
+from api.uploads.uploads_ingest import IngestedFile, UploadTooLarge, ingest_fileobj
+from api.uploads.uploads_service import new_upload_path
 from api.user.user_service import award_points
 from api.litter_detections.litter_detections_service import run_detection_on_image_bytes
 from config.points_config import PointReason
 import os
 import imagehash
 from imagehash import hex_to_hash
-import numpy as np
-from PIL import Image
-from utils.geoutils import (
-    distance_meters,
-    find_spatio_temporal
-)
+from utils.decoded_image import phash_of_file
+from utils.executors import ExecutorSaturated, run_cpu, run_io
+from utils.phash_index import get_phash_index
+from api.uploads.uploads_dedupe import find_duplicate_reports
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
 router = APIRouter(
@@ -44,13 +45,6 @@ router = APIRouter(
     tags=["uploads"]
 )
 
-# thresholds
-SPATIAL_RADIUS_M = 50        # meters
-TEMPORAL_WINDOW_S = 30 * 60   # seconds
-PHASH_THRESHOLD = 8           # Hamming bits
-EMBED_SIM_THRESHOLD = 0.90    # cosine similarity
-
-
 # @router.post(
 #     "/{session_id}/full",
 #     response_model=LitterReportResponse,
@@ -188,6 +182,101 @@ EMBED_SIM_THRESHOLD = 0.90    # cosine similarity
 #     index_embedding_async(report.id, emb)
 
 #     return report
+def _discard_saved_upload(db: Session, upload_id) -> bool:
+    """
+    Delete the rows steps 3–5 committed for `upload_id` (reports created from
+    it, their fingerprints by cascade, the upload). False if that failed, in
+    which case the rows still point at the stored file.
+    """
+    db.rollback()
+    try:
+        db.query(LitterReport).filter(LitterReport.upload_id == upload_id).delete(synchronize_session=False)
+        db.query(Upload).filter(Upload.id == upload_id).delete(synchronize_session=False)
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()
+        logger.exception("Could not remove rows of failed upload %s; keeping its file", upload_id)
+        return False
+
+
+def _save_upload_and_report(
+    db: Session,
+    file: UploadFile,
+    ingested: IngestedFile,
+    ph: imagehash.ImageHash,
+    latitude: Optional[float],
+    longitude: Optional[float],
+    user_id,
+    session_id: str,
+    now: datetime,
+) -> LitterReport:
+    """
+    Steps 3–5 of the upload pipeline; blocking, run on the io executor. On
+    failure the rows already committed are deleted, then the stored file.
+    """
+    upload = None
+    try:
+        # ─── 3. Save upload ────────────────────────────────────────────────────
+        upload = create_upload_controller(
+            db=db,
+            file=file,
+            latitude=latitude,
+            longitude=longitude,
+            user_id=user_id,
+            session_id=session_id,
+            ingested=ingested
+        )
+        if not upload:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to save upload"
+            )
+
+        # ─── 4. Create report ─────────────────────────────────────────────────
+        report_in = LitterReportCreate(
+            user_id=user_id,
+            upload_id=UUID(str(upload.id)),
+            latitude=latitude,
+            longitude=longitude,
+            status="pending",
+            severity=None,
+            detection_results=None,
+            reward_points=0,
+        )
+        report = create_report_controller(report_in, db, user_id)
+        if not report:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create report"
+            )
+
+        # ─── 5. Persist pHash and spatial data ─────────────────────
+        # Store empty bytes for embedding to maintain database compatibility
+        fp = ImageFingerprint(
+            report_id=report.id,
+            phash=str(ph),
+            embedding=b''  # empty bytes for embedding since we're not using it
+        )
+        db.add(fp)
+
+        # set spatial field
+        report.geom = func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326)
+
+        db.commit()
+    except Exception:
+        if upload is None:
+            db.rollback()
+        if upload is None or _discard_saved_upload(db, upload.id):
+            ingested.path.unlink(missing_ok=True)
+        raise
+
+    # committed: from here on the report stands whatever happens
+    if settings.PHASH_DEDUPE_MODE == "memory":
+        get_phash_index().add(report.id, ph, report.created_at or now)
+    return report
+
+
 @router.post(
     "/{session_id}/full",
     response_model=LitterReportCreate,
@@ -202,85 +291,48 @@ async def upload_create_report_and_detect(
     db: Session = Depends(get_db),
     current_user=Depends(auth_middleware)
 ):
+    """
+    Blocking steps (disk writes, decode/pHash, DB) run on the bounded executors
+    in utils/executors.py so a slow upload does not stall the event loop.
+    """
     user_id = current_user["id"]
     now = datetime.utcnow()
 
-    # ─── 1. Read & hash image ───────────────────────────────────────────────────
-    img_bytes = await file.read()
-    img = Image.open(BytesIO(img_bytes))
-    ph = imagehash.phash(img)
-
-    # ─── 2. Global pHash dedupe (last week only) ───────────────────────────────
-    one_week_ago = now - timedelta(days=7)
-    rows = db.execute(
-        select(ImageFingerprint.report_id, ImageFingerprint.phash)
-        .join(LitterReport, ImageFingerprint.report_id == LitterReport.id)
-        .where(LitterReport.created_at >= one_week_ago)
-    ).fetchall()
-
-    dup_ids = []
-    for rid, old_hex in rows:
-        old_hash = hex_to_hash(old_hex)
-        if (ph - old_hash) <= PHASH_THRESHOLD:
-            dup_ids.append(str(rid))
+    # ─── 1. Stream to disk & hash image ────────────────────────────────────────
+    try:
+        ingested = await run_io(ingest_fileobj, file.file, new_upload_path(file.filename), settings.MAX_FILE_SIZE)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    try:
+        # decoded from an mmap of the stored file, not a second in-memory copy
+        ph = hex_to_hash(await run_cpu(phash_of_file, str(ingested.path)))
+
+        # ─── 2. Dedupe: nearby reports (space + time), then pHash ─────────────
+        dup_ids = await run_io(find_duplicate_reports, db, ph, latitude, longitude, now)
+    except Exception:
+        ingested.path.unlink(missing_ok=True)
+        raise
 
     if dup_ids:
         # true visual duplicate
+        ingested.path.unlink(missing_ok=True)
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail={"reason": "phash", "ids": dup_ids}
         )
 
-    # ─── 3. Save upload ────────────────────────────────────────────────────────
-    file.file.seek(0)
-    upload = create_upload_controller(
-        db=db,
-        file=file,
-        latitude=latitude,
-        longitude=longitude,
-        user_id=user_id,
-        session_id=session_id
-    )
-    if not upload:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to save upload"
-        )
-
-    # ─── 4. Create report ─────────────────────────────────────────────────────
-    report_in = LitterReportCreate(
-        user_id=user_id,
-        upload_id=UUID(str(upload.id)),
-        latitude=latitude,
-        longitude=longitude,
-        status="pending",
-        severity=None,
-        detection_results=None,
-        reward_points=0,
-    )
-    report = create_report_controller(report_in, db, user_id)
-    if not report:
-        # cleanup upload
-        db.delete(upload)
-        db.commit()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to create report"
+    # ─── 3–5. Save upload, create report, persist fingerprint ─────────────────
+    # _save_upload_and_report removes the file itself if it fails
+    try:
+        report = await run_io(
+            _save_upload_and_report,
+            db, file, ingested, ph, latitude, longitude, user_id, session_id, now,
         )
-
-    # ─── 5. Persist pHash and spatial data ─────────────────────────
-    # Store empty bytes for embedding to maintain database compatibility
-    fp = ImageFingerprint(
-        report_id=report.id,
-        phash=str(ph),
-        embedding=b''  # empty bytes for embedding since we're not using it
-    )
-    db.add(fp)
-
-    # set spatial field
-    report.geom = func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326)
-
-    db.commit()
+    except ExecutorSaturated:
+        # never started, so nothing was persisted
+        ingested.path.unlink(missing_ok=True)
+        raise
 
     return JSONResponse(
         status_code=status.HTTP_201_CREATED,
@@ -302,7 +354,8 @@ async def upload_file_with_session_endpoint(
 ):
     form = await request.form()
     print("🚨 Raw form keys:", list(form.keys()))
-    upload = create_upload_controller(
+    upload = await run_io(
+        create_upload_controller,
         file=file,
         db=db,
         latitude=latitude,
@@ -326,7 +379,7 @@ async def upload_file_endpoint(
     current_user=Depends(auth_middleware),
 ):
     print(f"Latitude: {latitude}, Longitude: {longitude}, User ID: {current_user['id']}")
-    return create_upload_controller(file, db, latitude, longitude, current_user['id'])
+    return await run_io(create_upload_controller, file, db, latitude, longitude, current_user['id'])
 
 
 @router.get(
@@ -1,18 +1,27 @@
 # api/uploads/uploads_service.py
 
 import uuid
-import shutil
 from pathlib import Path
+from typing import Dict, Iterable, Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi import UploadFile
 from config.database import UPLOAD_DIR  # assume you’ve defined this
+from config.settings import settings
 from api.uploads.uploads_model import Upload
+from api.uploads.uploads_ingest import IngestedFile, ingest_fileobj
 from api.user.user_service import award_points
 from config.points_config import PointReason
 
 # Ensure upload directory exists
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+def new_upload_path(filename: str | None) -> Path:
+    """Fresh destination under UPLOAD_DIR, keeping the original extension."""
+    ext = Path(filename or "").suffix
+    return UPLOAD_DIR / f"{uuid.uuid4().hex}{ext}"
+
+
 def create_upload_with_file(
     db: Session,
     file: UploadFile,
@@ -20,19 +29,20 @@ def create_upload_with_file(
     longitude: float | None = None,
     user_id: int | None = None,
     session_id: str | None = None,
+    ingested: IngestedFile | None = None,
 ) -> Upload:
     """
     Save uploaded file to disk, record metadata in DB including user_id,
     optional geolocation, and optional session_id. Then award points.
+    Pass `ingested` when the file was already streamed to disk (ingest_fileobj).
+    Raises UploadTooLarge if the file exceeds settings.MAX_FILE_SIZE.
     """
-    # 1️⃣ Write file to disk
-    ext = Path(file.filename).suffix
-    unique_name = f"{uuid.uuid4().hex}{ext}"
-    dest = UPLOAD_DIR / unique_name
-    with dest.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # 1️⃣ Write file to disk (chunked, size-bounded, atomic rename)
+    if ingested is None:
+        ingested = ingest_fileobj(file.file, new_upload_path(file.filename), settings.MAX_FILE_SIZE)
+    dest = ingested.path
 
-    file_url = f"/uploads/{unique_name}"
+    file_url = f"/uploads/{dest.name}"
 
     # 2️⃣ Persist Upload record
     upload = Upload(
@@ -41,7 +51,7 @@ def create_upload_with_file(
         file_name=file.filename,
         file_url=file_url,
         content_type=file.content_type,
-        size=dest.stat().st_size,
+        size=ingested.size,
         latitude=latitude,
         longitude=longitude
     )
@@ -51,6 +61,15 @@ def create_upload_with_file(
     return upload
 
 
+def get_file_urls(db: Session, upload_ids: Iterable[Optional[uuid.UUID]]) -> Dict[uuid.UUID, str]:
+    """Batched upload_id → file_url lookup: one query for a whole page of reports."""
+    ids = {u for u in upload_ids if u}
+    if not ids:
+        return {}
+    rows = db.execute(select(Upload.id, Upload.file_url).where(Upload.id.in_(ids))).all()
+    return {upload_id: file_url for upload_id, file_url in rows}
+
+
 def get_all_uploads(db: Session):
     return db.query(Upload).order_by(Upload.uploaded_at.desc()).all()
 
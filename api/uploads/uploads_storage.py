@@ -0,0 +1,111 @@
+# api/uploads/uploads_storage.py
+"""
+Resolve upload references (`/uploads/<file>` paths or public upload URLs) to
+the local upload volume when the file is present there.
+
+Workers that share the volume `create_upload_with_file` writes to can read the
+photo straight from disk — via mmap (zero-copy) or a single np.fromfile read —
+instead of paying an HTTP round trip plus a full response-body copy. Callers
+fall back to HTTP when `read_local_upload` returns None.
+"""
+import os
+import mmap
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Union
+from urllib.parse import urlparse
+
+import numpy as np
+
+from config.database import UPLOAD_DIR
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+UPLOADS_PREFIX = "/uploads/"
+
+SOURCE_LOCAL_MMAP = "local-mmap"
+SOURCE_LOCAL_READ = "local-read"
+SOURCE_HTTP = "http"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+class FetchResult(NamedTuple):
+    data: Union[bytes, np.ndarray]
+    source: str
+    location: str
+
+
+def record_fetch(source: str) -> None:
+    with _stats_lock:
+        _stats[source] += 1
+
+
+def fetch_stats() -> Dict[str, int]:
+    """Counts of fetches served per source since process start."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _upload_base_dir() -> Path:
+    # same directory create_upload_with_file writes to
+    return Path(UPLOAD_DIR).resolve()
+
+
+def local_upload_path(path_or_url: str) -> Optional[Path]:
+    """
+    Map an upload reference onto a file under the upload dir, or None if it does not
+    point at our uploads (foreign URL, path traversal) or the file is not on this machine.
+    """
+    parsed = urlparse(path_or_url)
+    if parsed.scheme in ("http", "https"):
+        upload_host = urlparse(settings.UPLOAD_URL or "").netloc
+        if parsed.netloc and upload_host and parsed.netloc != upload_host:
+            return None
+    path = parsed.path
+    if UPLOADS_PREFIX not in path:
+        return None
+
+    relative = path.split(UPLOADS_PREFIX, 1)[1]
+    base = _upload_base_dir()
+    candidate = (base / relative).resolve()
+    try:
+        candidate.relative_to(base)
+    except ValueError:
+        logger.warning("Rejected upload path outside %s: %s", base, path_or_url)
+        return None
+    return candidate if candidate.is_file() else None
+
+
+def map_upload_file(path: Path) -> np.ndarray:
+    """Read-only uint8 view of a file via mmap."""
+    with open(path, "rb") as fh:
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    # the array keeps the mapping alive; pages are faulted in by the decoder
+    return np.frombuffer(mm, dtype=np.uint8)
+
+
+def read_local_upload(path_or_url: str) -> Optional[FetchResult]:
+    """Read an upload from the local volume if it exists there, else return None."""
+    if not settings.UPLOAD_LOCAL_READ:
+        return None
+    path = local_upload_path(path_or_url)
+    if path is None:
+        return None
+
+    try:
+        if settings.UPLOAD_LOCAL_READ_MODE == "mmap" and os.path.getsize(path) > 0:
+            result = FetchResult(map_upload_file(path), SOURCE_LOCAL_MMAP, str(path))
+        else:
+            result = FetchResult(np.fromfile(path, dtype=np.uint8), SOURCE_LOCAL_READ, str(path))
+    except (OSError, ValueError) as exc:
+        logger.warning("Local read failed for %s, falling back to HTTP: %s", path, exc)
+        return None
+
+    record_fetch(result.source)
+    logger.info("Fetched %s from local volume via %s (%d bytes)", path_or_url, result.source, result.data.size)
+    return result
@@ -1,5 +1,7 @@
 from pathlib import Path
+from typing import Any, Dict, Tuple
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from config.settings import settings
 
@@ -32,6 +34,63 @@ def get_db():
     finally:
         db.close()
 
+# ─── Async engine (asyncpg) for read-heavy endpoints ─────────────────────────────
+# Async routes await the database on the event loop instead of holding one of
+# the ~40 threadpool threads per request. Built on first use so processes
+# that never serve async routes (RQ workers, scripts) don't need asyncpg.
+_async_engine = None
+_async_sessionmaker = None
+
+
+def _async_database_url(url: str) -> Tuple[Any, Dict[str, Any]]:
+    """Rewrite the sync URL for asyncpg, which takes ssl/timezone as connect args, not libpq options."""
+    u = make_url(url)
+    query = dict(u.query)
+    connect_args: Dict[str, Any] = {"server_settings": {"timezone": "utc"}}
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    return u.set(drivername="postgresql+asyncpg", query=query), connect_args
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        url, connect_args = _async_database_url(DATABASE_URL)
+        _async_engine = create_async_engine(
+            url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            echo=settings.DEBUG,
+            connect_args=connect_args,
+        )
+    return _async_engine
+
+
+def get_async_sessionmaker():
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_sessionmaker = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_sessionmaker
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
 # ─── New Uploads config ──────────────────────────────────────────────────────────
 # directory where uploaded files will live
 # (adjust path if you want it elsewhere)
@@ -24,6 +24,9 @@ class Settings(BaseSettings):
     UPLOAD_DIR: Optional[str] = None  # Added missing field
     MAX_FILE_SIZE: int = Field(default=10 * 1024 * 1024, ge=1024)
     ALLOWED_FILE_TYPES: str = "jpg,jpeg,png,gif,pdf"
+    PHASH_DEDUPE_MODE: str = Field(default="sql", pattern="^(sql|memory)$")  # see utils/phash_index.py
+    UPLOAD_LOCAL_READ: bool = True  # read uploads from the local volume before falling back to HTTP
+    UPLOAD_LOCAL_READ_MODE: str = Field(default="mmap", pattern="^(mmap|fromfile)$")
     
     # CORS
     CORS_ORIGINS: str = ""
@@ -96,9 +99,42 @@ class Settings(BaseSettings):
     
     # ML Model settings
     MODEL_PATH: Optional[str] = None
+    MODEL_VARIANT: str = Field(default="fp32", pattern="^(fp32|int8)$")
+    INT8_MODEL_PATH: Optional[str] = None
     ML_MODEL_CACHE_SIZE: int = Field(default=1, ge=1, le=5)
     ML_CONFIDENCE_THRESHOLD: float = Field(default=0.25, ge=0.1, le=0.9)
-    
+    DETECTION_BATCH_SIZE: int = Field(default=8, ge=1, le=64)
+    DETECTION_BATCH_MAX_WAIT_MS: int = Field(default=250, ge=0, le=10000)
+    DETECTION_BATCH_MAX_RETRIES: int = Field(default=2, ge=0, le=10)   # re-enqueues after a failed batch
+
+    EMBEDDING_BACKEND: str = Field(default="keras", pattern="^(keras|onnx)$")
+    EMBEDDING_ONNX_PATH: Optional[str] = None  # default: weights/mobilenetv3_embedding.onnx
+
+    # ONNX Runtime session profile (see api/litter_detections/ort_session.py)
+    ORT_PROFILE: str = "default"
+    ORT_INTRA_OP_THREADS: Optional[int] = Field(default=None, ge=0, le=64)
+    ORT_INTER_OP_THREADS: Optional[int] = Field(default=None, ge=0, le=64)
+    ORT_GRAPH_OPTIMIZATION_LEVEL: Optional[str] = Field(default=None, pattern="^(disable|basic|extended|all)$")
+    ORT_EXECUTION_MODE: Optional[str] = Field(default=None, pattern="^(sequential|parallel)$")
+    ORT_ENABLE_MEM_ARENA: Optional[bool] = None
+    ORT_ENABLE_MEM_PATTERN: Optional[bool] = None
+    ORT_OPTIMIZED_MODEL_PATH: Optional[str] = None
+
+    # FAISS embedding index (see utils/ann_index.py)
+    FAISS_INDEX_PATH: str = "faiss.index"
+    FAISS_INDEX_TYPE: str = Field(default="flat", pattern="^(flat|hnsw|ivf_flat|ivf_pq)$")
+    FAISS_HNSW_M: int = Field(default=32, ge=4, le=128)
+    FAISS_HNSW_EF_CONSTRUCTION: int = Field(default=200, ge=16)
+    FAISS_HNSW_EF_SEARCH: int = Field(default=64, ge=1)
+    FAISS_IVF_NLIST: int = Field(default=1024, ge=1)
+    FAISS_IVF_NPROBE: int = Field(default=16, ge=1)
+    FAISS_PQ_M: int = Field(default=48, ge=1)
+    FAISS_PQ_NBITS: int = Field(default=8, ge=4, le=12)
+    FAISS_SNAPSHOT_EVERY: int = Field(default=500, ge=1)           # adds between snapshots
+    FAISS_SNAPSHOT_INTERVAL_S: int = Field(default=300, ge=1)      # max seconds a logged add waits for a snapshot
+    FAISS_LOG_FSYNC: bool = True
+    FAISS_REFRESH_INTERVAL_S: float = Field(default=2.0, ge=0)     # how often readers look for a new generation / log records
+
     # Monitoring
     ENABLE_METRICS: bool = True
     ENABLE_HEALTH_CHECKS: bool = True
@@ -109,6 +145,31 @@ class Settings(BaseSettings):
     ENABLE_GZIP: bool = True
     ENABLE_CACHE_HEADERS: bool = True
     MAX_REQUEST_SIZE: int = Field(default=16 * 1024 * 1024, ge=1024)  # 16MB
+    # Bounded pools for blocking work in async endpoints (see utils/executors.py)
+    EXECUTOR_IO_WORKERS: int = Field(default=8, ge=1, le=64)      # DB calls, file writes, ffmpeg
+    EXECUTOR_CPU_WORKERS: int = Field(default=2, ge=1, le=32)     # image decode / pHash / thumbnails
+    EXECUTOR_CPU_KIND: str = Field(default="thread", pattern="^(thread|process)$")
+    EXECUTOR_MAX_QUEUE: int = Field(default=64, ge=0)             # waiting tasks per pool before 503
+    # Dashboard nearby-litter query (see api/dashboard/dashboard_service.py)
+    NEARBY_LITTER_LIMIT: int = Field(default=50, ge=1, le=500)
+    # Full cluster rebuilds (see utils/partitioned_dbscan.py); 0 workers = single process
+    CLUSTER_PARTITION_WORKERS: int = Field(default=0, ge=0, le=64)
+    CLUSTER_PARTITION_MIN_POINTS: int = Field(default=50_000, ge=0)  # smaller sets cluster in-process
+    CLUSTER_PARTITION_TILE_KM: float = Field(default=25.0, gt=0)     # tile side; must be >= 4 x eps
+    CLUSTER_RECONCILE_INTERVAL_S: int = Field(default=900, ge=60)    # worker_main loop mode
+    CLUSTER_SYSTEM_USER_ID: int = 23                                 # created_by of "Cluster <id>" groups
+    # Engine behind /cluster_suggestions; reconcile always uses the incremental index
+    CLUSTER_ENGINE: str = Field(default="incremental", pattern="^(incremental|postgis)$")
+    # Reverse geocoding of approved reports (see api/location/city/city_geocode.py)
+    NOMINATIM_URL: str = "https://nominatim.openstreetmap.org/reverse"
+    GEOCODE_CELL_DECIMALS: int = Field(default=3, ge=1, le=6)         # cache cell; 3 decimals ~ 110 m
+    GEOCODE_LRU_SIZE: int = Field(default=10_000, ge=1)
+    GEOCODE_REDIS_TTL_S: int = Field(default=30 * 24 * 3600, ge=60)
+    GEOCODE_BOUNDARY_TTL_S: int = Field(default=600, ge=1)           # reload of cities.boundary
+    GEOCODE_RQ_QUEUE: str = "geocode"                                # RQ queue of geocode_cell jobs
+    GEOCODE_MIN_INTERVAL_S: float = Field(default=1.0, ge=0)         # across all workers; Nominatim allows 1 request/s
+    GEOCODE_MAX_RETRIES: int = Field(default=5, ge=0)                # per cell, after the first attempt
+    GEOCODE_RETRY_BACKOFF_S: float = Field(default=30.0, ge=0)       # doubled on each retry
     
     # Server
     PORT: Optional[int] = Field(default=8000, ge=1, le=65535)  # Added missing field
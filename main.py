@@ -3,12 +3,14 @@ import os
 from pathlib import Path
 from datetime import datetime
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from config.database import engine, Base, SessionLocal
+from config.database import engine, Base, SessionLocal, dispose_async_engine
 from config.settings import settings
+from utils.executors import ExecutorSaturated, executor_stats, shutdown_executors
 
 Base.metadata.create_all(bind=engine)
 
@@ -16,6 +18,8 @@ Base.metadata.create_all(bind=engine)
 async def lifespan(app: FastAPI):
     # nothing heavy here!
     yield
+    shutdown_executors()
+    await dispose_async_engine()
     
 app = FastAPI(lifespan=lifespan)
 # volume static file mount
@@ -47,10 +51,21 @@ def load_routes(directory: Path):
 for router in load_routes(Path(__file__).parent / "api"):
     app.include_router(router, prefix="/api")
     
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
 
+@app.get("/health/executors")
+async def executor_health():
+    # queue depth / counters of the blocking-work pools (utils/executors.py)
+    if not settings.ENABLE_METRICS:
+        return {"status": "disabled"}
+    return executor_stats()
+
 @app.get("/")
 def home():
     return {"message": "Welcome"}
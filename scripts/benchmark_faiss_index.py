@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# scripts/benchmark_faiss_index.py
+"""
+Recall@k / latency benchmark of the ANN index types against the exact flat baseline.
+
+Vectors come from `image_fingerprints.embedding` (--source db) or a synthetic
+clustered set (--source synthetic --n 1000000). Queries are perturbed copies of
+indexed vectors, mimicking near-duplicate uploads. Each query is issued on its
+own, like the upload path does.
+
+Usage:
+    python -m scripts.benchmark_faiss_index --source synthetic --n 200000
+    python -m scripts.benchmark_faiss_index --source db --types flat hnsw ivf_pq --nprobe 32
+"""
+import os
+import sys
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from scripts.build_faiss_index import DEFAULT_DIM, build_index, load_embeddings  # noqa: E402
+from utils.ann_index import INDEX_TYPES, configure_search  # noqa: E402
+
+
+def synthetic_embeddings(n: int, dim: int, clusters: int = 256, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return np.arange(n, dtype=np.int64), vectors
+
+
+def make_queries(vectors: np.ndarray, nq: int, noise: float = 0.05, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), nq)]
+    queries = picks + noise * rng.normal(size=picks.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def timed_search(idx: faiss.Index, queries: np.ndarray, k: int):
+    found = np.empty((len(queries), k), dtype=np.int64)
+    timings = np.empty(len(queries))
+    for i in range(len(queries)):
+        t0 = time.perf_counter()
+        _, ids = idx.search(queries[i:i + 1], k)
+        timings[i] = (time.perf_counter() - t0) * 1000.0
+        found[i] = ids[0]
+    return found, timings
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f) & set(t[t >= 0])) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types against the flat baseline")
+    parser.add_argument("--source", choices=("db", "synthetic"), default="synthetic")
+    parser.add_argument("--n", type=int, default=100_000, help="Synthetic vector count / DB limit")
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, default=None)
+    parser.add_argument("--ef-search", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads")
+    args = parser.parse_args(argv)
+
+    faiss.omp_set_num_threads(args.threads)
+    if args.source == "db":
+        ids, vectors = load_embeddings(args.dim, args.n)
+    else:
+        ids, vectors = synthetic_embeddings(args.n, args.dim)
+    if not len(ids):
+        print("No vectors to benchmark")
+        sys.exit(1)
+    queries = make_queries(vectors, args.queries)
+    print(f"{len(ids)} vectors, dim={args.dim}, {len(queries)} queries, k={args.k}\n")
+
+    baseline = build_index(ids, vectors, "flat")
+    truth, _ = timed_search(baseline, queries, args.k)
+
+    print(f"{'index':<10}{'build s':>10}{'size MB':>10}{'recall@k':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for index_type in args.types:
+        t0 = time.perf_counter()
+        try:
+            idx = baseline if index_type == "flat" else build_index(ids, vectors, index_type)
+        except ValueError as e:
+            print(f"{index_type:<10} skipped: {e}")
+            continue
+        build_s = time.perf_counter() - t0
+        configure_search(idx, nprobe=args.nprobe, ef_search=args.ef_search)
+        size_mb = faiss.serialize_index(idx).nbytes / 1e6
+        found, timings = timed_search(idx, queries, args.k)
+        print(
+            f"{index_type:<10}{build_s:>10.1f}{size_mb:>10.1f}{recall_at_k(found, truth):>10.3f}"
+            f"{np.percentile(timings, 50):>10.3f}{np.percentile(timings, 95):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# scripts/benchmark_faiss_memory.py
+"""
+Per-process memory of N concurrent FAISS readers: private heap copies
+(faiss.read_index) vs the shared mmap'd index (utils.faiss_writer.SharedFaissIndex).
+
+Each child opens the index, runs searches, then reports RSS and PSS from
+/proc/self/smaps_rollup (PSS splits shared page-cache pages between the
+processes mapping them, so it is the number that should stay flat). PSS only
+stays flat for index types whose codes are mapped (utils.ann_index.
+codes_mmapped): IVF always, flat/HNSW only on FAISS builds with
+IO_FLAG_MMAP_IFC.
+
+Usage:
+    python -m scripts.benchmark_faiss_memory --index faiss.index --procs 4
+"""
+import os
+import sys
+import time
+import argparse
+import multiprocessing as mp
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from scripts.build_faiss_index import DEFAULT_DIM  # noqa: E402
+from utils.ann_index import create_index  # noqa: E402
+from utils.faiss_writer import SharedFaissIndex  # noqa: E402
+
+
+def _smaps_rollup() -> dict:
+    values = {}
+    with open("/proc/self/smaps_rollup") as fh:
+        for line in fh:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1]) / 1024.0  # MB
+    return values
+
+
+def _reader(mode: str, path: str, dim: int, queries: int, barrier, results):
+    if mode == "heap":
+        idx = faiss.read_index(path)
+    else:
+        idx = SharedFaissIndex(path, dim, lambda d: create_index(d, "flat"))
+    rng = np.random.default_rng(os.getpid())
+    x = rng.normal(size=(queries, dim)).astype(np.float32)
+    faiss.normalize_L2(x)
+    t0 = time.perf_counter()
+    for i in range(queries):
+        idx.search(x[i:i + 1], 5)
+    elapsed_ms = (time.perf_counter() - t0) * 1000.0 / queries
+    barrier.wait()  # measure while every reader is alive
+    mem = _smaps_rollup()
+    results.put((mem.get("Rss", 0.0), mem.get("Pss", 0.0), elapsed_ms))
+    barrier.wait()
+
+
+def run(mode: str, path: str, dim: int, procs: int, queries: int):
+    barrier = mp.Barrier(procs)
+    results = mp.Queue()
+    workers = [mp.Process(target=_reader, args=(mode, path, dim, queries, barrier, results)) for _ in range(procs)]
+    for w in workers:
+        w.start()
+    rows = [results.get() for _ in workers]
+    for w in workers:
+        w.join()
+    rss, pss, ms = (np.mean([r[i] for r in rows]) for i in range(3))
+    print(f"{mode:<6}{procs:>6}{rss:>12.1f}{pss:>12.1f}{pss * procs:>12.1f}{ms:>12.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare per-process memory of heap vs mmap FAISS readers")
+    parser.add_argument("--index", default="faiss.index")
+    parser.add_argument("--procs", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.index):
+        print(f"{args.index} not found; build one with scripts/build_faiss_index.py")
+        sys.exit(1)
+
+    print(f"{'mode':<6}{'procs':>6}{'RSS MB':>12}{'PSS MB':>12}{'total PSS':>12}{'ms/query':>12}")
+    for mode in ("heap", "mmap"):
+        for n in args.procs:
+            run(mode, args.index, args.dim, n, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# scripts/benchmark_import_time.py
+"""
+Cold import time and peak RSS of app modules, each measured in a fresh interpreter.
+
+Shows what a web process pays at startup (e.g. `main`, `api.uploads.uploads_routes`)
+and whether TensorFlow/Keras got pulled in along the way. The embedding model
+itself is only built by utils.embeddings.load_embedding_model().
+
+Usage:
+    python -m scripts.benchmark_import_time
+    python -m scripts.benchmark_import_time --modules main utils.geoutils --runs 5
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+DEFAULT_MODULES = [
+    "utils.geoutils",
+    "utils.embeddings",
+    "api.notifications.notifications_service",
+    "api.uploads.uploads_routes",
+    "main",
+]
+
+_PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+import importlib
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - t0
+if sys.argv[2] == "1":
+    from utils.embeddings import load_embedding_model
+    load_embedding_model()
+print(json.dumps({
+    "seconds": elapsed,
+    "total_seconds": time.perf_counter() - t0,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    "tensorflow": "tensorflow" in sys.modules,
+    "keras": "keras" in sys.modules,
+}))
+"""
+
+
+def measure(module: str, load_model: bool = False) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE, module, "1" if load_model else "0"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "TF_CPP_MIN_LOG_LEVEL": "3"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else f"exit {proc.returncode}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import time / RSS of app modules")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--with-model", action="store_true", help="Also build the embedding model after import")
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<42}{'import s':>10}{'total s':>10}{'RSS MB':>10}{'TF':>5}")
+    for module in args.modules:
+        try:
+            runs = [measure(module, args.with_model) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{module:<42} failed: {e}")
+            continue
+        imp = np.median([r["seconds"] for r in runs])
+        total = np.median([r["total_seconds"] for r in runs])
+        rss = np.median([r["max_rss_mb"] for r in runs])
+        tf = "yes" if any(r["tensorflow"] or r["keras"] for r in runs) else "no"
+        print(f"{module:<42}{imp:>10.2f}{total:>10.2f}{rss:>10.0f}{tf:>5}")
+
+
+if __name__ == "__main__":
+    main()
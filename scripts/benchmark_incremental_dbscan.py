@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# scripts/benchmark_incremental_dbscan.py
+"""
+Full-rebuild vs incremental DBSCAN maintenance of report clusters.
+
+For each --sizes N, generates N synthetic reports (Gaussian hotspots plus
+uniform background over a --region-km square, in metres like EPSG:3857) and:
+
+  full         sklearn DBSCAN over all N points, what every reconcile used to
+               run (and IncrementalDBSCAN.load, which adds neighbour counts)
+  tiled        with --workers, the same rebuild tiled across a process pool
+               (utils/partitioned_dbscan.py), checked against sklearn
+  incremental  --ops inserts and removes applied one by one to the loaded
+               index; p50/p99 per op and the total
+
+The equivalent comparison for a reconcile that follows K report changes is
+K x incremental-op vs one full rebuild. After the ops the index is checked
+against a fresh sklearn run on the final point set: the same core points,
+the same core partition, and the same noise.
+
+No database is needed.
+
+Usage:
+    python -m scripts.benchmark_incremental_dbscan
+    python -m scripts.benchmark_incremental_dbscan --sizes 50000 500000 --eps 500 --minpts 3 --ops 2000
+    python -m scripts.benchmark_incremental_dbscan --workers 8 --tile-km 25
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+from sklearn.cluster import DBSCAN
+from sklearn.neighbors import KDTree
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.incremental_dbscan import IncrementalDBSCAN  # noqa: E402
+from utils.partitioned_dbscan import partitioned_dbscan  # noqa: E402
+
+
+def synthetic_points(n: int, region_m: float, rng: np.random.Generator) -> np.ndarray:
+    hotspots = max(1, n // 500)
+    centers = rng.uniform(0, region_m, size=(hotspots, 2))
+    n_hot = int(n * 0.7)
+    which = rng.integers(0, hotspots, size=n_hot)
+    hot = centers[which] + rng.normal(0, 300.0, size=(n_hot, 2))
+    background = rng.uniform(0, region_m, size=(n - n_hot, 2))
+    return np.vstack([hot, background])
+
+
+def parity(index: IncrementalDBSCAN, ids, coords: np.ndarray, eps: float, minpts: int) -> bool:
+    counts = KDTree(coords).query_radius(coords, r=eps, count_only=True)
+    ref = DBSCAN(eps=eps, min_samples=minpts).fit(coords).labels_
+    labels = index.labels()
+    core = counts >= minpts
+    if any(index.is_core(pid) != bool(c) for pid, c in zip(ids, core)):
+        return False
+    mapping = {}
+    for pid, k, is_core in zip(ids, ref.tolist(), core):
+        if is_core and mapping.setdefault(k, labels.get(pid)) != labels.get(pid):
+            return False
+        if k == -1 and pid in labels:
+            return False
+    return len(set(mapping.values())) == len(mapping)
+
+
+def same_clustering(counts, labels, ref_counts, ref_labels, minpts: int) -> bool:
+    """Same core points, core partition and noise (border choice may differ)."""
+    core = ref_counts >= minpts
+    if not np.array_equal(counts >= minpts, core) or not np.array_equal(labels == -1, ref_labels == -1):
+        return False
+    pairs = set(zip(ref_labels[core].tolist(), labels[core].tolist()))
+    return len(pairs) == len({a for a, _ in pairs}) == len({b for _, b in pairs})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare full and incremental DBSCAN maintenance")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50_000, 100_000, 250_000, 500_000])
+    parser.add_argument("--eps", type=float, default=500.0)
+    parser.add_argument("--minpts", type=int, default=3)
+    parser.add_argument("--region-km", type=float, default=200.0)
+    parser.add_argument("--ops", type=int, default=1000, help="Inserts + removes applied incrementally")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=0, help="Also time the tiled rebuild on this many processes")
+    parser.add_argument("--tile-km", type=float, default=25.0)
+    parser.add_argument("--no-parity", action="store_true", help="Skip the final sklearn comparison")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    region_m = args.region_km * 1000.0
+    failures = 0
+    print(f"{'N':>8}{'sklearn s':>11}{'tiled s':>9}{'load s':>9}{'op p50 ms':>11}{'op p99 ms':>11}"
+          f"{'ops/rebuild':>13}  parity")
+    for n in args.sizes:
+        coords = synthetic_points(n, region_m, rng)
+        ids = list(range(n))
+
+        t0 = time.perf_counter()
+        ref_labels = DBSCAN(eps=args.eps, min_samples=args.minpts).fit(coords).labels_
+        full_s = time.perf_counter() - t0
+
+        tiled = "-"
+        if args.workers:
+            t0 = time.perf_counter()
+            counts, labels = partitioned_dbscan(coords, args.eps, args.minpts, args.tile_km * 1000.0, args.workers)
+            tiled = f"{time.perf_counter() - t0:.2f}"
+            ref_counts = KDTree(coords).query_radius(coords, r=args.eps, count_only=True)
+            if not same_clustering(counts, labels, ref_counts, ref_labels, args.minpts):
+                failures += 1
+                tiled += "!"
+
+        index = IncrementalDBSCAN(args.eps, args.minpts)
+        t0 = time.perf_counter()
+        index.load(ids, coords[:, 0], coords[:, 1])
+        load_s = time.perf_counter() - t0
+        index.take_delta()
+
+        live = dict(zip(ids, map(tuple, coords)))
+        next_id = n
+        samples = []
+        extra = synthetic_points(args.ops, region_m, rng)
+        for i in range(args.ops):
+            t0 = time.perf_counter()
+            if i % 2:
+                pid = int(rng.integers(0, next_id))
+                while pid not in live:
+                    pid = int(rng.integers(0, next_id))
+                index.remove(pid)
+                del live[pid]
+            else:
+                x, y = extra[i]
+                index.insert(next_id, float(x), float(y))
+                live[next_id] = (float(x), float(y))
+                next_id += 1
+            samples.append(time.perf_counter() - t0)
+
+        p50, p99 = np.percentile(np.asarray(samples) * 1000.0, [50, 99])
+        mean_s = float(np.mean(samples))
+        ok = "skipped"
+        if not args.no_parity:
+            final_ids = list(live)
+            good = parity(index, final_ids, np.array([live[p] for p in final_ids]), args.eps, args.minpts)
+            failures += not good
+            ok = "ok" if good else "FAIL"
+        print(f"{n:>8}{full_s:>11.2f}{tiled:>9}{load_s:>9.2f}{p50:>11.2f}{p99:>11.2f}"
+              f"{full_s / mean_s:>13.0f}  {ok}")
+
+    print("\nops/rebuild: incremental updates that fit in the time of one full sklearn run")
+    print("tiled s ending in '!': the tiled run disagreed with sklearn")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
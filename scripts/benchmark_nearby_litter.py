@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# scripts/benchmark_nearby_litter.py
+"""
+Latency of the dashboard nearby-litter lookup at --rows reports.
+
+Seeds --rows reports spread uniformly over a --spread-deg box around
+(--lat, --lng) inside a transaction that is rolled back at the end, then
+times --queries lookups from random points in the box for:
+
+  legacy   the old full-table scan (every ORM row + Python haversine)
+  postgis  ST_DWithin + KNN on the geom::geography GiST index
+
+and checks, on the legacy sample points, that postgis returns (nearly) the
+same nearest ids as the scan.
+
+Usage:
+    python -m scripts.benchmark_nearby_litter
+    python -m scripts.benchmark_nearby_litter --rows 100000 --radius-km 2 --queries 50
+"""
+import os
+import sys
+import math
+import time
+import random
+import argparse
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import main as _app  # noqa: E402,F401  (imports every model so relationships resolve)
+from config.database import engine  # noqa: E402
+from api.dashboard import dashboard_service  # noqa: E402
+from api.litter_reports.litter_reports_model import LitterReport  # noqa: E402
+from api.user.user_model import User  # noqa: E402
+
+SEED_SQL = text("""
+    INSERT INTO litter_reports
+        (id, user_id, latitude, longitude, status, is_detected, is_mapped, is_grouped,
+         reward_points, created_at, updated_at, geom)
+    SELECT gen_random_uuid(), :user_id, lat, lng, 'pending', false, false, false,
+           0, now(), now(), ST_SetSRID(ST_MakePoint(lng, lat), 4326)
+      FROM (
+        SELECT :lat + (random() - 0.5) * :spread AS lat,
+               :lng + (random() - 0.5) * :spread AS lng
+          FROM generate_series(1, :rows)
+      ) pts
+""")
+
+
+def legacy_nearby(db: Session, user_lat: float, user_lng: float, radius_km: float):
+    """The pre-index implementation, kept here as the baseline."""
+    def haversine(lat1, lon1, lat2, lon2):
+        p1, p2 = math.radians(lat1), math.radians(lat2)
+        dp, dl = math.radians(lat2 - lat1), math.radians(lon2 - lon1)
+        a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+        return 6371 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    out = []
+    for r in db.query(LitterReport).all():
+        dist = haversine(user_lat, user_lng, r.latitude, r.longitude)
+        if dist <= radius_km:
+            out.append({"id": r.id, "before_image_url": getattr(r.upload, "file_url", None), "distance_km": dist})
+    out.sort(key=lambda x: x["distance_km"])
+    return out
+
+
+def timed(fn, points):
+    samples = []
+    for lat, lng in points:
+        t0 = time.perf_counter()
+        fn(lat, lng)
+        samples.append(time.perf_counter() - t0)
+    p50, p95 = np.percentile(np.asarray(samples) * 1000.0, [50, 95])
+    return p50, p95
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the nearby-litter lookup")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--lat", type=float, default=27.7172)
+    parser.add_argument("--lng", type=float, default=85.3240)
+    parser.add_argument("--spread-deg", type=float, default=0.5, help="Side of the seeded box in degrees")
+    parser.add_argument("--radius-km", type=float, default=5.0)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--legacy-queries", type=int, default=3, help="The full scan is slow; fewer samples")
+    parser.add_argument("--user-id", type=int, default=None, help="Owner of the seeded reports (default: first user)")
+    args = parser.parse_args(argv)
+
+    conn = engine.connect()
+    trans = conn.begin()
+    db = Session(bind=conn, join_transaction_mode="create_savepoint")
+    try:
+        user_id = args.user_id or db.execute(select(User.id).order_by(User.id).limit(1)).scalar()
+        if user_id is None:
+            print("No users in the database; pass --user-id")
+            sys.exit(1)
+
+        t0 = time.perf_counter()
+        db.execute(SEED_SQL, {"user_id": user_id, "lat": args.lat, "lng": args.lng,
+                              "spread": args.spread_deg, "rows": args.rows})
+        db.execute(text("ANALYZE litter_reports"))
+        total = db.execute(text("SELECT count(*) FROM litter_reports")).scalar()
+        print(f"seeded {args.rows} reports in {time.perf_counter() - t0:.1f}s ({total} in table)")
+
+        rng = random.Random(42)
+        half = args.spread_deg / 2
+        points = [(args.lat + rng.uniform(-half, half), args.lng + rng.uniform(-half, half))
+                  for _ in range(args.queries)]
+
+        def run_postgis(lat, lng):
+            return dashboard_service._nearby_litter_postgis(db, lat, lng, args.radius_km, args.limit)
+
+        def run_legacy(lat, lng):
+            db.expunge_all()
+            return legacy_nearby(db, lat, lng, args.radius_km)
+
+        # PostGIS measures on the spheroid, the legacy scan on a sphere, so the
+        # last few places before the limit may differ; require 90% overlap
+        checked = points[:args.legacy_queries]
+        mismatches = 0
+        for lat, lng in checked:
+            a = {r["id"] for r in run_postgis(lat, lng)}
+            b = {r["id"] for r in run_legacy(lat, lng)[:args.limit]}
+            mismatches += len(a & b) < 0.9 * max(len(a), len(b))
+
+        print(f"\n{'path':<10}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, fn, pts in (
+            ("postgis", run_postgis, points),
+            ("legacy", run_legacy, checked),
+        ):
+            p50, p95 = timed(fn, pts)
+            print(f"{name:<10}{p50:>10.1f}{p95:>10.1f}")
+        print(f"postgis/legacy result mismatches: {mismatches}/{len(checked)}")
+    finally:
+        db.close()
+        trans.rollback()
+        conn.close()
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# scripts/benchmark_ort_profiles.py
+"""
+Sweep ONNX Runtime session profiles against the detector and print load time
+and per-inference latency for each, so we can pick ORT_PROFILE for a machine.
+--threads and --opt-levels sweep intra-op threads and the graph optimization
+level (ORT_GRAPH_OPTIMIZATION_LEVEL) on top of every profile.
+
+Usage:
+    python -m scripts.benchmark_ort_profiles --model weights/best_classes.onnx
+    python -m scripts.benchmark_ort_profiles --profiles single_core,low_memory --threads 1,2 --runs 50
+    python -m scripts.benchmark_ort_profiles --profiles single_core --opt-levels basic,extended,all
+"""
+import os
+import sys
+import time
+import argparse
+from dataclasses import replace
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.litter_detections.ort_session import (  # noqa: E402
+    GRAPH_OPTIMIZATION_LEVELS,
+    PROFILES,
+    get_profile,
+    create_session,
+)
+
+
+def _percentile(samples, q):
+    return float(np.percentile(np.asarray(samples), q)) if samples else 0.0
+
+
+def bench_profile(model_path, profile, runs, warmup, batch, input_size):
+    start = time.perf_counter()
+    session = create_session(model_path, profile)
+    load_s = time.perf_counter() - start
+
+    inp = session.get_inputs()[0]
+    tensor = np.random.rand(batch, 3, input_size, input_size).astype(np.float32)
+
+    for _ in range(warmup):
+        session.run(None, {inp.name: tensor})
+
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        session.run(None, {inp.name: tensor})
+        timings.append((time.perf_counter() - t0) * 1000.0)
+
+    return {
+        "load_ms": load_s * 1000.0,
+        "p50_ms": _percentile(timings, 50),
+        "p95_ms": _percentile(timings, 95),
+        "mean_ms": float(np.mean(timings)) if timings else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ONNX Runtime session profiles")
+    parser.add_argument("--model", default=os.path.join("weights", "best_classes.onnx"))
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Comma-separated profile names")
+    parser.add_argument("--threads", default="", help="Optional comma-separated intra-op thread counts to sweep per profile")
+    parser.add_argument("--opt-levels", default="",
+                        help=f"Optional comma-separated graph optimization levels to sweep per profile "
+                             f"({','.join(GRAPH_OPTIMIZATION_LEVELS)})")
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--input-size", type=int, default=640)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        print(f"Model not found at {args.model}")
+        sys.exit(1)
+
+    thread_counts = [int(t) for t in args.threads.split(",") if t.strip()]
+    opt_levels = [o.strip() for o in args.opt_levels.split(",") if o.strip()]
+    unknown = [o for o in opt_levels if o not in GRAPH_OPTIMIZATION_LEVELS]
+    if unknown:
+        parser.error(f"unknown --opt-levels {unknown}; choose from {list(GRAPH_OPTIMIZATION_LEVELS)}")
+
+    candidates = []
+    for name in [p.strip() for p in args.profiles.split(",") if p.strip()]:
+        base = get_profile(name)
+        threaded = [replace(base, name=f"{name}/intra={n}", intra_op_threads=n) for n in thread_counts] or [base]
+        for profile in threaded:
+            if opt_levels:
+                for level in opt_levels:
+                    candidates.append(replace(profile, name=f"{profile.name}/opt={level}", graph_optimization=level))
+            else:
+                candidates.append(profile)
+
+    print(f"{'profile':<36}{'load ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    results = []
+    for profile in candidates:
+        r = bench_profile(args.model, profile, args.runs, args.warmup, args.batch, args.input_size)
+        results.append((profile.name, r))
+        print(f"{profile.name:<36}{r['load_ms']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['mean_ms']:>10.1f}")
+
+    if results:
+        best = min(results, key=lambda x: x[1]["p50_ms"])
+        print(f"\nFastest by p50: {best[0]} ({best[1]['p50_ms']:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# scripts/benchmark_phash_index.py
+"""
+pHash duplicate lookup benchmark: the original per-row hex_to_hash loop vs a
+vectorized popcount scan vs multi-index hashing (utils/phash_index.py), at
+10k / 100k / 1M fingerprints. Queries are a mix of near-duplicates (a few bits
+flipped from an indexed hash) and unrelated hashes; all three paths must agree.
+
+Usage:
+    python -m scripts.benchmark_phash_index
+    python -m scripts.benchmark_phash_index --sizes 10000 100000 --queries 200 --threshold 8
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+from imagehash import hex_to_hash
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.phash_index import PHashIndex  # noqa: E402
+
+
+def _hex(h: int) -> str:
+    return f"{h:016x}"
+
+
+def make_queries(hashes: np.ndarray, n: int, rng) -> list:
+    queries = []
+    for i in range(n):
+        if i % 2:
+            queries.append(int(rng.integers(0, 2**64 - 1, dtype=np.uint64, endpoint=True)))
+            continue
+        h = int(hashes[rng.integers(0, len(hashes))])
+        for bit in rng.choice(64, size=int(rng.integers(0, 7)), replace=False):
+            h ^= 1 << int(bit)
+        queries.append(h)
+    return queries
+
+
+def legacy_query(rows, q_hex: str, threshold: int):
+    ph = hex_to_hash(q_hex)
+    return [rid for rid, old_hex in rows if (ph - hex_to_hash(old_hex)) <= threshold]
+
+
+def _time(fn, queries):
+    timings, results = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append(sorted(fn(q)))
+        timings.append((time.perf_counter() - t0) * 1000.0)
+    return np.percentile(timings, 50), np.percentile(timings, 95), results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pHash duplicate lookups")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--threshold", type=int, default=8)
+    parser.add_argument("--legacy-max", type=int, default=100_000, help="Skip the Python loop above this size")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    now = datetime.utcnow()
+    print(f"{'size':>10}{'path':>10}{'build s':>10}{'p50 ms':>10}{'p95 ms':>10}{'agree':>8}")
+    for size in args.sizes:
+        hashes = rng.integers(0, 2**64 - 1, size=size, dtype=np.uint64, endpoint=True)
+        queries = make_queries(hashes, args.queries, rng)
+
+        t0 = time.perf_counter()
+        index = PHashIndex()
+        for i, h in enumerate(hashes.tolist()):
+            index.add(i, h, now - timedelta(seconds=i % 86400))
+        build_s = time.perf_counter() - t0
+
+        mih = _time(lambda q: index.query(q, args.threshold, now), queries)
+        linear = _time(lambda q: index.query_linear(q, args.threshold, now), queries)
+        rows = [(i, _hex(h)) for i, h in enumerate(hashes.tolist())] if size <= args.legacy_max else None
+
+        results = {"mih": mih, "numpy": linear}
+        if rows is not None:
+            results["legacy"] = _time(lambda q: legacy_query(rows, _hex(q), args.threshold), queries[:20])
+        reference = linear[2]
+        for name, (p50, p95, found) in results.items():
+            agree = found == reference[: len(found)]
+            print(f"{size:>10}{name:>10}{build_s if name == 'mih' else 0:>10.1f}{p50:>10.3f}{p95:>10.3f}{str(agree):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# scripts/benchmark_postgis_clustering.py
+"""
+ST_ClusterDBSCAN inside Postgres vs the sklearn path for cluster suggestions.
+
+Seeds --rows reports (Gaussian hotspots plus uniform background over a
+--region-km square around --lat/--lng) inside a transaction that is rolled
+back at the end, then times --repeat runs of:
+
+  sklearn      a fresh ReportClusterIndex: every report row streamed to
+               Python, DBSCAN, then suggestions built from the labels
+  incremental  the same index once loaded (sync finds nothing new)
+  postgis      LitterGroupService engine="postgis": one row per cluster
+
+Parity: the EPSG:3857 points PostGIS clustered are fetched and run through
+sklearn DBSCAN with the same eps/minpts. Both must agree on the core points'
+partition and on noise, and every PostGIS border point must sit within eps
+of a core of its own cluster (DBSCAN leaves the choice between clusters open).
+
+Usage:
+    python -m scripts.benchmark_postgis_clustering
+    python -m scripts.benchmark_postgis_clustering --rows 200000 --eps 500 --minpts 3 --repeat 3
+"""
+import os
+import sys
+import math
+import time
+import argparse
+
+import numpy as np
+from sklearn.cluster import DBSCAN
+from sklearn.neighbors import KDTree
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import main as _app  # noqa: E402,F401  (imports every model so relationships resolve)
+from config.database import engine  # noqa: E402
+from api.litter_groups.litter_groups_service import LitterGroupService  # noqa: E402
+from api.user.user_model import User  # noqa: E402
+from utils.geoutils import postgis_available  # noqa: E402
+from utils.incremental_dbscan import ReportClusterIndex  # noqa: E402
+
+SEED_SQL = text("""
+    INSERT INTO litter_reports
+        (id, user_id, latitude, longitude, status, is_detected, is_mapped, is_grouped,
+         reward_points, created_at, updated_at, geom)
+    SELECT gen_random_uuid(), :user_id, lat, lng, 'pending', false, false, false,
+           0, now(), now(), ST_SetSRID(ST_MakePoint(lng, lat), 4326)
+      FROM unnest(CAST(:lats AS float8[]), CAST(:lngs AS float8[])) AS pts(lat, lng)
+""")
+
+# the same points ST_ClusterDBSCAN sees
+POINTS_SQL = text("""
+    SELECT id::text AS id, ST_X(g) AS x, ST_Y(g) AS y
+      FROM (
+        SELECT id, ST_Transform(COALESCE(geom, ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)), 3857) AS g
+          FROM litter_reports
+      ) pts
+""")
+
+
+def synthetic_latlng(n: int, lat: float, lng: float, region_m: float, rng: np.random.Generator):
+    hotspots = max(1, n // 500)
+    centers = rng.uniform(-region_m / 2, region_m / 2, size=(hotspots, 2))
+    n_hot = int(n * 0.7)
+    hot = centers[rng.integers(0, hotspots, size=n_hot)] + rng.normal(0, 300.0, size=(n_hot, 2))
+    background = rng.uniform(-region_m / 2, region_m / 2, size=(n - n_hot, 2))
+    xy = np.vstack([hot, background])
+    lats = lat + xy[:, 1] / 111_320.0
+    lngs = lng + xy[:, 0] / (111_320.0 * math.cos(math.radians(lat)))
+    return lats, lngs
+
+
+def parity(ids, coords: np.ndarray, labels: np.ndarray, eps: float, minpts: int) -> str:
+    """'' when `labels` is a valid DBSCAN of `coords`, else what differs."""
+    tree = KDTree(coords)
+    core = tree.query_radius(coords, r=eps, count_only=True) >= minpts
+    ref = DBSCAN(eps=eps, min_samples=minpts).fit(coords).labels_
+
+    if np.any(labels[core] == -1):
+        return "core point left as noise"
+    if not np.array_equal(labels == -1, ref == -1):
+        return f"noise differs on {int(np.sum((labels == -1) != (ref == -1)))} points"
+    pairs = set(zip(ref[core].tolist(), labels[core].tolist()))
+    if not len(pairs) == len({a for a, _ in pairs}) == len({b for _, b in pairs}):
+        return "core partition differs"
+    border = np.flatnonzero(~core & (labels != -1))
+    for i, nbrs in zip(border, tree.query_radius(coords[border], r=eps)):
+        if not np.any(core[nbrs] & (labels[nbrs] == labels[i])):
+            return f"border point {ids[i]} not next to a core of its cluster"
+    return ""
+
+
+def best_of(fn, repeat: int):
+    times, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare PostGIS and sklearn cluster suggestions")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--lat", type=float, default=27.7172)
+    parser.add_argument("--lng", type=float, default=85.3240)
+    parser.add_argument("--region-km", type=float, default=50.0)
+    parser.add_argument("--eps", type=float, default=500.0)
+    parser.add_argument("--minpts", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path; the best is reported")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--user-id", type=int, default=None, help="Owner of the seeded reports (default: first user)")
+    args = parser.parse_args(argv)
+
+    conn = engine.connect()
+    trans = conn.begin()
+    db = Session(bind=conn, join_transaction_mode="create_savepoint")
+    try:
+        if not postgis_available(db):
+            print("PostGIS is not installed in this database")
+            sys.exit(1)
+        user_id = args.user_id or db.execute(select(User.id).order_by(User.id).limit(1)).scalar()
+        if user_id is None:
+            print("No users in the database; pass --user-id")
+            sys.exit(1)
+
+        rng = np.random.default_rng(args.seed)
+        lats, lngs = synthetic_latlng(args.rows, args.lat, args.lng, args.region_km * 1000.0, rng)
+        t0 = time.perf_counter()
+        db.execute(SEED_SQL, {"user_id": user_id, "lats": lats.tolist(), "lngs": lngs.tolist()})
+        db.execute(text("ANALYZE litter_reports"))
+        total = db.execute(text("SELECT count(*) FROM litter_reports")).scalar()
+        print(f"seeded {args.rows} reports in {time.perf_counter() - t0:.1f}s ({total} in table)")
+
+        svc = LitterGroupService(db)
+        index = ReportClusterIndex(args.eps, args.minpts)
+
+        def run_sklearn():
+            fresh = ReportClusterIndex(args.eps, args.minpts)
+            fresh.sync(db)
+            return svc._build_suggestions(fresh, fresh.clusters())
+
+        def run_incremental():
+            index.sync(db)
+            return svc._build_suggestions(index, index.clusters())
+
+        def run_postgis():
+            return svc.get_cluster_suggestions(args.eps, args.minpts, engine="postgis")
+
+        index.sync(db)
+        print(f"\n{'path':<13}{'best s':>9}{'clusters':>10}")
+        for name, fn in (("sklearn", run_sklearn), ("incremental", run_incremental), ("postgis", run_postgis)):
+            best, suggestions = best_of(fn, args.repeat)
+            print(f"{name:<13}{best:>9.2f}{len(suggestions):>10}")
+            if name == "postgis":
+                postgis_suggestions = suggestions
+
+        rows = db.execute(POINTS_SQL).all()
+        ids = [r.id for r in rows]
+        coords = np.array([(r.x, r.y) for r in rows], dtype=np.float64)
+        label_of = {str(m["id"]): s.cluster_id for s in postgis_suggestions for m in s.members}
+        labels = np.array([label_of.get(rid, -1) for rid in ids], dtype=np.int64)
+        problem = parity(ids, coords, labels, args.eps, args.minpts)
+        print(f"\npostgis vs sklearn membership: {problem or 'ok'}")
+    finally:
+        db.close()
+        trans.rollback()
+        conn.close()
+
+    if problem:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# scripts/benchmark_preprocessing.py
+"""
+Microbenchmark: original detection preprocessing vs the preallocated-buffer path
+(api/litter_detections/preprocessing.py) on multi-megapixel phone photos.
+
+Uses JPEGs from --images if given, otherwise synthesizes 12 MP (4032x3024) and
+48 MP (8000x6000) test photos. Reports per-image latency and peak NumPy
+allocation (tracemalloc) for each path.
+
+Usage:
+    python -m scripts.benchmark_preprocessing --runs 20
+    python -m scripts.benchmark_preprocessing --images uploads --runs 10
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.litter_detections.litter_detections_service import _letterbox_resize  # noqa: E402
+from api.litter_detections.preprocessing import LetterboxBuffer, letterbox_into  # noqa: E402
+from scripts.quantize_detector import find_images  # noqa: E402
+
+
+def legacy_preprocess(img_bytes: bytes, input_size: int = 640) -> np.ndarray:
+    """The pre-existing path from run_detection_on_image_bytes, kept verbatim for comparison."""
+    arr = np.frombuffer(img_bytes, dtype=np.uint8)
+    img_bgr = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+    img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
+    resized, scale, (pad_x, pad_y) = _letterbox_resize(img_rgb, new_shape=input_size)
+    tensor = resized.astype(np.float32) / 255.0
+    tensor = np.transpose(tensor, (2, 0, 1))
+    return np.expand_dims(tensor, 0).astype(np.float32)
+
+
+def synthetic_photo(width: int, height: int, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    gx = np.linspace(0, 255, width, dtype=np.float32)
+    gy = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([gx + 0 * gy, gy + 0 * gx, (gx + gy) / 2], axis=-1)
+    noise = rng.normal(0, 12, size=(height, width, 3)).astype(np.float32)
+    img = np.clip(base + noise, 0, 255).astype(np.uint8)
+    ok, enc = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return enc.tobytes()
+
+
+def _measure(fn, runs: int):
+    fn()  # warm-up
+    tracemalloc.start()
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000.0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return np.percentile(timings, 50), np.percentile(timings, 95), peak / 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark detection preprocessing paths")
+    parser.add_argument("--images", default=None, help="Directory of real photos (default: synthetic)")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--input-size", type=int, default=640)
+    args = parser.parse_args(argv)
+
+    if args.images:
+        samples = []
+        for path in find_images(args.images, args.limit):
+            with open(path, "rb") as fh:
+                samples.append((os.path.basename(path), fh.read()))
+    else:
+        samples = [
+            ("synthetic 12MP", synthetic_photo(4032, 3024)),
+            ("synthetic 48MP", synthetic_photo(8000, 6000, seed=1)),
+        ]
+    if not samples:
+        print("No images to benchmark")
+        sys.exit(1)
+
+    buffer = LetterboxBuffer(1, args.input_size)
+    print(f"{'image':<24}{'path':<10}{'p50 ms':>10}{'p95 ms':>10}{'peak MB':>10}")
+    for name, data in samples:
+        for label, fn in (
+            ("legacy", lambda: legacy_preprocess(data, args.input_size)),
+            ("buffer", lambda: letterbox_into(data, buffer, 0)),
+        ):
+            p50, p95, peak = _measure(fn, args.runs)
+            print(f"{name[:23]:<24}{label:<10}{p50:>10.1f}{p95:>10.1f}{peak:>10.1f}")
+
+        ref = legacy_preprocess(data, args.input_size)[0]
+        letterbox_into(data, buffer, 0)
+        diff = np.abs(ref - buffer.tensor[0]).mean()
+        print(f"{'':<24}mean |legacy - buffer| = {diff:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# scripts/benchmark_read_endpoints.py
+"""
+Requests/sec of the read endpoints at a fixed p99 latency budget.
+
+For each endpoint the concurrency is stepped up (1, 2, 4, ... --max-concurrency);
+at every level closed-loop clients issue requests for --duration seconds. The
+result per endpoint is the highest throughput reached while p99 stayed within
+--p99-ms. Run it once against a build with the sync (threadpool) handlers and
+once against the async-session build to get the before/after numbers:
+
+    git checkout <before> && uvicorn main:app --workers 1 &
+    python -m scripts.benchmark_read_endpoints --token $TOKEN --label before --csv bench.csv
+    git checkout <after>  && uvicorn main:app --workers 1 &
+    python -m scripts.benchmark_read_endpoints --token $TOKEN --label after --csv bench.csv
+"""
+import csv
+import time
+import asyncio
+import argparse
+
+import httpx
+import numpy as np
+
+DEFAULT_PATHS = [
+    "/api/litter_reports/for_user?limit=50",
+    "/api/cleanup_events/?limit=50",
+    "/api/dashboard/user",               # stays sync (threadpool): a control, not a ported endpoint
+    "/api/notifications/?limit=20",
+]
+
+
+async def run_level(client, path: str, concurrency: int, duration: float):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                r = await client.get(path)
+                if r.status_code >= 400:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    p99 = float(np.percentile(latencies, 99) * 1000.0) if latencies else float("inf")
+    return len(latencies) / elapsed, p99, errors
+
+
+async def bench_path(args, path: str):
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(max_connections=args.max_concurrency, max_keepalive_connections=args.max_concurrency)
+    levels, best = [], None
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=30.0, limits=limits) as client:
+        await run_level(client, path, 1, 1.0)  # warm-up (pools, caches)
+        concurrency = 1
+        while concurrency <= args.max_concurrency:
+            rps, p99, errors = await run_level(client, path, concurrency, args.duration)
+            levels.append((concurrency, rps, p99, errors))
+            print(f"  c={concurrency:<4} {rps:9.1f} req/s  p99={p99:8.1f}ms  errors={errors}")
+            if p99 <= args.p99_ms and errors == 0 and (best is None or rps > best[1]):
+                best = (concurrency, rps, p99)
+            if p99 > 2 * args.p99_ms:
+                break  # past saturation; higher levels only queue
+            concurrency *= 2
+    return best, levels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput of read endpoints at a fixed p99")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", default=None, help="JWT for authenticated endpoints")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--p99-ms", type=float, default=200.0)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--max-concurrency", type=int, default=256)
+    parser.add_argument("--label", default="run", help="Tag for the CSV rows (e.g. before/after)")
+    parser.add_argument("--csv", default=None, help="Append results to this CSV file")
+    args = parser.parse_args(argv)
+
+    summary = []
+    for path in args.paths:
+        print(f"\n{path}")
+        best, levels = asyncio.run(bench_path(args, path))
+        summary.append((path, best, levels))
+
+    print(f"\n== [{args.label}] max throughput with p99 <= {args.p99_ms:.0f}ms")
+    for path, best, _ in summary:
+        if best:
+            print(f"  {path:<45} {best[1]:9.1f} req/s  (c={best[0]}, p99={best[2]:.1f}ms)")
+        else:
+            print(f"  {path:<45} never within budget")
+
+    if args.csv:
+        with open(args.csv, "a", newline="") as fh:
+            writer = csv.writer(fh)
+            for path, _, levels in summary:
+                for concurrency, rps, p99, errors in levels:
+                    writer.writerow([args.label, path, concurrency, f"{rps:.1f}", f"{p99:.1f}", errors])
+
+
+if __name__ == "__main__":
+    main()
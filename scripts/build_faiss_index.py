@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# scripts/build_faiss_index.py
+"""
+Offline FAISS index builder.
+
+Reads every stored embedding from `image_fingerprints.embedding` (float32
+bytes written by the report worker), trains the configured index type
+(IVF centroids / PQ codebooks) on a random sample, adds all vectors under
+their report ids and atomically replaces settings.FAISS_INDEX_PATH.
+
+Usage:
+    python -m scripts.build_faiss_index --type ivf_pq
+    python -m scripts.build_faiss_index --type hnsw --output /data/faiss.index
+"""
+import os
+import sys
+import time
+import argparse
+from typing import Tuple
+
+import faiss
+import numpy as np
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config.database import engine  # noqa: E402
+from config.settings import settings  # noqa: E402
+from utils.ann_index import (  # noqa: E402
+    INDEX_TYPES,
+    create_index,
+    effective_nlist,
+    requires_training,
+    train_index,
+)
+from utils.faiss_writer import index_file_lock, publish_snapshot  # noqa: E402
+
+# pooled output width of MobileNetV3Small (utils.embeddings._EMB_DIM)
+DEFAULT_DIM = 576
+
+
+def load_embeddings(dim: int, limit: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (ids int64[N], vectors float32[N, dim]) for all well-formed stored embeddings."""
+    sql = (
+        "SELECT m.faiss_id, f.embedding FROM image_fingerprints f "
+        "JOIN faiss_id_map m ON m.report_id = f.report_id "
+        "WHERE octet_length(f.embedding) = :nbytes ORDER BY m.faiss_id"
+    )
+    if limit:
+        sql += " LIMIT :limit"
+    ids, vecs = [], []
+    with engine.begin() as conn:
+        # reports embedded before faiss_id_map existed get their stable id here
+        conn.execute(text(
+            "INSERT INTO faiss_id_map (report_id) SELECT report_id FROM image_fingerprints "
+            "WHERE octet_length(embedding) = :nbytes ON CONFLICT (report_id) DO NOTHING"
+        ), {"nbytes": dim * 4})
+    with engine.connect() as conn:
+        rows = conn.execution_options(stream_results=True).execute(
+            text(sql), {"nbytes": dim * 4, "limit": limit}
+        )
+        for faiss_id, blob in rows:
+            ids.append(faiss_id)
+            vecs.append(np.frombuffer(blob, dtype=np.float32))
+    if not vecs:
+        return np.empty(0, dtype=np.int64), np.empty((0, dim), dtype=np.float32)
+    vectors = np.vstack(vecs)
+    faiss.normalize_L2(vectors)
+    return np.asarray(ids, dtype=np.int64), vectors
+
+
+def build_index(
+    ids: np.ndarray,
+    vectors: np.ndarray,
+    index_type: str,
+    train_size: int = 100_000,
+    nlist: int = 0,
+    chunk: int = 50_000,
+    seed: int = 0,
+) -> faiss.Index:
+    dim = vectors.shape[1]
+    nlist = nlist or settings.FAISS_IVF_NLIST
+    if requires_training(index_type):
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.permutation(len(vectors))[:train_size]]
+        nlist = effective_nlist(nlist, len(sample))
+        if index_type == "ivf_pq" and len(sample) < (1 << settings.FAISS_PQ_NBITS):
+            raise ValueError(
+                f"ivf_pq needs at least {1 << settings.FAISS_PQ_NBITS} training vectors, have {len(sample)}"
+            )
+        idx = create_index(dim, index_type, nlist=nlist)
+        train_index(idx, sample)
+    else:
+        idx = create_index(dim, index_type)
+
+    for start in range(0, len(vectors), chunk):
+        idx.add_with_ids(vectors[start:start + chunk], ids[start:start + chunk])
+    return idx
+
+
+def write_index_atomic(idx: faiss.Index, path: str) -> None:
+    """
+    Swap in the new snapshot under the writer's lock and bump the generation so
+    running readers hot-swap to it (utils/faiss_writer.py). The write-behind log
+    is left alone; the next compaction replays it, skipping ids already built.
+    """
+    with index_file_lock(path):
+        generation = publish_snapshot(idx, path)
+    print(f"Published generation {generation}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and populate the FAISS embedding index")
+    parser.add_argument("--type", choices=INDEX_TYPES, default=settings.FAISS_INDEX_TYPE)
+    parser.add_argument("--output", default=settings.FAISS_INDEX_PATH)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists (default: FAISS_IVF_NLIST)")
+    parser.add_argument("--train-size", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=0, help="Only index the first N embeddings")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    ids, vectors = load_embeddings(args.dim, args.limit)
+    print(f"Loaded {len(ids)} embeddings (dim={args.dim}) in {time.perf_counter() - t0:.1f}s")
+    if not len(ids):
+        print("No embeddings stored yet; nothing to build")
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    try:
+        idx = build_index(ids, vectors, args.type, train_size=args.train_size, nlist=args.nlist)
+    except ValueError as e:
+        print(f"Cannot build {args.type} index: {e}")
+        sys.exit(1)
+    print(f"Built {args.type} index with {idx.ntotal} vectors in {time.perf_counter() - t0:.1f}s")
+
+    write_index_atomic(idx, args.output)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# scripts/check_embedding_parity.py
+"""
+Parity check between the Keras embedding model and its ONNX export.
+
+Embeds each image with both backends through the production preprocessing
+(DecodedImage.embedding_input) and reports the cosine similarity of the
+L2-normalized vectors, plus per-call latency. Exits non-zero when any image
+falls below --min-cosine, so it can gate a re-export.
+
+Usage:
+    python -m scripts.check_embedding_parity --images uploads --limit 200
+    python -m scripts.check_embedding_parity            # synthetic images
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from scripts.quantize_detector import find_images  # noqa: E402
+from utils.decoded_image import DecodedImage  # noqa: E402
+from utils.embeddings import load_embedding_model  # noqa: E402
+
+
+def _synthetic_images(n: int):
+    rng = np.random.default_rng(0)
+    for i in range(n):
+        img = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+        img = cv2.GaussianBlur(img, (0, 0), 3 + i % 5)
+        ok, enc = cv2.imencode(".jpg", img)
+        yield f"synthetic-{i}", enc.tobytes()
+
+
+def _local_images(root: str, limit: int):
+    for path in find_images(root, limit):
+        with open(path, "rb") as fh:
+            yield os.path.basename(path), fh.read()
+
+
+def _embed(model, arr: np.ndarray):
+    start = time.perf_counter()
+    emb = np.asarray(model.predict_on_batch(np.expand_dims(arr, 0))[0], dtype=np.float32)
+    elapsed = (time.perf_counter() - start) * 1000.0
+    return emb / (np.linalg.norm(emb) + 1e-10), elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare Keras and ONNX embeddings")
+    parser.add_argument("--images", default=None, help="Directory of photos (default: synthetic)")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--min-cosine", type=float, default=0.999)
+    args = parser.parse_args(argv)
+
+    keras_model = load_embedding_model("keras")
+    onnx_model = load_embedding_model("onnx")
+    samples = _local_images(args.images, args.limit) if args.images else _synthetic_images(min(args.limit, 20))
+
+    cosines, keras_ms, onnx_ms = [], [], []
+    worst = None
+    for name, data in samples:
+        arr = DecodedImage(data).embedding_input
+        k_emb, k_ms = _embed(keras_model, arr)
+        o_emb, o_ms = _embed(onnx_model, arr)
+        cos = float(np.dot(k_emb, o_emb))
+        cosines.append(cos)
+        keras_ms.append(k_ms)
+        onnx_ms.append(o_ms)
+        if worst is None or cos < worst[1]:
+            worst = (name, cos)
+
+    if not cosines:
+        print("No images to compare")
+        sys.exit(1)
+
+    cosines = np.asarray(cosines)
+    print(f"Images: {len(cosines)}")
+    print(f"Cosine keras↔onnx: min {cosines.min():.6f}, mean {cosines.mean():.6f} (worst: {worst[0]})")
+    print(f"Latency ms  keras p50 {np.percentile(keras_ms, 50):.1f}  onnx p50 {np.percentile(onnx_ms, 50):.1f}")
+    failing = int((cosines < args.min_cosine).sum())
+    if failing:
+        print(f"FAIL: {failing} image(s) below cosine {args.min_cosine}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# scripts/check_report_query_count.py
+"""
+Query-count regression check for the litter report listings.
+
+Seeds --rows reports (each with its own upload) for one user inside a
+transaction that is rolled back at the end, then counts the SQL statements
+each listing issues for a 1-row page and for a --rows page, including
+serialization through LitterReportResponse. A listing passes when both pages
+cost the same number of round trips; any per-row lookup (N+1) makes the large
+page cost more. Exits non-zero on failure.
+
+Usage:
+    python -m scripts.check_report_query_count
+    python -m scripts.check_report_query_count --rows 200 --user-id 24 --event-id <uuid>
+"""
+import os
+import sys
+import uuid
+import argparse
+from contextlib import contextmanager
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import main as _app  # noqa: E402,F401  (imports every model so relationships resolve)
+from config.database import engine  # noqa: E402
+from api.litter_reports.litter_reports_model import LitterReport  # noqa: E402
+from api.litter_reports.litter_reports_schema import LitterReportResponse  # noqa: E402
+from api.litter_reports.litter_reports_service import (  # noqa: E402
+    get_all_litter_reports,
+    get_litter_report,
+    get_user_litter_reports,
+)
+from api.photo_verifications.geo.geo_service import GeoService  # noqa: E402
+from api.uploads.uploads_model import Upload  # noqa: E402
+from api.user.user_model import User  # noqa: E402
+from utils.query_params import QueryParams  # noqa: E402
+
+
+class StatementCounter:
+    def __init__(self, conn):
+        self.count = 0
+        event.listen(conn, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    @contextmanager
+    def measure(self):
+        start = self.count
+        result = {}
+        yield result
+        result["queries"] = self.count - start
+
+
+def seed(db: Session, user_id: int, rows: int):
+    for i in range(rows):
+        upload = Upload(
+            user_id=user_id,
+            file_name=f"querycount-{i}.jpg",
+            file_url=f"/uploads/querycount-{uuid.uuid4().hex}.jpg",
+            content_type="image/jpeg",
+        )
+        db.add(upload)
+        db.flush()
+        db.add(LitterReport(
+            user_id=user_id,
+            upload_id=upload.id,
+            latitude=27.7 + i * 1e-4,
+            longitude=85.3 + i * 1e-4,
+        ))
+    db.flush()
+
+
+def page(limit: int) -> QueryParams[LitterReport]:
+    return QueryParams[LitterReport](limit=limit, offset=0, sort_by="created_at", sort_order="desc")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that report listings issue a constant number of queries")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--user-id", type=int, default=None, help="Owner of the seeded reports (default: first user)")
+    parser.add_argument("--event-id", default=None, help="Also check GeoService.list_reports_by_event for this event")
+    args = parser.parse_args(argv)
+
+    conn = engine.connect()
+    trans = conn.begin()
+    db = Session(bind=conn, join_transaction_mode="create_savepoint")
+    counter = StatementCounter(conn)
+    failures = 0
+    try:
+        user_id = args.user_id or db.execute(select(User.id).order_by(User.id).limit(1)).scalar()
+        if user_id is None:
+            print("No users in the database; pass --user-id")
+            sys.exit(1)
+        seed(db, user_id, args.rows)
+
+        def run_all(limit):
+            result = get_all_litter_reports(db, params=page(limit))
+            return [LitterReportResponse.model_validate(r) for r in result["items"]]
+
+        def run_user(limit):
+            result = get_user_litter_reports(db, page(limit), user_id)
+            return [LitterReportResponse.model_validate(r) for r in result["reports"]]
+
+        checks = [("get_all_litter_reports", run_all), ("get_user_litter_reports", run_user)]
+        print(f"{'listing':<28}{'1 row':>8}{f'{args.rows} rows':>10}")
+        for name, fn in checks:
+            counts = []
+            for limit in (1, args.rows):
+                db.expunge_all()  # no identity-map hits from the previous run
+                with counter.measure() as m:
+                    items = fn(limit)
+                counts.append(m["queries"])
+            ok = counts[0] == counts[1] and len(items) == args.rows
+            failures += not ok
+            print(f"{name:<28}{counts[0]:>8}{counts[1]:>10}  {'ok' if ok else 'FAIL'}")
+
+        report_id = db.execute(
+            select(LitterReport.id).where(LitterReport.user_id == user_id).order_by(LitterReport.created_at.desc())
+        ).scalar()
+        db.expunge_all()
+        with counter.measure() as m:
+            get_litter_report(db, report_id, user_id)
+        print(f"{'get_litter_report':<28}{m['queries']:>8}")
+
+        if args.event_id:
+            db.expunge_all()
+            with counter.measure() as m:
+                rows = GeoService(db).list_reports_by_event(uuid.UUID(args.event_id))
+            print(f"{'list_reports_by_event':<28}{m['queries']:>8}  ({len(rows)} reports)")
+    finally:
+        db.close()
+        trans.rollback()
+        conn.close()
+
+    if failures:
+        print(f"\n{failures} listing(s) scale their query count with page size")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# scripts/compare_model_variants.py
+"""
+Accuracy/latency regression harness for detector variants (e.g. fp32 vs int8).
+
+For every image in a local directory both variants are run through the
+production detection path; the candidate's boxes are IoU-matched against the
+baseline's (same label, greedy by confidence), and per-label counts and
+`determine_severity` output are compared. p50/p95 latency is reported per variant,
+after one untimed warmup detection per variant (session creation and graph
+optimization happen lazily on the first call).
+
+Usage:
+    python -m scripts.compare_model_variants --images uploads --baseline fp32 --candidate int8
+"""
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.litter_detections.litter_detections_service import run_detection_on_image_bytes  # noqa: E402
+from scripts.quantize_detector import find_images  # noqa: E402
+
+
+def box_iou(a, b) -> float:
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    area_a = max(0.0, a[2] - a[0]) * max(0.0, a[3] - a[1])
+    area_b = max(0.0, b[2] - b[0]) * max(0.0, b[3] - b[1])
+    union = area_a + area_b - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_detections(base, cand, iou_thresh: float):
+    """Greedy same-label IoU matching. Returns (matched, missed, extra, matched_ious)."""
+    base_items = list(zip(base["bounding_boxes"], [d["label"] for d in base["detected_objects"]]))
+    cand_items = sorted(
+        zip(cand["bounding_boxes"], cand["detected_objects"]),
+        key=lambda x: x[1]["confidence"],
+        reverse=True,
+    )
+    used = set()
+    ious = []
+    for box, det in cand_items:
+        best_j, best_iou = None, iou_thresh
+        for j, (bbox, label) in enumerate(base_items):
+            if j in used or label != det["label"]:
+                continue
+            iou = box_iou(box, bbox)
+            if iou >= best_iou:
+                best_j, best_iou = j, iou
+        if best_j is not None:
+            used.add(best_j)
+            ious.append(best_iou)
+    matched = len(used)
+    return matched, len(base_items) - matched, len(cand_items) - matched, ious
+
+
+def timed_detection(data: bytes, variant: str):
+    start = time.perf_counter()
+    result = run_detection_on_image_bytes(data, variant=variant)
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare detections and latency between model variants")
+    parser.add_argument("--images", default="uploads")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--baseline", default="fp32")
+    parser.add_argument("--candidate", default="int8")
+    parser.add_argument("--iou", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    paths = find_images(args.images, args.limit)
+    if not paths:
+        print(f"No images found under {args.images}")
+        sys.exit(1)
+
+    with open(paths[0], "rb") as fh:
+        warmup = fh.read()
+    for variant in (args.baseline, args.candidate):
+        try:
+            run_detection_on_image_bytes(warmup, variant=variant)
+        except RuntimeError as e:
+            print(f"Warmup of {variant} failed: {e}")
+            sys.exit(1)
+
+    latencies = {args.baseline: [], args.candidate: []}
+    matched = missed = extra = 0
+    ious = []
+    severity_agree = 0
+    label_counts = {args.baseline: Counter(), args.candidate: Counter()}
+    count_abs_diff = []
+
+    for path in paths:
+        with open(path, "rb") as fh:
+            data = fh.read()
+        try:
+            base, base_ms = timed_detection(data, args.baseline)
+            cand, cand_ms = timed_detection(data, args.candidate)
+        except RuntimeError as e:
+            print(f"skip {os.path.basename(path)}: {e}")
+            continue
+
+        latencies[args.baseline].append(base_ms)
+        latencies[args.candidate].append(cand_ms)
+
+        m, mi, ex, img_ious = match_detections(base, cand, args.iou)
+        matched, missed, extra = matched + m, missed + mi, extra + ex
+        ious.extend(img_ious)
+        severity_agree += int(base["severity_level"] == cand["severity_level"])
+        count_abs_diff.append(abs(base["total_litter_count"] - cand["total_litter_count"]))
+        label_counts[args.baseline].update(d["label"] for d in base["detected_objects"])
+        label_counts[args.candidate].update(d["label"] for d in cand["detected_objects"])
+
+    n = len(latencies[args.baseline])
+    if not n:
+        print("No images could be processed")
+        sys.exit(1)
+
+    print(f"\nImages compared: {n}")
+    print(f"\n{'variant':<10}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for variant, samples in latencies.items():
+        arr = np.asarray(samples)
+        print(f"{variant:<10}{np.percentile(arr, 50):>10.1f}{np.percentile(arr, 95):>10.1f}{arr.mean():>10.1f}")
+
+    base_total = matched + missed
+    recall = matched / base_total if base_total else 1.0
+    precision = matched / (matched + extra) if (matched + extra) else 1.0
+    print(f"\nBox agreement @IoU {args.iou}: recall {recall:.3f}, precision {precision:.3f}, "
+          f"mean IoU {np.mean(ious) if ious else 0.0:.3f}")
+    print(f"Severity agreement: {severity_agree}/{n} ({severity_agree / n:.1%})")
+    print(f"Mean |count diff| per image: {np.mean(count_abs_diff):.2f}")
+
+    print(f"\n{'label':<18}{args.baseline:>10}{args.candidate:>10}")
+    for label in sorted(set(label_counts[args.baseline]) | set(label_counts[args.candidate])):
+        print(f"{label:<18}{label_counts[args.baseline][label]:>10}{label_counts[args.candidate][label]:>10}")
+
+
+if __name__ == "__main__":
+    main()
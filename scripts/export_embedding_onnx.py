@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# scripts/export_embedding_onnx.py
+"""
+Export the MobileNetV3Small embedding backbone (utils.embeddings) to ONNX so
+the report worker can embed with onnxruntime (EMBEDDING_BACKEND=onnx) instead
+of TensorFlow. Needs TensorFlow and tf2onnx where it runs, not in production:
+
+    pip install tf2onnx
+    python -m scripts.export_embedding_onnx
+    python -m scripts.export_embedding_onnx --output weights/mobilenetv3_embedding.onnx --opset 17
+
+The graph takes float32 NHWC (batch, 160, 160, 3) RGB in [0, 255] (the Keras
+model rescales internally) and returns the (batch, 576) pooled features.
+The model is traced through a tf.function and converted with
+tf2onnx.convert.from_function: from_keras relies on tf.keras internals
+(output_names, _get_save_spec) that Keras 3 models do not have.
+After export, check it with scripts/check_embedding_parity.py.
+"""
+import os
+import sys
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.embeddings import EMBED_INPUT_SIZE, _EMB_DIM, embedding_onnx_path, load_embedding_model  # noqa: E402
+
+
+def export(output: str, opset: int) -> None:
+    import tensorflow as tf
+    import tf2onnx
+
+    model = load_embedding_model("keras")
+    spec = (tf.TensorSpec((None, EMBED_INPUT_SIZE, EMBED_INPUT_SIZE, 3), tf.float32, name="input"),)
+
+    @tf.function(input_signature=spec)
+    def embed(images):
+        return {"embedding": model(images, training=False)}
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tf2onnx.convert.from_function(embed, input_signature=spec, opset=opset, output_path=output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--output", default=embedding_onnx_path())
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args(argv)
+
+    export(args.output, args.opset)
+
+    import onnxruntime as ort
+    session = ort.InferenceSession(args.output, providers=["CPUExecutionProvider"])
+    probe = np.random.default_rng(0).uniform(0, 255, (2, EMBED_INPUT_SIZE, EMBED_INPUT_SIZE, 3)).astype(np.float32)
+    out = session.run(None, {session.get_inputs()[0].name: probe})[0]
+    if out.shape != (2, _EMB_DIM):
+        print(f"Unexpected ONNX output shape {out.shape}, expected (2, {_EMB_DIM})")
+        sys.exit(1)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB), output dim {out.shape[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# scripts/import_city_boundaries.py
+"""
+Load city boundaries from a GeoJSON FeatureCollection into cities.boundary.
+
+Each (Multi)Polygon feature is matched to a city by name (case-insensitive,
+--name-property, default "name"); unknown names are created. Polygons are
+stored as MULTIPOLYGON in EPSG:4326. The geocoder (api/location/city/
+city_geocode.py) picks them up on its next boundary reload.
+
+Usage:
+    python -m scripts.import_city_boundaries boundaries.geojson
+    python -m scripts.import_city_boundaries boundaries.geojson --name-property NAME_2 --dry-run
+"""
+import os
+import sys
+import json
+import argparse
+
+from geoalchemy2.shape import from_shape
+from shapely.geometry import MultiPolygon, shape
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import main as _app  # noqa: E402,F401  (imports every model so relationships resolve)
+from config.database import SessionLocal  # noqa: E402
+from api.location.city.city_geocode import city_id_for_name  # noqa: E402
+from api.location.city.city_model import City  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import city boundaries from GeoJSON")
+    parser.add_argument("path", help="GeoJSON FeatureCollection in EPSG:4326")
+    parser.add_argument("--name-property", default="name")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and match, then roll back")
+    args = parser.parse_args(argv)
+
+    with open(args.path) as fh:
+        features = json.load(fh).get("features", [])
+
+    db = SessionLocal()
+    loaded = skipped = 0
+    try:
+        for feature in features:
+            name = (feature.get("properties") or {}).get(args.name_property)
+            geom = shape(feature["geometry"]) if feature.get("geometry") else None
+            if not name or geom is None or geom.geom_type not in ("Polygon", "MultiPolygon"):
+                skipped += 1
+                continue
+            if geom.geom_type == "Polygon":
+                geom = MultiPolygon([geom])
+            city = db.get(City, city_id_for_name(db, name))
+            city.boundary = from_shape(geom, srid=4326)
+            loaded += 1
+        if args.dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    print(f"{'matched' if args.dry_run else 'loaded'} {loaded} boundaries, skipped {skipped} features")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# scripts/load_test_uploads.py
+"""
+Latency of light requests while uploads are in flight.
+
+Runs --uploaders concurrent clients that keep posting a photo to the upload
+endpoint, alongside --probers clients that keep hitting /health and a read
+endpoint. Reports p50/p95/p99 per probe, first with no uploads (baseline) and
+then under upload load, plus the server's executor queue depths
+(/health/executors) sampled during the run.
+
+Duplicate detection rejects repeated photos with 409; that still exercises
+ingest, decode and the dedupe query, which is the blocking work under test.
+Pass --jitter to blend a random coarse pattern into the photo per request,
+which moves its pHash well past the duplicate threshold, so uploads take the
+full save/report path.
+
+Usage:
+    python -m scripts.load_test_uploads --token $TOKEN --image sample.jpg
+    python -m scripts.load_test_uploads --token $TOKEN --image sample.jpg \\
+        --uploaders 16 --duration 60 --read-path /api/litter_reports/
+"""
+import io
+import sys
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from collections import defaultdict
+
+import httpx
+import numpy as np
+from PIL import Image
+
+
+def percentiles(samples):
+    if not samples:
+        return "n/a"
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000.0, [50, 95, 99])
+    return f"n={len(samples):<6} p50={p50:8.1f}ms p95={p95:8.1f}ms p99={p99:8.1f}ms"
+
+
+def jittered(image_bytes: bytes) -> bytes:
+    # pHash keeps only the lowest 8x8 DCT frequencies, so scattered pixel noise
+    # leaves it unchanged; a random 8x8 pattern stretched over the image does not
+    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    cells = np.random.randint(0, 256, (8, 8, 3), dtype=np.uint8)
+    pattern = Image.fromarray(cells).resize(img.size, Image.NEAREST)
+    img = Image.blend(img, pattern, 0.5)
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=90)
+    return out.getvalue()
+
+
+async def probe(client, path, results, stop):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            r = await client.get(path)
+            ok = r.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        key = path if ok else f"{path} (error)"
+        results[key].append(time.perf_counter() - t0)
+
+
+async def uploader(client, args, image_bytes, results, stop):
+    url = f"/api/uploads/{uuid.uuid4()}/full"
+    while not stop.is_set():
+        data = jittered(image_bytes) if args.jitter else image_bytes
+        t0 = time.perf_counter()
+        try:
+            r = await client.post(
+                url,
+                files={"file": ("load.jpg", data, "image/jpeg")},
+                data={"latitude": str(args.lat + random.uniform(-0.01, 0.01)),
+                      "longitude": str(args.lng + random.uniform(-0.01, 0.01))},
+            )
+            status = r.status_code
+        except httpx.HTTPError:
+            status = "error"
+        results[f"upload {status}"].append(time.perf_counter() - t0)
+
+
+async def sample_executors(client, samples, stop):
+    while not stop.is_set():
+        try:
+            r = await client.get("/health/executors")
+            if r.status_code == 200:
+                samples.append(r.json())
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+
+
+async def run_phase(args, image_bytes, uploaders: int):
+    results = defaultdict(list)
+    executor_samples = []
+    stop = asyncio.Event()
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(max_connections=uploaders + 2 * args.probers + 2)
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=60.0, limits=limits) as client:
+        tasks = [asyncio.create_task(uploader(client, args, image_bytes, results, stop)) for _ in range(uploaders)]
+        for _ in range(args.probers):
+            tasks.append(asyncio.create_task(probe(client, "/health", results, stop)))
+            if args.read_path:
+                tasks.append(asyncio.create_task(probe(client, args.read_path, results, stop)))
+        tasks.append(asyncio.create_task(sample_executors(client, executor_samples, stop)))
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return results, executor_samples
+
+
+def report(title, results, executor_samples):
+    print(f"\n== {title}")
+    for key in sorted(results):
+        print(f"  {key:<40} {percentiles(results[key])}")
+    for name in sorted({n for s in executor_samples for n in s if isinstance(s.get(n), dict)}):
+        queued = [s[name]["queued"] for s in executor_samples if isinstance(s.get(name), dict)]
+        rejected = executor_samples[-1][name]["rejected"] if name in executor_samples[-1] else 0
+        print(f"  executor {name:<8} max queued={max(queued)} mean queued={np.mean(queued):.1f} rejected={rejected}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Probe latency under concurrent uploads")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", default=None, help="JWT for the upload endpoint")
+    parser.add_argument("--image", required=True, help="Photo to upload")
+    parser.add_argument("--uploaders", type=int, default=8)
+    parser.add_argument("--probers", type=int, default=2)
+    parser.add_argument("--read-path", default="/api/uploads/", help="Read endpoint to probe ('' to skip)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per phase")
+    parser.add_argument("--lat", type=float, default=27.7172)
+    parser.add_argument("--lng", type=float, default=85.3240)
+    parser.add_argument("--jitter", action="store_true", help="Overlay a random pattern on each upload so its pHash is not a duplicate")
+    args = parser.parse_args(argv)
+
+    with open(args.image, "rb") as fh:
+        image_bytes = fh.read()
+
+    baseline = asyncio.run(run_phase(args, image_bytes, uploaders=0))
+    report("baseline (no uploads)", *baseline)
+    loaded = asyncio.run(run_phase(args, image_bytes, uploaders=args.uploaders))
+    report(f"{args.uploaders} concurrent uploaders", *loaded)
+    if not any(k.startswith("upload 2") or k.startswith("upload 409") for k in loaded[0]):
+        print("\nNo upload succeeded or was deduped; check --token and the server log", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
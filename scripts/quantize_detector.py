@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# scripts/quantize_detector.py
+"""
+Produce an INT8 copy of the litter detector for MODEL_VARIANT=int8.
+
+  dynamic  weights quantized ahead of time, activations at runtime (no data needed)
+  static   weights + activations quantized (QDQ), calibrated on real photos from uploads/
+
+Usage:
+    python -m scripts.quantize_detector --mode dynamic
+    python -m scripts.quantize_detector --mode static --calib-dir uploads --calib-count 200
+"""
+import os
+import sys
+import glob
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from onnxruntime.quantization import (  # noqa: E402
+    CalibrationDataReader,
+    CalibrationMethod,
+    QuantFormat,
+    QuantType,
+    quantize_dynamic,
+    quantize_static,
+)
+from onnxruntime.quantization.shape_inference import quant_pre_process  # noqa: E402
+
+from api.litter_detections.litter_detections_service import (  # noqa: E402
+    MODEL_PATH,
+    INT8_MODEL_PATH,
+    prepare_detection_input,
+)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def find_images(root: str, limit: int, seed: int = 0):
+    paths = [
+        p for p in glob.glob(os.path.join(root, "**", "*"), recursive=True)
+        if p.lower().endswith(IMAGE_EXTENSIONS) and "thumbs" not in p
+    ]
+    random.Random(seed).shuffle(paths)
+    return paths[:limit]
+
+
+class UploadsCalibrationReader(CalibrationDataReader):
+    """Feeds letterboxed upload photos, preprocessed exactly like production inference."""
+
+    def __init__(self, image_paths, input_name: str, input_size: int = 640):
+        self.input_name = input_name
+        self.input_size = input_size
+        self._paths = iter(image_paths)
+
+    def get_next(self):
+        for path in self._paths:
+            with open(path, "rb") as fh:
+                data = fh.read()
+            try:
+                tensor, _ = prepare_detection_input(data, input_size=self.input_size)
+            except RuntimeError:
+                continue  # undecodable file
+            return {self.input_name: np.expand_dims(tensor, 0)}
+        return None
+
+
+def _input_name(model_path: str) -> str:
+    import onnx
+    model = onnx.load(model_path, load_external_data=False)
+    initializers = {i.name for i in model.graph.initializer}
+    return next(i.name for i in model.graph.input if i.name not in initializers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quantize the detector to INT8")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--output", default=INT8_MODEL_PATH)
+    parser.add_argument("--mode", choices=("dynamic", "static"), default="dynamic")
+    parser.add_argument("--calib-dir", default="uploads")
+    parser.add_argument("--calib-count", type=int, default=200)
+    parser.add_argument("--calib-method", choices=("minmax", "entropy", "percentile"), default="minmax")
+    parser.add_argument("--per-channel", action="store_true")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        print(f"Model not found at {args.model}")
+        sys.exit(1)
+
+    # Shape inference + graph cleanup makes quantization pick up more nodes
+    prepped = f"{os.path.splitext(args.output)[0]}.prep.onnx"
+    quant_pre_process(args.model, prepped, skip_symbolic_shape=False)
+
+    try:
+        if args.mode == "dynamic":
+            quantize_dynamic(
+                prepped,
+                args.output,
+                weight_type=QuantType.QUInt8,
+                per_channel=args.per_channel,
+            )
+        else:
+            images = find_images(args.calib_dir, args.calib_count)
+            if not images:
+                print(f"No calibration images found under {args.calib_dir}")
+                sys.exit(1)
+            print(f"Calibrating on {len(images)} images from {args.calib_dir}")
+            reader = UploadsCalibrationReader(images, _input_name(prepped))
+            quantize_static(
+                prepped,
+                args.output,
+                reader,
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                per_channel=args.per_channel,
+                calibrate_method={
+                    "minmax": CalibrationMethod.MinMax,
+                    "entropy": CalibrationMethod.Entropy,
+                    "percentile": CalibrationMethod.Percentile,
+                }[args.calib_method],
+            )
+    finally:
+        if os.path.exists(prepped):
+            os.remove(prepped)
+
+    src_mb = os.path.getsize(args.model) / 1e6
+    out_mb = os.path.getsize(args.output) / 1e6
+    print(f"Wrote {args.output} ({out_mb:.1f} MB, source {src_mb:.1f} MB)")
+    print("Run scripts/compare_model_variants.py before switching MODEL_VARIANT=int8.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# utils/ann_index.py
+"""
+FAISS index construction for report-embedding similarity search.
+
+The index type is chosen with settings.FAISS_INDEX_TYPE:
+  - "flat"     exact IndexFlatIP (O(N) per query, no training)
+  - "hnsw"     IndexHNSWFlat graph, no training, ~log(N) queries
+  - "ivf_flat" inverted lists over trained k-means centroids
+  - "ivf_pq"   inverted lists + product-quantized vectors (smallest memory)
+
+Every index is wrapped in IndexIDMap2 so ids stay report ids (faiss_id_map) regardless of type,
+and uses inner product (embeddings are L2-normalized, so IP == cosine).
+IVF indexes must be trained before use; see scripts/build_faiss_index.py.
+"""
+import logging
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+TRAINED_INDEX_TYPES = ("ivf_flat", "ivf_pq")
+
+# FAISS warns below ~39 training points per centroid
+_MIN_POINTS_PER_CENTROID = 39
+
+
+def requires_training(index_type: str) -> bool:
+    return index_type in TRAINED_INDEX_TYPES
+
+
+def effective_nlist(nlist: int, n_train: int) -> int:
+    """Shrink nlist so that every centroid gets enough training points."""
+    return max(1, min(nlist, n_train // _MIN_POINTS_PER_CENTROID))
+
+
+def create_index(dim: int, index_type: Optional[str] = None, nlist: Optional[int] = None) -> faiss.Index:
+    """Build an empty (untrained for IVF types) IDMap2-wrapped index."""
+    index_type = index_type or settings.FAISS_INDEX_TYPE
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type: {index_type}")
+
+    if index_type == "flat":
+        base = faiss.IndexFlatIP(dim)
+    elif index_type == "hnsw":
+        base = faiss.IndexHNSWFlat(dim, settings.FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        base.hnsw.efConstruction = settings.FAISS_HNSW_EF_CONSTRUCTION
+    else:
+        nlist = nlist or settings.FAISS_IVF_NLIST
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf_flat":
+            base = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            if dim % settings.FAISS_PQ_M:
+                raise ValueError(f"FAISS_PQ_M={settings.FAISS_PQ_M} must divide embedding dim {dim}")
+            base = faiss.IndexIVFPQ(
+                quantizer, dim, nlist, settings.FAISS_PQ_M, settings.FAISS_PQ_NBITS, faiss.METRIC_INNER_PRODUCT
+            )
+
+    return faiss.IndexIDMap2(base)
+
+
+def train_index(idx: faiss.Index, vectors: np.ndarray) -> None:
+    """Train IVF centroids / PQ codebooks on a sample of (normalized) vectors."""
+    if idx.is_trained:
+        return
+    if len(vectors) == 0:
+        raise ValueError("Cannot train a FAISS index without vectors")
+    idx.train(np.ascontiguousarray(vectors, dtype="float32"))
+
+
+def index_type_of(idx: faiss.Index) -> str:
+    """Name of the INDEX_TYPES entry an (IDMap-wrapped) index was built as."""
+    base = faiss.downcast_index(idx.index) if hasattr(idx, "index") else idx
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(base, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def configure_search(idx: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> faiss.Index:
+    """Apply query-time knobs (IVF nprobe, HNSW efSearch) from settings or overrides."""
+    base = faiss.downcast_index(idx.index) if hasattr(idx, "index") else idx
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = min(nprobe or settings.FAISS_IVF_NPROBE, base.nlist)
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = ef_search or settings.FAISS_HNSW_EF_SEARCH
+    return idx
+
+
+def codes_mmapped(index_type: str) -> bool:
+    """
+    Whether read_index_mmap maps the vectors/codes of `index_type` rather than
+    copying them onto the heap. IO_FLAG_MMAP only maps IVF inverted lists;
+    flat and HNSW codes are mapped only by FAISS builds with IO_FLAG_MMAP_IFC
+    (HNSW's graph links stay on the heap either way).
+    """
+    return requires_training(index_type) or hasattr(faiss, "IO_FLAG_MMAP_IFC")
+
+
+def read_index_mmap(path: str) -> faiss.Index:
+    """
+    Open a snapshot read-only with IVF inverted lists memory-mapped (and flat
+    code arrays where the installed FAISS supports IO_FLAG_MMAP_IFC), so those
+    pages are shared through the page cache by every process. See codes_mmapped.
+    """
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    flags |= getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    return faiss.read_index(path, flags)
+
+
+def enable_id_lookup(idx: faiss.Index) -> faiss.Index:
+    """Let IDMap2.reconstruct(id) work for IVF indexes (used to test id membership)."""
+    base = faiss.downcast_index(idx.index) if hasattr(idx, "index") else idx
+    if isinstance(base, faiss.IndexIVF) and base.is_trained:
+        base.make_direct_map()
+    return idx
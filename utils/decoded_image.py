@@ -0,0 +1,99 @@
+# utils/decoded_image.py
+"""
+Decode-once view of an uploaded photo.
+
+The upload route (pHash), the embedding model and the detector each used to
+decode the same bytes separately (PIL, PIL, cv2). A DecodedImage decodes at most
+twice, lazily, and shares each decode between its consumers:
+
+  - the detector reads a cv2 decode, at reduced JPEG resolution when the photo
+    is much larger than its input;
+  - pHash and the embedding read one full-resolution PIL decode, the same one
+    the stored fingerprints and embeddings were computed from. Hashing or
+    embedding the reduced decode would shift pHash bits and embeddings away
+    from the stored ones.
+
+    image = DecodedImage(img_bytes)
+    image.phash                     # imagehash.ImageHash, for dedupe
+    image.embedding_input           # (160, 160, 3) MobileNetV3 input
+    image.letterbox_into(buf, slot) # detector tensor in a LetterboxBuffer slot
+
+pHash and the embedding input are computed in stored orientation (EXIF
+ignored), as PIL's Image.open gives it; the detector sees the upright image,
+matching cv2.IMREAD_COLOR.
+"""
+from io import BytesIO
+from typing import Optional, Tuple
+
+import numpy as np
+import imagehash
+from PIL import Image
+
+from api.litter_detections.preprocessing import (
+    ImageBuffer,
+    ImageHeader,
+    LetterboxBuffer,
+    LetterboxMeta,
+    apply_exif_orientation,
+    decode_image,
+    letterbox_image,
+    oriented_size,
+    read_image_header,
+)
+from api.uploads.uploads_storage import map_upload_file
+
+DETECTION_INPUT_SIZE = 640
+
+
+class DecodedImage:
+    def __init__(self, data: ImageBuffer, target: int = DETECTION_INPUT_SIZE):
+        self._data = data
+        self._target = target
+        self.header: ImageHeader = read_image_header(data)
+        self._bgr: Optional[np.ndarray] = None
+        self._pil: Optional[Image.Image] = None
+        self._phash: Optional[imagehash.ImageHash] = None
+
+    @property
+    def bgr(self) -> np.ndarray:
+        """Detector pixels in stored orientation, possibly at reduced resolution."""
+        if self._bgr is None:
+            self._bgr, self.header = decode_image(self._data, self._target, self.header)
+        return self._bgr
+
+    @property
+    def pil(self) -> Image.Image:
+        """Full-resolution PIL decode, as the stored pHashes and embeddings used."""
+        if self._pil is None:
+            img = Image.open(BytesIO(self._data))
+            img.load()
+            self._pil = img
+        return self._pil
+
+    @property
+    def phash(self) -> imagehash.ImageHash:
+        if self._phash is None:
+            self._phash = imagehash.phash(self.pil)
+        return self._phash
+
+    @property
+    def embedding_input(self) -> np.ndarray:
+        """(160, 160, 3) array preprocessed for the MobileNetV3 embedding model."""
+        # imported here so pHash-only callers (the web app) never load the ML stack
+        from utils.embeddings import preprocess_pil_image
+        return preprocess_pil_image(self.pil)
+
+    @property
+    def original_size(self) -> Tuple[int, int]:
+        """Full-resolution (width, height) in upright orientation."""
+        _ = self.bgr  # decoding fills in header.size for formats PIL cannot parse
+        return oriented_size(self.header)
+
+    def letterbox_into(self, buffer: LetterboxBuffer, slot: int = 0) -> LetterboxMeta:
+        upright = apply_exif_orientation(self.bgr, self.header.orientation)
+        return letterbox_image(upright, self.original_size, buffer, slot)
+
+
+def phash_of_file(path: str) -> str:
+    """Hex pHash of an image file; a picklable entry point for utils.executors.run_cpu."""
+    return str(DecodedImage(map_upload_file(path)).phash)
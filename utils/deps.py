@@ -9,8 +9,8 @@ async def optional_pagination(request: Request) -> Optional[QueryParams]:
     """
     qp = request.query_params
     # decide which query keys you consider as "pagination requested"
-    pagination_keys = {"limit", "offset", "page", "per_page", "sort_by", "sort_order"}
-    if any(k in qp for k in ("limit", "offset")):  # require at least limit/offset
+    pagination_keys = {"limit", "offset", "page", "per_page", "sort_by", "sort_order", "cursor", "count"}
+    if any(k in qp for k in ("limit", "offset", "cursor")):  # require at least limit/offset/cursor
         # instantiate QueryParams from the query params dict (pydantic will coerce)
         try:
             return QueryParams(**qp)
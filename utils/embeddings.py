@@ -0,0 +1,193 @@
+# utils/embeddings.py
+"""
+Image-embedding (MobileNetV3Small) and FAISS helpers, split out of
+utils/geoutils.py so that importing the geo helpers no longer pulls in
+TensorFlow. The model (Keras, or its ONNX export when
+EMBEDDING_BACKEND=onnx) is built on the first load_embedding_model() call.
+"""
+import io
+import logging
+import threading
+import warnings
+from dataclasses import replace
+from typing import Dict, Optional
+from uuid import UUID
+
+import faiss
+import numpy as np
+from PIL import Image
+
+from config.settings import settings
+from config.database import PROJECT_ROOT, SessionLocal
+from utils.ann_index import create_index, index_type_of, requires_training
+from utils.faiss_writer import FaissWriter, SharedFaissIndex, get_or_create_faiss_id
+
+logger = logging.getLogger(__name__)
+
+EMBED_INPUT_SIZE = 160
+
+# Pooled output width of MobileNetV3Small(alpha=1.0); checked when the model loads,
+# fixed here so FAISS code can size indexes without building the model
+_EMB_DIM: int = 576
+
+_embedding_models: Dict[str, object] = {}
+_model_lock = threading.Lock()
+
+
+def _m3_preprocess(arr: np.ndarray) -> np.ndarray:
+    # keras.applications.mobilenet_v3.preprocess_input is a pass-through (the
+    # model rescales internally), so only the dtype changes here
+    return arr.astype(np.float32)
+
+
+# Per-process FAISS writer / mmap'd reader (see utils/faiss_writer.py)
+_faiss_writer: FaissWriter = None
+_faiss_index: SharedFaissIndex = None
+
+# Model loaders
+def _build_keras_model():
+    warnings.filterwarnings(
+        "ignore",
+        message="`input_shape` is undefined or non-square",
+        category=UserWarning,
+    )
+    from keras.applications import MobileNetV3Small
+    return MobileNetV3Small(
+        include_top=False,
+        pooling='avg',
+        weights='imagenet',
+        input_shape=(EMBED_INPUT_SIZE, EMBED_INPUT_SIZE, 3),  # reduce spatial dims
+        alpha=1.0,
+        minimalistic=False,
+    )
+
+
+class OnnxEmbedder:
+    """
+    onnxruntime-backed stand-in for the Keras model (same predict_on_batch /
+    output_shape surface), running the backbone exported by
+    scripts/export_embedding_onnx.py. No TensorFlow needed at runtime.
+    """
+
+    def __init__(self, model_path: str):
+        from api.litter_detections.ort_session import create_session, profile_from_settings
+        # the optimized-graph cache path is the detector's; don't share it
+        profile = replace(profile_from_settings(), optimized_model_path=None)
+        self.session = create_session(model_path, profile)
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_shape = tuple(self.session.get_outputs()[0].shape)
+
+    def predict_on_batch(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: np.asarray(batch, dtype=np.float32)})[0]
+
+
+def embedding_onnx_path() -> str:
+    return settings.EMBEDDING_ONNX_PATH or str(PROJECT_ROOT / "weights" / "mobilenetv3_embedding.onnx")
+
+
+def load_embedding_model(backend: Optional[str] = None):
+    """
+    Return the singleton embedding model for `backend` (default
+    settings.EMBEDDING_BACKEND): the Keras MobileNetV3Small, or an OnnxEmbedder
+    over its ONNX export. Either is built on first call; Keras/TensorFlow are
+    imported only then, so processes that never embed (the web app) never load them.
+    """
+    backend = backend or settings.EMBEDDING_BACKEND
+    model = _embedding_models.get(backend)
+    if model is None:
+        with _model_lock:
+            model = _embedding_models.get(backend)
+            if model is None:
+                if backend == "onnx":
+                    model = OnnxEmbedder(embedding_onnx_path())
+                else:
+                    model = _build_keras_model()
+                if model.output_shape[-1] != _EMB_DIM:
+                    raise RuntimeError(f"Embedding model outputs {model.output_shape[-1]} dims, expected {_EMB_DIM}")
+                _embedding_models[backend] = model
+    return model
+
+# FAISS index loader with dynamic dim
+def _empty_index(dim: int) -> faiss.Index:
+    """
+    Empty index of the configured type. IVF types need trained centroids, which only
+    the offline builder (scripts/build_faiss_index.py) produces, so until one has been
+    written we fall back to an exact flat index.
+    """
+    if requires_training(settings.FAISS_INDEX_TYPE):
+        logger.warning(
+            "FAISS_INDEX_TYPE=%s needs a trained index; run scripts/build_faiss_index.py. "
+            "Using a flat index until then.", settings.FAISS_INDEX_TYPE
+        )
+        return create_index(dim, "flat")
+    return create_index(dim)
+
+
+def get_faiss_writer(path: str = None) -> FaissWriter:
+    """Lazy-create the write-behind FAISS writer for `path`."""
+    global _faiss_writer
+    if path is None:
+        path = settings.FAISS_INDEX_PATH
+
+    if _faiss_writer is None:
+        _faiss_writer = FaissWriter(path, _EMB_DIM, _empty_index)
+    return _faiss_writer
+
+
+def load_faiss_index(path: str = None) -> SharedFaissIndex:
+    """
+    Return the shared, memory-mapped FAISS index (type per settings.FAISS_INDEX_TYPE).
+    Exposes .search(x, k) like a faiss.Index and picks up new snapshots and
+    logged adds from other processes on its own.
+    """
+    global _faiss_index
+    if path is None:
+        path = settings.FAISS_INDEX_PATH
+
+    if _faiss_index is None:
+        idx = SharedFaissIndex(path, _EMB_DIM, _empty_index)
+        if index_type_of(idx.snapshot) != settings.FAISS_INDEX_TYPE:
+            logger.warning(
+                "On-disk FAISS index is %s but FAISS_INDEX_TYPE=%s; rebuild with scripts/build_faiss_index.py",
+                index_type_of(idx.snapshot), settings.FAISS_INDEX_TYPE,
+            )
+        _faiss_index = idx
+
+    return _faiss_index
+
+# Indexing
+def index_embedding(report_id: UUID, emb: np.ndarray, path: str = None) -> None:
+    """
+    Durably add a normalized embedding under the report's stable FAISS id
+    (faiss_id_map). The vector is fsync'd to the append log before this
+    returns; the index file itself is only rewritten every
+    FAISS_SNAPSHOT_EVERY adds / FAISS_SNAPSHOT_INTERVAL_S seconds.
+    """
+    db = SessionLocal()
+    try:
+        faiss_id = get_or_create_faiss_id(db, report_id)
+    finally:
+        db.close()
+    get_faiss_writer(path).add(faiss_id, emb)
+
+# Image preprocessing
+def preprocess_image(img_data: bytes | io.BytesIO) -> np.ndarray:
+    """
+    Opens raw image bytes or file-like, resizes to 160x160 RGB,
+    applies MobileNetV3 preprocessing.
+    """
+    if isinstance(img_data, (bytes, bytearray)):
+        img_io = io.BytesIO(img_data)
+    else:
+        img_io = img_data
+
+    img = Image.open(img_io).resize((EMBED_INPUT_SIZE, EMBED_INPUT_SIZE)).convert("RGB")
+    return _m3_preprocess(np.array(img))
+
+def preprocess_pil_image(img: Image.Image) -> np.ndarray:
+    """
+    Same as preprocess_image, for an image that is already decoded
+    (see utils.decoded_image.DecodedImage).
+    """
+    arr = np.array(img.resize((EMBED_INPUT_SIZE, EMBED_INPUT_SIZE)).convert("RGB"))
+    return _m3_preprocess(arr)
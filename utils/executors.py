@@ -0,0 +1,146 @@
+# utils/executors.py
+"""
+Bounded executors for blocking work called from async endpoints.
+
+Sync SQLAlchemy calls, file writes, image decoding and subprocesses block the
+event loop when called directly from `async def` routes, stalling every other
+request on the worker. Route them through one of two pools instead:
+
+    await run_io(create_upload_controller, file=file, db=db, ...)   # DB / disk / ffmpeg
+    await run_cpu(phash_of_file, str(path))                         # decode / pHash
+
+Each pool has a fixed number of workers and a bounded backlog: once
+`max_workers + max_queue` tasks are in flight, further submissions raise
+ExecutorSaturated (served as 503 by main.py) instead of queueing without limit.
+`executor_stats()` reports queue depth and counters per pool.
+
+The cpu pool is a thread pool by default (OpenCV, PIL and numpy release the
+GIL in their hot loops); EXECUTOR_CPU_KIND=process uses worker processes,
+in which case submitted functions and arguments must be picklable.
+"""
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturated(Exception):
+    def __init__(self, name: str):
+        super().__init__(f"{name} executor is saturated")
+        self.name = name
+
+
+class BoundedExecutor:
+    def __init__(self, name: str, max_workers: int, max_queue: int, kind: str = "thread"):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._peak_queued = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_s = 0.0
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.kind == "process":
+                        self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._pool = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix=f"{self.name}-pool"
+                        )
+        return self._pool
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturated(self.name)
+            self._in_flight += 1
+            self._submitted += 1
+            self._peak_queued = max(self._peak_queued, self._in_flight - self.max_workers)
+
+    def _release(self, ok: bool, elapsed: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._wait_s += elapsed
+            if ok:
+                self._completed += 1
+            else:
+                self._failed += 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool and await its result."""
+        self._acquire()
+        start = time.perf_counter()
+        ok = False
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_pool(), partial(fn, *args, **kwargs))
+            ok = True
+            return result
+        finally:
+            self._release(ok, time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            done = self._completed + self._failed
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "running": min(self._in_flight, self.max_workers),
+                "queued": max(0, self._in_flight - self.max_workers),
+                "peak_queued": self._peak_queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_task_ms": round(1000.0 * self._wait_s / done, 2) if done else None,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+io_executor = BoundedExecutor(
+    "io", settings.EXECUTOR_IO_WORKERS, settings.EXECUTOR_MAX_QUEUE,
+)
+cpu_executor = BoundedExecutor(
+    "cpu", settings.EXECUTOR_CPU_WORKERS, settings.EXECUTOR_MAX_QUEUE, kind=settings.EXECUTOR_CPU_KIND,
+)
+
+
+async def run_io(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    return await io_executor.run(fn, *args, **kwargs)
+
+
+async def run_cpu(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    return await cpu_executor.run(fn, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    return {ex.name: ex.stats() for ex in (io_executor, cpu_executor)}
+
+
+def shutdown_executors() -> None:
+    for ex in (io_executor, cpu_executor):
+        ex.shutdown()
@@ -0,0 +1,387 @@
+# utils/faiss_writer.py
+"""
+Write-behind, crash-safe persistence for the FAISS embedding index, and a
+memory-mapped reader that every process shares.
+
+Files, next to settings.FAISS_INDEX_PATH (`<index>`):
+  <index>       last snapshot (written to a temp file, fsync'd, renamed)
+  <index>.log   append-only, fixed-size, CRC-checked embedding records
+  <index>.gen   generation counter, bumped whenever a new snapshot is published
+  <index>.lock  flock serializing appends and snapshots across processes
+
+FaissWriter.add only appends (and fsyncs) one record. Every
+FAISS_SNAPSHOT_EVERY records, or when the snapshot is older than
+FAISS_SNAPSHOT_INTERVAL_S, the adding process compacts: loads the snapshot,
+replays the log onto it (skipping ids already present and a torn tail left by
+a crash), publishes the result and truncates the log. No process keeps a
+private heap copy of the index between compactions.
+
+SharedFaissIndex serves searches (utils.embeddings.load_faiss_index) from
+the snapshot plus a small in-heap delta built from the log tail, and swaps to
+a new generation without a restart. The snapshot is opened with IO_FLAG_MMAP:
+IVF inverted lists are then shared through the page cache by every process.
+Flat and HNSW codes are shared only on FAISS builds with IO_FLAG_MMAP_IFC;
+elsewhere each reading process holds its own heap copy (utils.ann_index.
+codes_mmapped), which is logged when the index is opened.
+
+Report UUIDs are mapped to int64 FAISS ids through the `faiss_id_map` table.
+"""
+import os
+import time
+import fcntl
+import struct
+import logging
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+import faiss
+import numpy as np
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from api.litter_reports.faiss_id_map_model import FaissIdMap
+from config.settings import settings
+from utils.ann_index import (
+    codes_mmapped,
+    configure_search,
+    create_index,
+    enable_id_lookup,
+    index_type_of,
+    read_index_mmap,
+)
+
+logger = logging.getLogger(__name__)
+
+_RECORD_MAGIC = b"FEMB"
+_HEADER = struct.Struct("<4sqI")  # magic, faiss id, crc32 of the vector bytes
+
+
+# ─── UUID → int64 id mapping ────────────────────────────────────────────────
+
+def get_or_create_faiss_id(db: Session, report_id: UUID) -> int:
+    """Stable FAISS id for a report, allocating one on first use."""
+    db.execute(
+        pg_insert(FaissIdMap)
+        .values(report_id=report_id)
+        .on_conflict_do_nothing(index_elements=[FaissIdMap.report_id])
+    )
+    faiss_id = db.query(FaissIdMap.faiss_id).filter(FaissIdMap.report_id == report_id).scalar()
+    db.commit()
+    return int(faiss_id)
+
+
+def report_ids_for_faiss_ids(db: Session, faiss_ids: Iterable[int]) -> Dict[int, UUID]:
+    """Map FAISS search results back to report UUIDs (missing / -1 ids are dropped)."""
+    wanted = [int(i) for i in faiss_ids if i >= 0]
+    if not wanted:
+        return {}
+    rows = db.query(FaissIdMap.faiss_id, FaissIdMap.report_id).filter(FaissIdMap.faiss_id.in_(wanted)).all()
+    return {faiss_id: report_id for faiss_id, report_id in rows}
+
+
+# ─── on-disk helpers ────────────────────────────────────────────────────────
+
+@contextmanager
+def index_file_lock(path: str):
+    """Exclusive cross-process lock guarding `<path>`, its log and generation file."""
+    with open(f"{path}.lock", "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def read_generation(path: str) -> int:
+    try:
+        with open(f"{path}.gen") as fh:
+            return int(fh.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _fsync_dir(path: str) -> None:
+    dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def publish_snapshot(idx: faiss.Index, path: str) -> int:
+    """
+    Atomically replace the snapshot at `path` and bump its generation.
+    Caller holds index_file_lock(path). Returns the new generation.
+    """
+    tmp = f"{path}.tmp.{os.getpid()}"
+    faiss.write_index(idx, tmp)
+    with open(tmp, "rb") as fh:
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+    generation = read_generation(path) + 1
+    with open(f"{path}.gen.tmp", "w") as fh:
+        fh.write(str(generation))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(f"{path}.gen.tmp", f"{path}.gen")
+    _fsync_dir(path)
+    return generation
+
+
+def record_size(dim: int) -> int:
+    return _HEADER.size + dim * 4
+
+
+def read_log(log_path: str, dim: int, start: int = 0) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """
+    Parse log records from byte offset `start`.
+    Returns (ids, vectors, end_of_last_good_record, bytes_read_past_it); the last
+    value is non-zero when a torn / corrupt tail was found.
+    """
+    size = record_size(dim)
+    try:
+        with open(log_path, "rb") as fh:
+            fh.seek(start)
+            data = fh.read()
+    except FileNotFoundError:
+        data = b""
+
+    ids, vecs = [], []
+    good = 0
+    for off in range(0, len(data) - size + 1, size):
+        magic, faiss_id, crc = _HEADER.unpack_from(data, off)
+        payload = data[off + _HEADER.size: off + size]
+        if magic != _RECORD_MAGIC or zlib.crc32(payload) != crc:
+            break
+        ids.append(faiss_id)
+        vecs.append(np.frombuffer(payload, dtype=np.float32))
+        good = off + size
+
+    vectors = np.vstack(vecs) if vecs else np.empty((0, dim), dtype=np.float32)
+    return np.asarray(ids, dtype=np.int64), vectors, start + good, len(data) - good
+
+
+def _contains(idx: faiss.Index, faiss_id: int) -> bool:
+    try:
+        idx.reconstruct(int(faiss_id))
+        return True
+    except RuntimeError:
+        return False
+
+
+def _add_new(idx: faiss.Index, ids: np.ndarray, vectors: np.ndarray, check_existing: bool = True) -> int:
+    """Add records whose id is not yet in `idx` (first occurrence wins). Returns the count added."""
+    keep, seen = [], set()
+    for i, faiss_id in enumerate(ids.tolist()):
+        if faiss_id in seen or (check_existing and _contains(idx, faiss_id)):
+            continue
+        seen.add(faiss_id)
+        keep.append(i)
+    if keep:
+        idx.add_with_ids(vectors[keep], ids[keep])
+    return len(keep)
+
+
+# ─── writer ─────────────────────────────────────────────────────────────────
+
+class FaissWriter:
+    def __init__(
+        self,
+        path: str,
+        dim: int,
+        empty_index: Callable[[int], faiss.Index],
+        snapshot_every: Optional[int] = None,
+        snapshot_interval_s: Optional[float] = None,
+        fsync: Optional[bool] = None,
+    ):
+        self.path = path
+        self.log_path = f"{path}.log"
+        self.dim = dim
+        self._empty_index = empty_index
+        self.snapshot_every = snapshot_every or settings.FAISS_SNAPSHOT_EVERY
+        self.snapshot_interval_s = snapshot_interval_s or settings.FAISS_SNAPSHOT_INTERVAL_S
+        self.fsync = settings.FAISS_LOG_FSYNC if fsync is None else fsync
+        self._record_size = record_size(dim)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, index_file_lock(self.path):
+            yield
+
+    def _log_records(self) -> int:
+        try:
+            return os.path.getsize(self.log_path) // self._record_size
+        except FileNotFoundError:
+            return 0
+
+    def _snapshot_due(self) -> bool:
+        pending = self._log_records()
+        if not pending:
+            return False
+        # age is taken from the snapshot file, not process uptime: RQ runs each job
+        # in a short-lived forked work horse
+        try:
+            age = time.time() - os.path.getmtime(self.path)
+        except FileNotFoundError:
+            age = float("inf")
+        return pending >= self.snapshot_every or age >= self.snapshot_interval_s
+
+    def _load_snapshot(self) -> faiss.Index:
+        if os.path.exists(self.path):
+            idx = faiss.read_index(self.path)
+            if getattr(idx, "d", None) == self.dim:
+                return idx
+            logger.warning("FAISS snapshot %s has dim %s, expected %s; starting empty", self.path, idx.d, self.dim)
+        return self._empty_index(self.dim)
+
+    def add(self, faiss_id: int, emb: np.ndarray) -> None:
+        """Durably log one embedding; compacts into a new snapshot when one is due."""
+        payload = np.ascontiguousarray(emb, dtype=np.float32).reshape(self.dim).tobytes()
+        record = _HEADER.pack(_RECORD_MAGIC, faiss_id, zlib.crc32(payload)) + payload
+        with self._locked():
+            misaligned = os.path.getsize(self.log_path) % self._record_size if os.path.exists(self.log_path) else 0
+            if misaligned:
+                # torn tail from a crash mid-append; drop it so new records stay aligned
+                os.truncate(self.log_path, os.path.getsize(self.log_path) - misaligned)
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, record)
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            if self._snapshot_due():
+                self._compact()
+
+    def _compact(self) -> None:
+        idx = enable_id_lookup(self._load_snapshot())
+        ids, vectors, good_end, torn = read_log(self.log_path, self.dim)
+        if torn:
+            logger.warning("Discarding %d bytes of torn FAISS log tail", torn)
+        added = _add_new(idx, ids, vectors)
+        generation = publish_snapshot(idx, self.path)
+        # everything in the log is now in the snapshot
+        if os.path.exists(self.log_path):
+            os.truncate(self.log_path, 0)
+        logger.info(
+            "Wrote FAISS snapshot %s generation %d (+%d, ntotal=%d)", self.path, generation, added, idx.ntotal
+        )
+
+    def snapshot(self) -> None:
+        """Compact everything logged so far (e.g. at shutdown or from a scheduled job)."""
+        with self._locked():
+            if self._log_records():
+                self._compact()
+
+
+# ─── shared reader ──────────────────────────────────────────────────────────
+
+class SharedFaissIndex:
+    """
+    Read side: mmap'd snapshot + in-heap delta of not-yet-compacted log records.
+    Checks for a new generation / new log records at most every
+    FAISS_REFRESH_INTERVAL_S seconds.
+    """
+
+    def __init__(self, path: str, dim: int, empty_index: Callable[[int], faiss.Index]):
+        self.path = path
+        self.log_path = f"{path}.log"
+        self.d = dim
+        self._empty_index = empty_index
+        self._lock = threading.Lock()
+        self._generation = -1
+        self._snapshot: Optional[faiss.Index] = None
+        self._delta: Optional[faiss.Index] = None
+        self._log_pos = 0
+        self._checked_at = 0.0
+        self.refresh(force=True)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def snapshot(self) -> faiss.Index:
+        return self._snapshot
+
+    @property
+    def ntotal(self) -> int:
+        return self._snapshot.ntotal + self._delta.ntotal
+
+    def _open_snapshot(self) -> faiss.Index:
+        if os.path.exists(self.path):
+            idx = read_index_mmap(self.path)
+            if getattr(idx, "d", None) == self.d:
+                index_type = index_type_of(idx)
+                if not codes_mmapped(index_type):
+                    logger.info(
+                        "This FAISS build cannot mmap %s codes; %s is read into process memory",
+                        index_type, self.path,
+                    )
+                return configure_search(idx)
+        return self._empty_index(self.d)
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked_at < settings.FAISS_REFRESH_INTERVAL_S:
+            return
+        with self._lock:
+            self._checked_at = now
+            generation = read_generation(self.path)
+            try:
+                log_size = os.path.getsize(self.log_path)
+            except FileNotFoundError:
+                log_size = 0
+
+            if generation != self._generation or log_size < self._log_pos:
+                # hot swap: the previous mapping is released once no search holds it
+                self._snapshot = self._open_snapshot()
+                self._delta = create_index(self.d, "flat")
+                self._log_pos = 0
+                if self._generation >= 0:
+                    logger.info("FAISS index %s swapped to generation %d", self.path, generation)
+                self._generation = generation
+
+            if log_size > self._log_pos:
+                ids, vectors, self._log_pos, _ = read_log(self.log_path, self.d, self._log_pos)
+                if len(ids):
+                    # add to a copy so in-flight searches keep a consistent delta
+                    delta = faiss.clone_index(self._delta)
+                    _add_new(delta, ids, vectors, check_existing=False)
+                    self._delta = delta
+
+    def search(self, x: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """faiss.Index.search-compatible: (similarities, ids), both shaped (n, k)."""
+        self.refresh()
+        x = np.ascontiguousarray(x, dtype=np.float32).reshape(-1, self.d)
+        snapshot, delta = self._snapshot, self._delta
+        sims, ids = snapshot.search(x, k)
+        if not delta.ntotal:
+            return sims, ids
+
+        d_sims, d_ids = delta.search(x, k)
+        sims = np.concatenate([sims, d_sims], axis=1)
+        ids = np.concatenate([ids, d_ids], axis=1)
+        order = np.argsort(-sims, axis=1)
+        sims = np.take_along_axis(sims, order, axis=1)
+        ids = np.take_along_axis(ids, order, axis=1)
+        # after an offline rebuild a logged id can be in both the snapshot and the delta
+        out_sims = np.full((len(x), k), -np.finfo(np.float32).max, dtype=np.float32)
+        out_ids = np.full((len(x), k), -1, dtype=np.int64)
+        for row in range(len(x)):
+            seen = set()
+            col = 0
+            for sim, faiss_id in zip(sims[row], ids[row]):
+                if faiss_id < 0 or faiss_id in seen:
+                    continue
+                seen.add(faiss_id)
+                out_sims[row, col], out_ids[row, col] = sim, faiss_id
+                col += 1
+                if col == k:
+                    break
+        return out_sims, out_ids
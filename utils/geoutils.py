@@ -1,106 +1,19 @@
 # utils/geoutils.py
-from typing import List
+from typing import Dict, List
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import cast, func, text
 from api.user.user_model import User
-import numpy as np
 import datetime
-import faiss
-from PIL import Image
-import os
-import io
-import warnings
-from concurrent.futures import ThreadPoolExecutor
 from geoalchemy2 import Geography
-# Suppress any unwanted model warnings
-warnings.filterwarnings(
-    "ignore",
-    message="`input_shape` is undefined or non-square",
-    category=UserWarning,
-)
 
-# ThreadPool for controlled concurrency
-_executor = ThreadPoolExecutor(max_workers=2)
+# Plain `::geography` cast. Geography() would render geography(GEOMETRY,-1),
+# an expression the geom::geography GiST index does not match.
+GEOGRAPHY = Geography(geometry_type=None)
 
-# Eagerly load a lightweight vision model (MobileNetV3Small)
-from keras.applications import MobileNetV3Small
-from keras.applications.mobilenet_v3 import preprocess_input as m3_pre
-_embedding_model = MobileNetV3Small(
-    include_top=False,
-    pooling='avg',
-    weights='imagenet',
-    input_shape=(160, 160, 3),  # reduce spatial dims
-    alpha=1.0,
-    minimalistic=False,                  # shrink width
-)
-# Dynamically determine embedding dimension
-_EMB_DIM: int = _embedding_model.output_shape[-1]
 
-# Singleton for FAISS index
-_faiss_index: faiss.Index = None
+def as_geography(expr):
+    return cast(expr, GEOGRAPHY)
 
-# Model loader
-def load_embedding_model() -> MobileNetV3Small:
-    """Return the singleton embedding model."""
-    return _embedding_model
-
-# FAISS index loader with dynamic dim
-def load_faiss_index(path: str = None) -> faiss.Index:
-    """
-    Lazy-load (or create) an IndexFlatIP+IDMap2 FAISS index matching the
-    embedding dimension. Resets if on-disk index dims mismatch.
-    """
-    global _faiss_index
-    if path is None:
-        path = os.getenv('FAISS_INDEX_PATH', 'faiss.index')
-    dim = _EMB_DIM
-
-    if _faiss_index is None:
-        if os.path.exists(path):
-            idx = faiss.read_index(path)
-            if getattr(idx, 'd', None) != dim:
-                base = faiss.IndexFlatIP(dim)
-                idx = faiss.IndexIDMap2(base)
-                faiss.write_index(idx, path)
-        else:
-            base = faiss.IndexFlatIP(dim)
-            idx = faiss.IndexIDMap2(base)
-        _faiss_index = idx
-
-    return _faiss_index
-
-# Async indexing
-def index_embedding_async(report_id: int, emb: np.ndarray, path: str = None):
-    """
-    Adds a normalized embedding to the FAISS IDMap2 in background,
-    tagging it with report_id.
-    """
-    if path is None:
-        path = os.getenv('FAISS_INDEX_PATH', 'faiss.index')
-
-    def worker():
-        idx = load_faiss_index(path)
-        arr = emb.astype('float32').reshape(1, -1)
-        ids = np.array([report_id], dtype='int64')
-        idx.add_with_ids(arr, ids)
-        faiss.write_index(idx, path)
-
-    _executor.submit(worker)
-
-# Image preprocessing
-def preprocess_image(img_data: bytes | io.BytesIO) -> np.ndarray:
-    """
-    Opens raw image bytes or file-like, resizes to 224x224 RGB,
-    applies MobileNetV3 preprocess_input.
-    """
-    if isinstance(img_data, (bytes, bytearray)):
-        img_io = io.BytesIO(img_data)
-    else:
-        img_io = img_data
-
-    img = Image.open(img_io).resize((160, 160)).convert("RGB")
-    arr = np.array(img)
-    return m3_pre(arr)
 
 # Geospatial helpers
 def get_nearby_users(
@@ -149,10 +62,10 @@ def find_spatio_temporal(
     using PostGIS geography for true-meter distances.
     """
     # Create a POINT(lng, lat) in SRID 4326, then cast to Geography
-    point_geo = func.ST_SetSRID(
+    point_geo = as_geography(func.ST_SetSRID(
         func.ST_MakePoint(lng, lat),
         4326
-    ).cast(Geography())
+    ))
 
     start = ts - datetime.timedelta(seconds=window_s)
     end   = ts + datetime.timedelta(seconds=window_s)
@@ -161,12 +74,27 @@ def find_spatio_temporal(
         db.query(model.id)
           .filter(
               model.created_at.between(start, end),
-              # Cast stored geom column to Geography for meter-based ST_DWithin
+              # plain geom::geography, the expression ix_litter_reports_geom_geography indexes
               func.ST_DWithin(
-                  model.geom.cast(Geography()),
+                  as_geography(model.geom),
                   point_geo,
                   radius_m
               )
           )
     )
-    return [r.id for r in q.all()]
\ No newline at end of file
+    return [r.id for r in q.all()]
+
+# PostGIS detection (cached per database URL)
+_postgis_cache: Dict[str, bool] = {}
+
+
+def postgis_available(db: Session) -> bool:
+    """True when the session's database is PostgreSQL with the postgis extension installed."""
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _postgis_cache:
+        ok = False
+        if bind.dialect.name == "postgresql":
+            ok = db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")).first() is not None
+        _postgis_cache[key] = ok
+    return _postgis_cache[key]
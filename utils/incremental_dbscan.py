@@ -0,0 +1,477 @@
+# utils/incremental_dbscan.py
+"""
+Incrementally maintained DBSCAN clustering of litter reports.
+
+Replaces re-running sklearn DBSCAN over every report on each call. Points live
+in a uniform grid with cell size eps, so a neighbourhood query reads the 3x3
+cells around a point. Each point keeps its eps-neighbour count (itself
+included, as sklearn counts it), which decides core status.
+
+Inserting a point can only create cores and merge clusters: the new point and
+any neighbour whose count just reached min_pts become core, and the clusters of
+their core neighbours are merged into the largest one. Removing a point can
+only demote cores and split clusters: the remaining cores next to a lost core
+(the "frontier") are checked for connectivity — first among themselves, then by
+a BFS over core points that stops as soon as every frontier core is reached —
+and only a real split relabels the smaller parts. Either way the work is
+bounded by the affected neighbourhood (or, for a split, the affected cluster),
+never the whole table.
+
+Cluster ids are stable: merges keep the id of the largest cluster, splits keep
+it on the largest part, and a full load re-adopts the ids the reports were
+grouped under before (litter_groups.cluster_id). Labels whose membership changed
+are tracked so reconcile_clusters can apply just the delta.
+
+Border points go to the first core cluster that reaches them, as in sklearn,
+so border assignment can differ from a fresh sklearn run; core points and
+noise match it exactly.
+"""
+import math
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pyproj
+from sklearn.cluster import DBSCAN
+from sklearn.neighbors import KDTree
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from api.litter_groups.litter_groups_model import LitterGroup
+from api.litter_reports.litter_reports_model import LitterReport
+from config.settings import settings
+from utils.partitioned_dbscan import partitioned_dbscan
+
+# groups created by reconcile_clusters carry the stable id (litter_groups.cluster_id)
+CLUSTER_GROUP_NAME = "Cluster {}"
+
+# re-read this far behind the sync watermark (created_at/updated_at are set
+# app-side, so a report can commit after a later one has been seen)
+SYNC_OVERLAP = timedelta(minutes=5)
+# frontier sizes up to this are checked with one pairwise-distance matrix
+FRONTIER_MATRIX_MAX = 2048
+
+_to3857 = pyproj.Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True)
+
+# position as clustered: geom (which update_litter_report moves on its own),
+# else latitude/longitude — the same point the PostGIS path clusters
+_REPORT_LAT = func.coalesce(func.ST_Y(LitterReport.geom), LitterReport.latitude).label("latitude")
+_REPORT_LNG = func.coalesce(func.ST_X(LitterReport.geom), LitterReport.longitude).label("longitude")
+# last insert or update; moves are picked up through updated_at
+_REPORT_CHANGED = func.coalesce(LitterReport.updated_at, LitterReport.created_at).label("changed_at")
+_SYNC_COLS = (LitterReport.id, _REPORT_LAT, _REPORT_LNG, LitterReport.severity, _REPORT_CHANGED)
+
+
+def project_to_3857(lats: Sequence[float], lngs: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized WGS84 -> Web Mercator (metres)."""
+    xs, ys = _to3857.transform(np.asarray(lngs, dtype=np.float64), np.asarray(lats, dtype=np.float64))
+    return np.asarray(xs), np.asarray(ys)
+
+
+class ClusterDelta(NamedTuple):
+    changed: Set[int]   # labels that exist and whose members changed
+    removed: Set[int]   # labels that no longer exist
+
+
+class IncrementalDBSCAN:
+    def __init__(self, eps: float, min_pts: int):
+        self.eps = float(eps)
+        self.min_pts = int(min_pts)
+        self._eps2 = self.eps * self.eps
+        self._reset()
+
+    def _reset(self) -> None:
+        self._xy: Dict[Hashable, Tuple[float, float]] = {}
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._count: Dict[Hashable, int] = {}
+        self._label: Dict[Hashable, int] = {}
+        self._members: Dict[int, Set[Hashable]] = {}
+        self._next_label = 0
+        self._dirty: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._xy)
+
+    # -- primitives -------------------------------------------------------------
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.eps), math.floor(y / self.eps)
+
+    def _neighbors(self, x: float, y: float) -> List[Hashable]:
+        """Points within eps of (x, y), including one at (x, y) itself."""
+        cx, cy = self._cell(x, y)
+        out = []
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                cell = self._cells.get((i, j))
+                if not cell:
+                    continue
+                for q in cell:
+                    qx, qy = self._xy[q]
+                    if (qx - x) * (qx - x) + (qy - y) * (qy - y) <= self._eps2:
+                        out.append(q)
+        return out
+
+    def _is_core(self, q: Hashable) -> bool:
+        return self._count.get(q, 0) >= self.min_pts
+
+    def _new_label(self) -> int:
+        label = self._next_label
+        self._next_label += 1
+        return label
+
+    def _set_label(self, q: Hashable, label: Optional[int]) -> None:
+        old = self._label.get(q)
+        if old == label:
+            return
+        if old is not None:
+            members = self._members[old]
+            members.discard(q)
+            if not members:
+                del self._members[old]
+            self._dirty.add(old)
+        if label is None:
+            del self._label[q]
+        else:
+            self._label[q] = label
+            self._members.setdefault(label, set()).add(q)
+            self._dirty.add(label)
+
+    def _merge(self, labels: Set[int]) -> int:
+        """Fold `labels` into the largest (oldest on ties); a new label if empty."""
+        if not labels:
+            return self._new_label()
+        survivor = max(labels, key=lambda l: (len(self._members.get(l, ())), -l))
+        for label in labels:
+            if label != survivor:
+                for q in list(self._members.get(label, ())):
+                    self._set_label(q, survivor)
+        return survivor
+
+    def _assign_border(self, q: Hashable) -> None:
+        """(Re)label a non-core point from its core neighbours, keeping a still-valid label."""
+        if q not in self._xy or self._is_core(q):
+            return
+        current = self._label.get(q)
+        fallback = None
+        for n in self._neighbors(*self._xy[q]):
+            if n != q and self._is_core(n):
+                if self._label.get(n) == current:
+                    return
+                if fallback is None:
+                    fallback = self._label.get(n)
+        self._set_label(q, fallback)
+
+    # -- mutation ---------------------------------------------------------------
+
+    def insert(self, pid: Hashable, x: float, y: float) -> None:
+        if pid in self._xy:
+            if self._xy[pid] == (x, y):
+                return
+            self.remove(pid)
+
+        self._xy[pid] = (x, y)
+        self._cells.setdefault(self._cell(x, y), set()).add(pid)
+        nbrs = self._neighbors(x, y)
+        self._count[pid] = len(nbrs)
+
+        new_cores = []
+        for q in nbrs:
+            if q != pid:
+                self._count[q] += 1
+                if self._count[q] == self.min_pts:
+                    new_cores.append(q)
+        if self._is_core(pid):
+            new_cores.append(pid)
+
+        for c in new_cores:
+            c_nbrs = nbrs if c == pid else self._neighbors(*self._xy[c])
+            labels = {self._label[q] for q in c_nbrs if q != c and q in self._label and self._is_core(q)}
+            target = self._merge(labels)
+            self._set_label(c, target)
+            for q in c_nbrs:
+                if q not in self._label and not self._is_core(q):
+                    self._set_label(q, target)
+
+        if pid not in self._label:
+            self._assign_border(pid)
+
+    def remove(self, pid: Hashable) -> None:
+        if pid not in self._xy:
+            return
+        x, y = self._xy[pid]
+        was_core = self._is_core(pid)
+        old_label = self._label.get(pid)
+
+        cell = self._cell(x, y)
+        self._cells[cell].discard(pid)
+        if not self._cells[cell]:
+            del self._cells[cell]
+        del self._xy[pid]
+        del self._count[pid]
+        self._set_label(pid, None)
+
+        nbrs = self._neighbors(x, y)
+        lost: Dict[Hashable, List[Hashable]] = {}   # lost core -> its remaining neighbours
+        if was_core:
+            lost[pid] = nbrs
+        for q in nbrs:
+            self._count[q] -= 1
+            if self._count[q] == self.min_pts - 1:
+                lost[q] = self._neighbors(*self._xy[q])
+        if not lost:
+            return  # a border or noise point left; no core changed
+
+        recheck: Set[Hashable] = set(nbrs)
+        frontier: Dict[int, Set[Hashable]] = defaultdict(set)
+        affected: Set[int] = set()
+        for d, d_nbrs in lost.items():
+            label = old_label if d == pid else self._label.get(d)
+            if label is not None:
+                affected.add(label)
+            if d != pid:
+                recheck.add(d)
+            recheck.update(d_nbrs)
+            for q in d_nbrs:
+                if q not in lost and self._is_core(q):
+                    frontier[self._label[q]].add(q)
+
+        for label in affected:
+            parts = self._split(frontier.get(label, set()))
+            if parts is None:
+                continue   # still connected
+            # dissolved (no cores left) or split: relabel cores, then every old member as a border
+            members = list(self._members.get(label, ()))
+            parts.sort(key=len, reverse=True)
+            for i, part in enumerate(parts):
+                target = label if i == 0 else self._new_label()
+                for q in part:
+                    self._set_label(q, target)
+            recheck.update(members)
+
+        for q in recheck:
+            self._assign_border(q)
+
+    def _frontier_connected(self, frontier: List[Hashable]) -> bool:
+        """Whether the frontier cores are connected by direct core-core edges alone."""
+        pts = np.array([self._xy[q] for q in frontier])
+        d2 = ((pts[:, None, :] - pts[None, :, :]) ** 2).sum(axis=2)
+        adj = d2 <= self._eps2
+        reached = adj[0].copy()
+        while True:
+            grown = adj[reached].any(axis=0)
+            if grown.sum() == reached.sum():
+                return bool(grown.all())
+            reached = grown
+
+    def _split(self, frontier: Set[Hashable]) -> Optional[List[Set[Hashable]]]:
+        """
+        None if the frontier cores are still one cluster, else its core components
+        (an empty list when the cluster lost all its cores).
+        """
+        if len(frontier) <= 1:
+            return None if frontier else []
+        ordered = list(frontier)
+        if len(ordered) <= FRONTIER_MATRIX_MAX and self._frontier_connected(ordered):
+            return None
+
+        remaining = set(ordered)
+        parts = []
+        first = True
+        while remaining:
+            start = remaining.pop()
+            seen = {start}
+            stack = [start]
+            while stack:
+                q = stack.pop()
+                for n in self._neighbors(*self._xy[q]):
+                    if n not in seen and self._is_core(n):
+                        seen.add(n)
+                        stack.append(n)
+                        remaining.discard(n)
+                if first and not remaining:
+                    return None   # every frontier core reached from the first one
+            parts.append(seen)
+            first = False
+        return parts
+
+    # -- bulk -------------------------------------------------------------------
+
+    def load(
+        self,
+        ids: Sequence[Hashable],
+        xs: np.ndarray,
+        ys: np.ndarray,
+        prior: Optional[Dict[Hashable, int]] = None,
+        workers: int = 0,
+        tile_m: Optional[float] = None,
+    ) -> None:
+        """
+        Replace the state with a full DBSCAN run: sklearn in-process, or with
+        `workers` > 0 tiled across a process pool (utils/partitioned_dbscan.py).
+        Clusters take the prior label most of their members had (largest
+        cluster first); the rest get fresh labels. Every label, old and new,
+        is marked dirty.
+        """
+        prior = prior or {}
+        self._reset()
+        if not len(ids):
+            self._dirty = set(prior.values())
+            self._next_label = max(prior.values(), default=-1) + 1
+            return
+
+        coords = np.column_stack((xs, ys))
+        if workers > 0:
+            counts, raw = partitioned_dbscan(coords, self.eps, self.min_pts, tile_m or 50 * self.eps, workers)
+        else:
+            counts = KDTree(coords).query_radius(coords, r=self.eps, count_only=True)
+            raw = DBSCAN(eps=self.eps, min_samples=self.min_pts).fit(coords).labels_
+
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for i, k in enumerate(raw.tolist()):
+            if k != -1:
+                groups[k].append(i)
+        self._next_label = max(prior.values(), default=-1) + 1
+        mapping: Dict[int, int] = {}
+        used: Set[int] = set()
+        for k, idx in sorted(groups.items(), key=lambda kv: len(kv[1]), reverse=True):
+            votes = Counter(prior[ids[i]] for i in idx if ids[i] in prior)
+            choice = next((label for label, _ in votes.most_common() if label not in used), None)
+            mapping[k] = choice if choice is not None else self._new_label()
+            used.add(mapping[k])
+
+        for i, pid in enumerate(ids):
+            x, y = float(xs[i]), float(ys[i])
+            self._xy[pid] = (x, y)
+            self._cells.setdefault(self._cell(x, y), set()).add(pid)
+            self._count[pid] = int(counts[i])
+            k = int(raw[i])
+            if k != -1:
+                label = mapping[k]
+                self._label[pid] = label
+                self._members.setdefault(label, set()).add(pid)
+        self._dirty = set(self._members) | set(prior.values())
+
+    # -- reads ------------------------------------------------------------------
+
+    def labels(self) -> Dict[Hashable, int]:
+        return dict(self._label)
+
+    def clusters(self, labels: Optional[Iterable[int]] = None) -> Dict[int, List[Hashable]]:
+        """Members per label (all labels, or just `labels` that still exist)."""
+        keys = self._members.keys() if labels is None else [l for l in labels if l in self._members]
+        return {label: list(self._members[label]) for label in keys}
+
+    def coords(self, ids: Iterable[Hashable]) -> np.ndarray:
+        return np.array([self._xy[q] for q in ids], dtype=np.float64).reshape(-1, 2)
+
+    def is_core(self, pid: Hashable) -> bool:
+        return self._is_core(pid)
+
+    def take_delta(self) -> ClusterDelta:
+        """Labels changed/removed since the last call."""
+        dirty, self._dirty = self._dirty, set()
+        return ClusterDelta(
+            changed={l for l in dirty if l in self._members},
+            removed={l for l in dirty if l not in self._members},
+        )
+
+    def restore_delta(self, delta: ClusterDelta) -> None:
+        """Put a taken delta back (the caller failed to apply it)."""
+        self._dirty |= delta.changed | delta.removed
+
+
+class ReportClusterIndex(IncrementalDBSCAN):
+    """IncrementalDBSCAN over litter_reports (EPSG:3857 metres), kept in sync with the table."""
+
+    def __init__(self, eps: float, min_pts: int):
+        super().__init__(eps, min_pts)
+        self.lock = threading.RLock()
+        self.severity: Dict[Hashable, Optional[str]] = {}
+        self._latlng: Dict[Hashable, Tuple[float, float]] = {}
+        self._watermark: Optional[datetime] = None
+        self._loaded = False
+
+    def _insert_rows(self, rows) -> None:
+        if not rows:
+            return
+        xs, ys = project_to_3857([r.latitude for r in rows], [r.longitude for r in rows])
+        for r, x, y in zip(rows, xs.tolist(), ys.tolist()):
+            self.severity[r.id] = r.severity
+            self._latlng[r.id] = (r.latitude, r.longitude)
+            self.insert(r.id, x, y)
+
+    def _remove_ids(self, ids: Iterable[Hashable]) -> None:
+        for pid in ids:
+            self.remove(pid)
+            self.severity.pop(pid, None)
+            self._latlng.pop(pid, None)
+
+    def _advance(self, rows) -> None:
+        for r in rows:
+            if r.changed_at is not None and (self._watermark is None or r.changed_at > self._watermark):
+                self._watermark = r.changed_at
+
+    def _load_all(self, db: Session) -> int:
+        rows = db.execute(
+            select(*_SYNC_COLS, LitterGroup.cluster_id)
+            .outerjoin(LitterGroup, LitterGroup.id == LitterReport.group_id)
+        ).all()
+        prior = {r.id: r.cluster_id for r in rows if r.cluster_id is not None}
+        ids = [r.id for r in rows]
+        xs, ys = project_to_3857([r.latitude for r in rows], [r.longitude for r in rows])
+        workers = settings.CLUSTER_PARTITION_WORKERS if len(ids) >= settings.CLUSTER_PARTITION_MIN_POINTS else 0
+        self.load(ids, xs, ys, prior, workers=workers, tile_m=settings.CLUSTER_PARTITION_TILE_KM * 1000.0)
+        self.severity = {r.id: r.severity for r in rows}
+        self._latlng = {r.id: (r.latitude, r.longitude) for r in rows}
+        self._advance(rows)
+        self._loaded = True
+        return len(rows)
+
+    def sync(self, db: Session, full: bool = False) -> int:
+        """
+        Apply reports added, moved or deleted since the last sync (a full load
+        on the first call, or with `full`). Added and moved reports are those
+        whose created_at or updated_at passed the watermark. Returns rows read.
+        """
+        with self.lock:
+            if full or not self._loaded:
+                return self._load_all(db)
+
+            stmt = select(*_SYNC_COLS)
+            if self._watermark is not None:
+                since = self._watermark - SYNC_OVERLAP
+                stmt = stmt.where(or_(LitterReport.updated_at >= since, LitterReport.created_at >= since))
+            rows = db.execute(stmt).all()
+            self._insert_rows([r for r in rows if self._latlng.get(r.id) != (r.latitude, r.longitude)])
+            for r in rows:
+                self.severity[r.id] = r.severity
+            self._advance(rows)
+
+            # deletions, and inserts the watermark missed, show up as a count mismatch
+            total = db.execute(select(func.count(LitterReport.id))).scalar() or 0
+            if total != len(self):
+                current = set(db.execute(select(LitterReport.id)).scalars())
+                known = set(self._xy)
+                self._remove_ids(known - current)
+                missing = list(current - known)
+                for i in range(0, len(missing), 1000):
+                    extra = db.execute(select(*_SYNC_COLS).where(LitterReport.id.in_(missing[i:i + 1000]))).all()
+                    self._insert_rows(extra)
+                    rows += extra
+            return len(rows)
+
+
+_indexes: Dict[Tuple[float, int], ReportClusterIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_report_cluster_index(eps: float, min_pts: int) -> ReportClusterIndex:
+    """Process-wide clusterer per (eps, min_pts)."""
+    key = (float(eps), int(min_pts))
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = ReportClusterIndex(*key)
+        return _indexes[key]
@@ -0,0 +1,184 @@
+# utils/partitioned_dbscan.py
+"""
+DBSCAN over square tiles in parallel, stitched into one global clustering.
+
+Points (metres, EPSG:3857) are cut into tile_m x tile_m tiles, which is a
+geohash prefix in metric form. Each tile is handed to a worker process with
+every point within 2·eps of it:
+
+  - points within eps of the tile get exact neighbour counts, because their
+    whole eps-neighbourhood is in the buffer; so the core status of every
+    point that can share an edge with a point owned by the tile is exact.
+  - cores within eps of the tile are grouped into connected components
+    (core-core distance <= eps).
+  - owned non-core points take the component of their nearest core within eps.
+
+The eps-wide ring of cores around a tile is seen by its neighbours too, and
+those shared cores glue per-tile components into global clusters. Core points
+and noise come out exactly as a single-process DBSCAN; border points go to
+their nearest core's cluster.
+
+Workers import only numpy/scipy/sklearn, so the pool can use "spawn" safely
+from inside the API process.
+"""
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.neighbors import KDTree
+
+
+class PartitionedResult(NamedTuple):
+    counts: np.ndarray   # eps-neighbour count per point (self included)
+    labels: np.ndarray   # cluster label per point, -1 for noise
+
+
+class _TileResult(NamedTuple):
+    owned: np.ndarray          # global indices owned by the tile
+    owned_counts: np.ndarray
+    cores: np.ndarray          # global indices of cores within eps of the tile
+    core_comp: np.ndarray      # local component of each of `cores`
+    borders: np.ndarray        # owned non-core global indices with a core within eps
+    border_comp: np.ndarray
+    n_comp: int
+
+
+def _components(points: np.ndarray, eps: float) -> Tuple[int, np.ndarray]:
+    tree = KDTree(points)
+    nbrs = tree.query_radius(points, r=eps)
+    rows = np.repeat(np.arange(len(points)), [len(n) for n in nbrs])
+    cols = np.concatenate(nbrs) if len(nbrs) else np.empty(0, dtype=np.intp)
+    graph = coo_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(len(points),) * 2)
+    return connected_components(graph, directed=False)
+
+
+def _cluster_tile(args) -> _TileResult:
+    index, coords, owned_mask, inner_mask, eps, min_pts = args
+    inner = np.flatnonzero(inner_mask)
+    counts = np.zeros(len(coords), dtype=np.int64)
+    if len(inner):
+        counts[inner] = KDTree(coords).query_radius(coords[inner], r=eps, count_only=True)
+    core_mask = inner_mask & (counts >= min_pts)
+    core_local = np.flatnonzero(core_mask)
+
+    n_comp, core_comp = 0, np.empty(0, dtype=np.int64)
+    borders, border_comp = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    if len(core_local):
+        n_comp, core_comp = _components(coords[core_local], eps)
+        candidates = np.flatnonzero(owned_mask & ~core_mask)
+        if len(candidates):
+            dist, nearest = KDTree(coords[core_local]).query(coords[candidates], k=1)
+            hit = dist[:, 0] <= eps
+            borders = index[candidates[hit]]
+            border_comp = core_comp[nearest[hit, 0]]
+
+    owned = np.flatnonzero(owned_mask)
+    return _TileResult(
+        owned=index[owned],
+        owned_counts=counts[owned],
+        cores=index[core_local],
+        core_comp=np.asarray(core_comp, dtype=np.int64),
+        borders=borders,
+        border_comp=np.asarray(border_comp, dtype=np.int64),
+        n_comp=int(n_comp),
+    )
+
+
+def _tile_jobs(coords: np.ndarray, eps: float, min_pts: int, tile_m: float) -> List[tuple]:
+    """(global index, coords, owned mask, inner mask, eps, min_pts) per non-empty tile."""
+    tx = np.floor(coords[:, 0] / tile_m).astype(np.int64)
+    ty = np.floor(coords[:, 1] / tile_m).astype(np.int64)
+    reach = 2 * eps
+
+    # every tile whose 2·eps-expanded square contains the point
+    pairs_t, pairs_i = [], []
+    idx = np.arange(len(coords))
+    lo_x = np.floor((coords[:, 0] - reach) / tile_m).astype(np.int64)
+    hi_x = np.floor((coords[:, 0] + reach) / tile_m).astype(np.int64)
+    lo_y = np.floor((coords[:, 1] - reach) / tile_m).astype(np.int64)
+    hi_y = np.floor((coords[:, 1] + reach) / tile_m).astype(np.int64)
+    span = int(math.ceil(2 * reach / tile_m)) + 1
+    for dx in range(span):
+        for dy in range(span):
+            cx, cy = lo_x + dx, lo_y + dy
+            ok = (cx <= hi_x) & (cy <= hi_y)
+            pairs_t.append(np.column_stack((cx[ok], cy[ok])))
+            pairs_i.append(idx[ok])
+    tiles = np.concatenate(pairs_t)
+    members = np.concatenate(pairs_i)
+
+    order = np.lexsort((tiles[:, 1], tiles[:, 0]))
+    tiles, members = tiles[order], members[order]
+    breaks = np.flatnonzero(np.any(np.diff(tiles, axis=0) != 0, axis=1)) + 1
+
+    jobs = []
+    for part_tiles, part in zip(np.split(tiles, breaks), np.split(members, breaks)):
+        cx, cy = int(part_tiles[0, 0]), int(part_tiles[0, 1])
+        owned = (tx[part] == cx) & (ty[part] == cy)
+        if not owned.any():
+            continue  # only buffer points; their owner tile handles them
+        pts = coords[part]
+        x0, y0 = cx * tile_m, cy * tile_m
+        inner = ((pts[:, 0] >= x0 - eps) & (pts[:, 0] < x0 + tile_m + eps)
+                 & (pts[:, 1] >= y0 - eps) & (pts[:, 1] < y0 + tile_m + eps))
+        jobs.append((part, pts, owned, inner, eps, min_pts))
+    return jobs
+
+
+def partitioned_dbscan(
+    coords: np.ndarray,
+    eps: float,
+    min_pts: int,
+    tile_m: float,
+    workers: Optional[int] = None,
+) -> PartitionedResult:
+    """DBSCAN of `coords` (n x 2, metres) across `workers` processes."""
+    n = len(coords)
+    if tile_m < 4 * eps:
+        raise ValueError("tile_m must be at least 4·eps")
+    jobs = _tile_jobs(coords, eps, min_pts, tile_m)
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        results = list(pool.map(_cluster_tile, jobs, chunksize=max(1, len(jobs) // (4 * (workers or 4)))))
+
+    # one node per (tile, local component); shared cores link nodes across tiles
+    offsets = np.cumsum([0] + [r.n_comp for r in results])
+    counts = np.zeros(n, dtype=np.int64)
+    owner_node = np.full(n, -1, dtype=np.int64)
+    for r, off in zip(results, offsets):
+        counts[r.owned] = r.owned_counts
+        owned_cores = np.isin(r.cores, r.owned, assume_unique=True)
+        owner_node[r.cores[owned_cores]] = r.core_comp[owned_cores] + off
+
+    edges_a, edges_b = [], []
+    for r, off in zip(results, offsets):
+        if len(r.cores):
+            edges_a.append(owner_node[r.cores])
+            edges_b.append(r.core_comp + off)
+    total_nodes = int(offsets[-1])
+    labels = np.full(n, -1, dtype=np.int64)
+    if not total_nodes:
+        return PartitionedResult(counts, labels)
+
+    a = np.concatenate(edges_a)
+    b = np.concatenate(edges_b)
+    graph = coo_matrix((np.ones(len(a), dtype=np.int8), (a, b)), shape=(total_nodes, total_nodes))
+    _, node_label = connected_components(graph, directed=False)
+
+    is_core = owner_node >= 0
+    labels[is_core] = node_label[owner_node[is_core]]
+    for r, off in zip(results, offsets):
+        if len(r.borders):
+            labels[r.borders] = node_label[r.border_comp + off]
+
+    # compact to 0..k-1 in order of first appearance, like sklearn
+    used = labels >= 0
+    _, first, inverse = np.unique(labels[used], return_index=True, return_inverse=True)
+    rank = np.argsort(np.argsort(first))
+    labels[used] = rank[inverse]
+    return PartitionedResult(counts, labels)
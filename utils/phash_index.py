@@ -0,0 +1,308 @@
+# utils/phash_index.py
+"""
+In-memory index of recent 64-bit perceptual hashes for upload dedupe.
+
+Replaces loading every fingerprint of the past week and comparing them one by
+one. Lookups use multi-index hashing: the 64 bits are split into `chunks`
+substrings, each with its own exact-match table. If two hashes differ in at
+most r bits, at least one substring differs in at most r // chunks bits
+(pigeonhole), so probing every table with all substring values within that
+radius finds a superset of the matches; candidates are then verified with a
+vectorized popcount. With 4×16-bit chunks and r = 8 that is 4 × 137 bucket
+probes instead of a scan.
+
+Small indexes, or radii too large for MIH to pay off, fall back to a single
+vectorized popcount over the whole uint64 array.
+
+Entries expire after `window_s`; `sync` pulls fingerprints committed by other
+processes since the last call, so every API worker sees every upload.
+
+find_phash_duplicates_sql does the same search inside Postgres, over the
+generated `phash_int` / `phash_b0..3` columns of image_fingerprints.
+"""
+import heapq
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from itertools import combinations
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+import imagehash
+import numpy as np
+from sqlalchemy import cast, func, or_, select
+from sqlalchemy.dialects.postgresql import BIT
+from sqlalchemy.orm import Session
+
+from api.litter_reports.image_fingerprints_model import ImageFingerprint
+from api.litter_reports.litter_reports_model import LitterReport
+
+PHASH_WINDOW = timedelta(days=7)
+
+# below this many live entries a linear popcount scan is as fast as probing
+LINEAR_SCAN_MAX = 4096
+# MIH probes grow combinatorially with the per-chunk radius
+MAX_CHUNK_RADIUS = 2
+# re-read this far behind the sync watermark: a fingerprint row can be committed
+# after a later report's created_at has already been seen
+SYNC_OVERLAP = timedelta(minutes=5)
+
+_EPOCH = datetime(1970, 1, 1)
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def phash_to_int(value: Union[imagehash.ImageHash, str, int]) -> int:
+    """64-bit integer form of a pHash (ImageHash, its hex string, or an int)."""
+    if isinstance(value, int):
+        return value
+    return int(str(value), 16)
+
+
+def popcount64(values: np.ndarray) -> np.ndarray:
+    """Per-element popcount of a uint64 array."""
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(values)
+    return _POPCOUNT8[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def phash_to_signed64(value) -> int:
+    """The pHash as Postgres stores it in `phash_int` (two's-complement bigint)."""
+    h = phash_to_int(value)
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def phash_bands(value) -> List[int]:
+    """The four 16-bit bands of a pHash, most significant first (phash_b0..phash_b3)."""
+    h = phash_to_int(value)
+    return [(h >> (48 - 16 * i)) & 0xFFFF for i in range(4)]
+
+
+def _epoch_seconds(ts: datetime) -> float:
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return (ts - _EPOCH).total_seconds()
+
+
+_FLIP_MASKS: Dict[Tuple[int, int], List[int]] = {}
+
+
+def _flip_masks(bits: int, radius: int) -> List[int]:
+    """All `bits`-wide masks with at most `radius` bits set."""
+    key = (bits, radius)
+    if key not in _FLIP_MASKS:
+        masks = [0]
+        for r in range(1, radius + 1):
+            for positions in combinations(range(bits), r):
+                masks.append(sum(1 << p for p in positions))
+        _FLIP_MASKS[key] = masks
+    return _FLIP_MASKS[key]
+
+
+class PHashIndex:
+    def __init__(self, window: timedelta = PHASH_WINDOW, chunks: int = 4, capacity: int = 1024):
+        if 64 % chunks:
+            raise ValueError("chunks must divide 64")
+        self.window_s = window.total_seconds()
+        self.chunks = chunks
+        self.chunk_bits = 64 // chunks
+        self._chunk_mask = (1 << self.chunk_bits) - 1
+
+        self._hashes = np.zeros(capacity, dtype=np.uint64)
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._ids: List[Optional[Hashable]] = [None] * capacity
+        self._high = 0                      # slots [0, _high) have been used
+        self._free: List[int] = []
+        self._slot_of: Dict[Hashable, int] = {}
+        self._buckets = [defaultdict(list) for _ in range(chunks)]
+        self._expiry: List[Tuple[float, int]] = []   # heap of (ts, slot)
+
+        self._lock = threading.RLock()
+        self._watermark: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    # -- mutation -------------------------------------------------------------
+
+    def _chunk_keys(self, h: int):
+        for c in range(self.chunks):
+            yield c, (h >> (c * self.chunk_bits)) & self._chunk_mask
+
+    def _grow(self) -> None:
+        cap = len(self._hashes) * 2
+        self._hashes = np.resize(self._hashes, cap)
+        self._ts = np.resize(self._ts, cap)
+        alive = np.zeros(cap, dtype=bool)
+        alive[: len(self._alive)] = self._alive
+        self._alive = alive
+        self._ids.extend([None] * (cap - len(self._ids)))
+
+    def add(self, report_id: Hashable, phash: Union[imagehash.ImageHash, str, int], created_at: datetime) -> None:
+        """Insert (or replace) a report's hash."""
+        h = phash_to_int(phash)
+        ts = _epoch_seconds(created_at)
+        with self._lock:
+            if report_id in self._slot_of:
+                self._remove_slot(self._slot_of[report_id])
+            if self._free:
+                slot = self._free.pop()
+            else:
+                if self._high == len(self._hashes):
+                    self._grow()
+                slot = self._high
+                self._high += 1
+            self._hashes[slot] = h
+            self._ts[slot] = ts
+            self._alive[slot] = True
+            self._ids[slot] = report_id
+            self._slot_of[report_id] = slot
+            for c, key in self._chunk_keys(h):
+                self._buckets[c][key].append(slot)
+            heapq.heappush(self._expiry, (ts, slot))
+
+    def _remove_slot(self, slot: int) -> None:
+        h = int(self._hashes[slot])
+        for c, key in self._chunk_keys(h):
+            bucket = self._buckets[c][key]
+            bucket.remove(slot)
+            if not bucket:
+                del self._buckets[c][key]
+        self._slot_of.pop(self._ids[slot], None)
+        self._alive[slot] = False
+        self._ids[slot] = None
+        self._free.append(slot)
+
+    def remove(self, report_id: Hashable) -> None:
+        with self._lock:
+            slot = self._slot_of.get(report_id)
+            if slot is not None:
+                self._remove_slot(slot)
+
+    def evict_expired(self, now: Optional[datetime] = None) -> int:
+        """Drop entries older than the window. Returns how many were evicted."""
+        cutoff = _epoch_seconds(now or datetime.utcnow()) - self.window_s
+        evicted = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] < cutoff:
+                ts, slot = heapq.heappop(self._expiry)
+                # skip heap entries for slots that were since reused or replaced
+                if self._alive[slot] and self._ts[slot] == ts:
+                    self._remove_slot(slot)
+                    evicted += 1
+        return evicted
+
+    # -- queries --------------------------------------------------------------
+
+    def _verify(self, slots: np.ndarray, h: int, max_distance: int, cutoff: float) -> List[Hashable]:
+        dist = popcount64(self._hashes[slots] ^ np.uint64(h))
+        keep = slots[(dist <= max_distance) & self._alive[slots] & (self._ts[slots] >= cutoff)]
+        return [self._ids[s] for s in keep.tolist()]
+
+    def query_linear(self, phash, max_distance: int, now: Optional[datetime] = None) -> List[Hashable]:
+        """All live report ids within `max_distance` bits, by one vectorized popcount scan."""
+        h = phash_to_int(phash)
+        cutoff = _epoch_seconds(now or datetime.utcnow()) - self.window_s
+        with self._lock:
+            return self._verify(np.arange(self._high), h, max_distance, cutoff)
+
+    def query(self, phash, max_distance: int, now: Optional[datetime] = None) -> List[Hashable]:
+        """All live report ids within `max_distance` bits of `phash`."""
+        chunk_radius = max_distance // self.chunks
+        if len(self) <= LINEAR_SCAN_MAX or chunk_radius > MAX_CHUNK_RADIUS:
+            return self.query_linear(phash, max_distance, now)
+
+        h = phash_to_int(phash)
+        cutoff = _epoch_seconds(now or datetime.utcnow()) - self.window_s
+        masks = _flip_masks(self.chunk_bits, chunk_radius)
+        with self._lock:
+            candidates = set()
+            for c, key in self._chunk_keys(h):
+                buckets = self._buckets[c]
+                for mask in masks:
+                    bucket = buckets.get(key ^ mask)
+                    if bucket:
+                        candidates.update(bucket)
+            if not candidates:
+                return []
+            return self._verify(np.fromiter(candidates, dtype=np.int64, count=len(candidates)), h, max_distance, cutoff)
+
+    # -- database sync ----------------------------------------------------------
+
+    def sync(self, db: Session, now: Optional[datetime] = None) -> int:
+        """
+        Load fingerprints of reports created since the last sync (the whole
+        window on first call) and evict expired ones. Returns rows loaded.
+        """
+        now = now or datetime.utcnow()
+        with self._lock:
+            since = now - PHASH_WINDOW if self._watermark is None else self._watermark - SYNC_OVERLAP
+            since = max(since, now - timedelta(seconds=self.window_s))
+            rows = db.execute(
+                select(ImageFingerprint.report_id, ImageFingerprint.phash, LitterReport.created_at)
+                .join(LitterReport, ImageFingerprint.report_id == LitterReport.id)
+                .where(LitterReport.created_at >= since)
+            ).fetchall()
+            for report_id, phash_hex, created_at in rows:
+                slot = self._slot_of.get(report_id)
+                if slot is None or int(self._hashes[slot]) != phash_to_int(phash_hex):
+                    self.add(report_id, phash_hex, created_at)
+                if self._watermark is None or created_at > self._watermark:
+                    self._watermark = created_at
+            if self._watermark is None:
+                self._watermark = since
+            self.evict_expired(now)
+        return len(rows)
+
+
+def find_phash_duplicates_sql(
+    db: Session,
+    phash,
+    max_distance: int,
+    since: datetime,
+    report_ids: Optional[List[Hashable]] = None,
+) -> List[Hashable]:
+    """
+    Report ids created since `since` whose pHash is within `max_distance` bits,
+    computed in Postgres as bit_count(phash_int XOR q) (PostgreSQL 14+).
+
+    When max_distance // 4 <= MAX_CHUNK_RADIUS, rows must also match one of the
+    16-bit bands within that radius (pigeonhole, so nothing is lost); each band
+    column is indexed, so Postgres can bitmap-OR a few hundred index probes
+    instead of reading the whole window. `report_ids` optionally restricts the
+    search to a pre-filtered candidate set.
+    """
+    q = phash_to_signed64(phash)
+    distance = func.bit_count(cast(ImageFingerprint.phash_int.op("#")(q), BIT(64)))
+    stmt = (
+        select(ImageFingerprint.report_id)
+        .join(LitterReport, ImageFingerprint.report_id == LitterReport.id)
+        .where(LitterReport.created_at >= since, distance <= max_distance)
+    )
+    if report_ids is not None:
+        if not report_ids:
+            return []
+        stmt = stmt.where(ImageFingerprint.report_id.in_(report_ids))
+
+    band_radius = max_distance // 4
+    if band_radius <= MAX_CHUNK_RADIUS:
+        masks = _flip_masks(16, band_radius)
+        columns = (ImageFingerprint.phash_b0, ImageFingerprint.phash_b1,
+                   ImageFingerprint.phash_b2, ImageFingerprint.phash_b3)
+        stmt = stmt.where(or_(*(
+            column.in_([band ^ m for m in masks]) for column, band in zip(columns, phash_bands(phash))
+        )))
+    return [rid for (rid,) in db.execute(stmt)]
+
+
+_index: Optional[PHashIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_phash_index() -> PHashIndex:
+    """Process-wide pHash index singleton."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = PHashIndex()
+    return _index
@@ -1,20 +1,204 @@
 # utils/query_params.py
 
-from typing import Generic, Type, TypeVar, Optional
-from fastapi import Query
-from sqlalchemy import asc, desc
-from sqlalchemy.orm import Query as SAQuery
+import json
+import time
+import base64
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Generic, Optional, Sequence, Tuple, Type, TypeVar, Union
+from fastapi import HTTPException, Query
+from sqlalchemy import asc, desc, func, select, text, tuple_, Select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query as SAQuery, Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
 ModelT = TypeVar("ModelT")
 
+# keyset pagination walks (created_at, id); both must exist on the model.
+# Rows with a NULL created_at have no place in that order and are left out
+KEYSET_COLUMN = "created_at"
+
+COUNT_MODES = ("exact", "estimated", "none")
+# how long an "estimated" (cached exact) count is reused
+COUNT_CACHE_TTL_S = 60
+# distinct count queries kept (keys include filter values such as search strings)
+COUNT_CACHE_MAX_ENTRIES = 1024
+
+
+# ─── Cursors ───────────────────────────────────────────────────────────────────
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+    """Opaque cursor for the row after which the next page starts."""
+    raw = json.dumps([created_at.isoformat(), str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, model: Type[ModelT]) -> Tuple[datetime, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, row_id = json.loads(raw)
+        id_type = model.id.type.python_type
+        return datetime.fromisoformat(ts), id_type(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def apply_keyset(
+    query: Union[SAQuery, Select],
+    model: Type[ModelT],
+    cursor: Optional[str],
+    limit: Optional[int],
+    descending: bool = True,
+) -> Union[SAQuery, Select]:
+    """
+    ORDER BY (created_at, id) and, past the first page, WHERE (created_at, id)
+    is beyond the cursor — an index range scan instead of skipping OFFSET rows.
+    """
+    ts_col, id_col = getattr(model, KEYSET_COLUMN), model.id
+    query = query.where(ts_col.isnot(None))
+    if cursor:
+        ts, row_id = decode_cursor(cursor, model)
+        key = tuple_(ts_col, id_col)
+        query = query.where(key < tuple_(ts, row_id) if descending else key > tuple_(ts, row_id))
+    order = desc if descending else asc
+    query = query.order_by(order(ts_col), order(id_col))
+    return query.limit(limit) if limit is not None else query
+
+
+def next_cursor(items: Sequence[Any], limit: Optional[int]) -> Optional[str]:
+    """Cursor for the page after `items`, or None when this was the last page."""
+    if not items or limit is None or len(items) < limit:
+        return None
+    last = items[-1]
+    created_at = getattr(last, KEYSET_COLUMN)
+    if created_at is None:  # not paged through apply_keyset
+        return None
+    return encode_cursor(created_at, last.id)
+
+
+# ─── Counts ────────────────────────────────────────────────────────────────────
+
+# LRU of (stored at, value); expired entries are dropped when met or evicted
+_count_cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+
+def _cache_key(stmt: Select) -> str:
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    return f"{compiled}|{sorted(compiled.params.items(), key=lambda kv: kv[0])!r}"
+
+
+def _cached(key: str) -> Optional[Any]:
+    with _count_cache_lock:
+        hit = _count_cache.get(key)
+        if hit is None:
+            return None
+        if time.monotonic() - hit[0] >= COUNT_CACHE_TTL_S:
+            del _count_cache[key]
+            return None
+        _count_cache.move_to_end(key)
+        return hit[1]
+
+
+def _store(key: str, value: Any) -> Any:
+    now = time.monotonic()
+    with _count_cache_lock:
+        _count_cache[key] = (now, value)
+        _count_cache.move_to_end(key)
+        # least recently used first: drop expired entries, then anything over the bound
+        while _count_cache:
+            oldest_key, (stored_at, _) = next(iter(_count_cache.items()))
+            if now - stored_at < COUNT_CACHE_TTL_S and len(_count_cache) <= COUNT_CACHE_MAX_ENTRIES:
+                break
+            del _count_cache[oldest_key]
+    return value
+
+
+def _count_stmt(stmt: Select) -> Select:
+    return select(func.count()).select_from(stmt.order_by(None).subquery())
+
+
+_RELTUPLES_SQL = text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)")
+
+
+def scalar_for_mode(db: Session, stmt: Select, mode: str) -> Optional[Any]:
+    """
+    Run an aggregate per count mode: "exact" every time, "estimated" reusing a
+    result up to COUNT_CACHE_TTL_S old, "none" not at all.
+    """
+    if mode == "none":
+        return None
+    if mode == "exact":
+        return db.execute(stmt).scalar()
+    key = _cache_key(stmt)
+    value = _cached(key)
+    return value if value is not None else _store(key, db.execute(stmt).scalar())
+
+
+async def scalar_for_mode_async(db: AsyncSession, stmt: Select, mode: str) -> Optional[Any]:
+    if mode == "none":
+        return None
+    if mode == "exact":
+        return (await db.execute(stmt)).scalar()
+    key = _cache_key(stmt)
+    value = _cached(key)
+    return value if value is not None else _store(key, (await db.execute(stmt)).scalar())
+
+
+def count_rows(db: Session, stmt: Select, mode: str, estimate_table: Optional[str] = None) -> Optional[int]:
+    """
+    Row count of `stmt` (ordering/limit ignored) per count mode. For "estimated"
+    with `estimate_table` (pass it only when `stmt` is unfiltered) the planner's
+    pg_class.reltuples is used instead of counting.
+    """
+    if mode == "estimated" and estimate_table:
+        n = db.execute(_RELTUPLES_SQL, {"table": estimate_table}).scalar()
+        if n is not None and n >= 0:  # -1: never vacuumed/analyzed
+            return int(n)
+    n = scalar_for_mode(db, _count_stmt(stmt), mode)
+    return None if n is None else int(n)
+
+
+async def count_rows_async(
+    db: AsyncSession, stmt: Select, mode: str, estimate_table: Optional[str] = None
+) -> Optional[int]:
+    if mode == "estimated" and estimate_table:
+        n = (await db.execute(_RELTUPLES_SQL, {"table": estimate_table})).scalar()
+        if n is not None and n >= 0:
+            return int(n)
+    n = await scalar_for_mode_async(db, _count_stmt(stmt), mode)
+    return None if n is None else int(n)
+
+
 class QueryParams(BaseModel, Generic[ModelT]):
     limit: Optional[int] = Query(None, ge=1, le=200)
     offset: Optional[int] = Query(None, ge=0)
     sort_by: str = Query("id")
     sort_order: str = Query("desc", regex="^(asc|desc)$")
+    # keyset pagination: pass the previous page's next_cursor; implies sort_by=created_at.
+    # sort_by=created_at without offset also pages by keyset (and returns a cursor)
+    cursor: Optional[str] = Query(None)
+    # total count: exact | estimated | none (default: exact on offset pages, none with a cursor)
+    count: Optional[str] = Query(None, regex="^(exact|estimated|none)$")
+
+    def uses_keyset(self) -> bool:
+        return self.cursor is not None or (self.sort_by == KEYSET_COLUMN and self.offset is None)
+
+    def count_mode(self, default: str = "exact") -> str:
+        if self.count:
+            return self.count
+        return "none" if self.cursor else default
+
+    def next_cursor(self, items: Sequence[Any]) -> Optional[str]:
+        return next_cursor(items, self.limit) if self.uses_keyset() else None
+
+    def apply(self, query: Union[SAQuery, Select], model: Type[ModelT]) -> Union[SAQuery, Select]:
+        # works on legacy Query and 2.0 select() (async sessions) alike
+        if self.uses_keyset():
+            return apply_keyset(query, model, self.cursor, self.limit, self.sort_order == "desc")
 
-    def apply(self, query: SAQuery, model: Type[ModelT]) -> SAQuery:
         # Ordering
         col = getattr(model, self.sort_by, None)
         if not col:
@@ -220,6 +220,35 @@ def alert_users_before_event():
             logger.exception("❌ Failed to close DB session in alert_users_before_event")
 
 
+def reconcile_litter_clusters(full: bool = False, dry_run: bool = False):
+    _ensure_models_registered(debug=(logger.level == logging.DEBUG))
+
+    try:
+        from api.litter_groups.litter_groups_service import LitterGroupService
+    except Exception:
+        logger.exception("❌ Failed to import LitterGroupService")
+        return
+
+    SessionLocal = get_sessionmaker()
+    db = SessionLocal()
+    try:
+        summary = LitterGroupService(db).reconcile_clusters(full=full, dry_run=dry_run)
+        logger.info(
+            f"▶️ Cluster reconcile{' (dry run)' if dry_run else ''}: "
+            f"created={summary.created} updated={summary.updated} emptied={summary.emptied} "
+            f"unchanged={summary.unchanged} assigned={summary.reports_assigned} "
+            f"released={summary.reports_released}"
+        )
+        return summary
+    except Exception:
+        logger.exception("❌ Failed to reconcile litter clusters")
+    finally:
+        try:
+            db.close()
+        except Exception:
+            logger.exception("❌ Failed to close DB session in reconcile_litter_clusters")
+
+
 import time
 
 def main(argv=None):
@@ -227,6 +256,9 @@ def main(argv=None):
     parser.add_argument("--interval", type=int, help="Interval in seconds between runs (loop mode)")
     parser.add_argument("--run-update", action="store_true", help="Run update_upcoming_to_ongoing() once")
     parser.add_argument("--run-alert", action="store_true", help="Run alert_users_before_event() once")
+    parser.add_argument("--run-reconcile", action="store_true", help="Run reconcile_litter_clusters() once")
+    parser.add_argument("--full", action="store_true", help="Reconcile every cluster, not just changed ones")
+    parser.add_argument("--dry-run", action="store_true", help="Report the reconcile diff without writing it")
     parser.add_argument("--test", action="store_true", help="Run both jobs once")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
     args = parser.parse_args(argv)
@@ -237,19 +269,24 @@ def main(argv=None):
 
     # ✅ Loop mode if --interval is provided
     if args.interval:
+        from config.settings import settings
         logger.info(f"▶️ Worker started in loop mode (interval={args.interval}s)")
+        last_reconcile = 0.0
         while True:
             try:
                 update_upcoming_to_ongoing()
                 alert_users_before_event()
+                if time.monotonic() - last_reconcile >= settings.CLUSTER_RECONCILE_INTERVAL_S:
+                    reconcile_litter_clusters()
+                    last_reconcile = time.monotonic()
             except Exception:
                 logger.exception("❌ Worker loop error")
             time.sleep(args.interval)
         return
 
     # ✅ One-shot mode (default if no interval)
-    if not (args.run_update or args.run_alert or args.test):
-        logger.info("▶️ worker_main executed (no jobs run). Use --run-update, --run-alert, --test, or --interval.")
+    if not (args.run_update or args.run_alert or args.run_reconcile or args.test):
+        logger.info("▶️ worker_main executed (no jobs run). Use --run-update, --run-alert, --run-reconcile, --test, or --interval.")
         return
 
     if args.test:
@@ -263,6 +300,9 @@ def main(argv=None):
         if args.run_alert:
             logger.info("▶️ Running alert_users_before_event()")
             alert_users_before_event()
+        if args.run_reconcile:
+            logger.info("▶️ Running reconcile_litter_clusters()")
+            reconcile_litter_clusters(full=args.full, dry_run=args.dry_run)
 
 
 if __name__ == "__main__":